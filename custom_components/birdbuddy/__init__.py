@@ -2,23 +2,53 @@
 
 from __future__ import annotations
 
-from birdbuddy.client import BirdBuddy
+from datetime import datetime
+from functools import partial
+from types import ModuleType
+from typing import TYPE_CHECKING
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform, CONF_EMAIL, CONF_PASSWORD
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import Platform, CONF_DEVICE_ID, CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers.importlib import async_import_module
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import ConfigType
+import homeassistant.util.dt as dt_util
 
 from .const import (
+    CONF_CLASSIFIER_LABELS,
+    CONF_CLASSIFIER_MODEL,
+    CONF_FEEDER_ID,
+    CONF_PROFILE_LOOP,
+    CONF_REFRESH_TOKEN,
+    DATA_FLOW_SESSIONS,
     DOMAIN,
     LOGGER,
+    POLLING_INTERVAL,
     SERVICE_COLLECT_POSTCARD,
+    SERVICE_GET_SIGHTING,
+    SERVICE_QUERY_SIGHTINGS,
     SERVICE_SCHEMA_COLLECT_POSTCARD,
+    SERVICE_SCHEMA_GET_SIGHTING,
+    SERVICE_SCHEMA_QUERY_SIGHTINGS,
+    STORAGE_VERSION,
 )
-from .coordinator import BirdBuddyDataUpdateCoordinator
-from .hass_util import _find_coordinator_by_feeder
+from .governor import ApiPriority, api_priority
+from .hass_util import _feeder_id_for_device, _find_coordinator_by_feeder
+from .scheduler import async_get_scheduler
+
+if TYPE_CHECKING:
+    from birdbuddy.client import BirdBuddy
+
+    from .coordinator import BirdBuddyDataUpdateCoordinator
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
@@ -36,6 +66,9 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Setup the integration"""
     # This will register the services even if there's no ConfigEntry yet...
     _setup_services(hass)
+    if hass.http is not None:
+        media_urls = await _async_import(hass, "media_urls")
+        hass.http.register_view(media_urls.BirdBuddyMediaView(hass))
     return True
 
 
@@ -45,21 +78,131 @@ async def async_setup_entry(
 ) -> bool:
     """Set up Bird Buddy from a config entry."""
     hass.data.setdefault(DOMAIN, {})
-    client = BirdBuddy(entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD])
+    # Reuse the signed in client of the config flow (taken before anything can fail,
+    # so that it is never left behind), or else resume its session
+    client = _pop_flow_session(hass, entry)
+    # The API client and its models are only needed once an account is configured
+    client_module = await async_import_module(hass, "birdbuddy.client")
+    coordinator_module = await _async_import(hass, "coordinator")
+    if client is None:
+        client = client_module.BirdBuddy(
+            entry.data[CONF_EMAIL],
+            entry.data[CONF_PASSWORD],
+            refresh_token=entry.data.get(CONF_REFRESH_TOKEN),
+        )
     client.language_code = hass.config.language
-    coordinator = BirdBuddyDataUpdateCoordinator(hass, client, entry)
+    coordinator = coordinator_module.BirdBuddyDataUpdateCoordinator(hass, client, entry)
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
-    await coordinator.async_config_entry_first_refresh()
+    # No debounced setting write may be sent once the entry is unloaded
+    entry.async_on_unload(coordinator.writer.async_cancel)
+    if model := entry.options.get(CONF_CLASSIFIER_MODEL):
+        classifier_module = await _async_import(hass, "classifier")
+        classifier = classifier_module.LocalClassifier(
+            hass,
+            hass.config.path(model),
+            hass.config.path(entry.options[CONF_CLASSIFIER_LABELS]),
+        )
+        if await classifier.async_start():
+            coordinator.classifier = classifier
+            entry.async_on_unload(classifier.async_stop)
+    if entry.options.get(CONF_PROFILE_LOOP):
+        await _async_instrument(hass, coordinator)
+    entry.async_on_unload(entry.add_update_listener(_async_options_updated))
+    sighting_index = await _async_import(hass, "sighting_index")
+    coordinator.index = await sighting_index.async_get_index(hass)
+    await coordinator.async_load_state()
+    push = await _async_import(hass, "push")
+    entry.async_on_unload(push.async_register_webhook(hass, coordinator))
+    if not coordinator.stale:
+        # Nothing to start from: wait for the first refresh
+        await coordinator.async_config_entry_first_refresh()
 
     await hass.config_entries.async_forward_entry_setups(
         entry,
         PLATFORMS,
     )
 
+    scheduler = async_get_scheduler(hass, POLLING_INTERVAL)
+    entry.async_on_unload(scheduler.async_register(coordinator))
+    entry.async_create_background_task(
+        hass,
+        _async_start_background(hass, coordinator),
+        f"{DOMAIN} background start {entry.title}",
+    )
+
     return True
 
 
+def _pop_flow_session(hass: HomeAssistant, entry: ConfigEntry) -> BirdBuddy | None:
+    """The signed in client of the config flow that created ``entry``, if any."""
+    sessions = hass.data.get(DATA_FLOW_SESSIONS, {})
+    client = sessions.pop(entry.unique_id, None)
+    if not sessions:
+        hass.data.pop(DATA_FLOW_SESSIONS, None)
+    return client
+
+
+async def _async_instrument(
+    hass: HomeAssistant, coordinator: BirdBuddyDataUpdateCoordinator
+) -> None:
+    """Time the coordinator steps and the event handlers on the event loop."""
+    profiler = await _async_import(hass, "profiler")
+    trigger_dispatcher = await _async_import(hass, "trigger_dispatcher")
+    entry = coordinator.config_entry
+    coordinator.loop_profiler = profiler.LoopProfiler()
+    entry.async_on_unload(
+        coordinator.loop_profiler.instrument(coordinator, profiler.COORDINATOR_STEPS)
+    )
+    # The event handlers are shared by every entry
+    entry.async_on_unload(
+        profiler.async_get_profiler(hass).instrument(
+            trigger_dispatcher.async_get_dispatcher(hass), ("_async_dispatch",)
+        )
+    )
+    LOGGER.info(
+        "Event loop profiling enabled for %s: see the diagnostics",
+        coordinator.config_entry.title,
+    )
+
+
+async def _async_options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry to apply the new options."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_start_background(
+    hass: HomeAssistant,
+    coordinator: BirdBuddyDataUpdateCoordinator,
+) -> None:
+    """Finish setting up the entry, without blocking Home Assistant startup."""
+    if coordinator.stale:
+        # Entities were created from the stored snapshot: refresh them now.
+        await coordinator.async_refresh()
+    if coordinator.last_update_success and not coordinator.stale:
+        statistics = await _async_import(hass, "statistics")
+        # Without the recorder, only the index needs the hours since the last walk
+        recorder = "recorder" in hass.config.components
+        with api_priority(ApiPriority.LOW):
+            # Only the hours since the previous backfill are imported again
+            until = await statistics.async_backfill_statistics(
+                hass,
+                coordinator.client,
+                coordinator.feeders,
+                on_visits=coordinator.async_index_visits,
+                since=(
+                    coordinator.backfill_until if recorder else coordinator.index_until
+                ),
+            )
+        if until:
+            coordinator.async_set_backfill_until(until, imported=recorder)
+
+
+async def _async_import(hass: HomeAssistant, name: str) -> ModuleType:
+    """Import one of the integration modules in the executor, when first needed."""
+    return await async_import_module(hass, f"{__name__}.{name}")
+
+
 async def async_unload_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -74,6 +217,13 @@ async def async_unload_entry(
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persisted state of a config entry."""
+    # In case the entry was removed before it was ever set up
+    _pop_flow_session(hass, entry)
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
+
 async def async_remove_config_entry_device(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -107,9 +257,75 @@ def _setup_services(hass: HomeAssistant) -> bool:
 
         await coordinator.handle_collect_postcard(service.data)
 
+    async def handle_get_sighting(service: ServiceCall) -> ServiceResponse:
+        postcard_id = service.data["postcard_id"]
+        coordinator: BirdBuddyDataUpdateCoordinator | None
+        if feeder_id := service.data.get(CONF_FEEDER_ID):
+            coordinator = _find_coordinator_by_feeder(hass, feeder_id)
+        else:
+            # Sightings are only kept by the account that received the postcard
+            coordinator = next(
+                (
+                    c
+                    for c in hass.data.get(DOMAIN, {}).values()
+                    if postcard_id in c.sightings
+                ),
+                None,
+            )
+        if not coordinator:
+            raise HomeAssistantError(f"Postcard with id '{postcard_id}' not found")
+        sighting = await coordinator.async_get_sighting(postcard_id)
+        return {"postcard": {"id": postcard_id}, "sighting": sighting.data}
+
+    async def handle_query_sightings(service: ServiceCall) -> ServiceResponse:
+        data = service.data
+        feeder_id = data.get(CONF_FEEDER_ID)
+        if device_id := data.get(CONF_DEVICE_ID):
+            try:
+                feeder_id = _feeder_id_for_device(hass, device_id)
+            except (ValueError, StopIteration) as err:
+                raise HomeAssistantError(f"Unknown device '{device_id}'") from err
+        sighting_index = await _async_import(hass, "sighting_index")
+        index = await sighting_index.async_get_index(hass)
+        group_by = data.get("group_by")
+        results = await hass.async_add_executor_job(
+            partial(
+                index.query,
+                feeder_id=feeder_id,
+                species=data.get("species"),
+                start=_as_aware(data.get("start")),
+                end=_as_aware(data.get("end")),
+                recognized=data.get("recognized"),
+                group_by=group_by,
+                limit=data["limit"],
+            )
+        )
+        return {"groups" if group_by else "sightings": results}
+
     hass.services.async_register(
         DOMAIN,
         SERVICE_COLLECT_POSTCARD,
         handle_collect_postcard,
         schema=SERVICE_SCHEMA_COLLECT_POSTCARD,
     )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SIGHTING,
+        handle_get_sighting,
+        schema=SERVICE_SCHEMA_GET_SIGHTING,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_QUERY_SIGHTINGS,
+        handle_query_sightings,
+        schema=SERVICE_SCHEMA_QUERY_SIGHTINGS,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _as_aware(value: datetime | None) -> datetime | None:
+    """Times without a time zone are in Home Assistant's time zone."""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value
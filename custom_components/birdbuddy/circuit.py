@@ -0,0 +1,99 @@
+"""Circuit breaker for the Bird Buddy API."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from enum import StrEnum
+import random
+from typing import Any
+
+import homeassistant.util.dt as dt_util
+
+
+class CircuitState(StrEnum):
+    """State of the circuit breaker."""
+
+    CLOSED = "closed"
+    """Requests are made as usual."""
+    OPEN = "open"
+    """Requests are failing: no requests are made until the backoff expires."""
+    HALF_OPEN = "half_open"
+    """The backoff expired: the next request is a probe."""
+
+
+class CircuitBreaker:
+    """Stops polling a failing API, with exponential backoff and jitter.
+
+    Every failure doubles the backoff (up to ``max_backoff``). Once it expires, a
+    single probe request is allowed through: success closes the circuit again,
+    while another failure re-opens it with a longer backoff.
+    """
+
+    def __init__(
+        self,
+        base_backoff: timedelta,
+        max_backoff: timedelta,
+        threshold: int = 1,
+    ) -> None:
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.threshold = threshold
+        self.failures = 0
+        self.opened_at: datetime | None = None
+        self.retry_at: datetime | None = None
+        self.last_error: str | None = None
+
+    @property
+    def state(self) -> CircuitState:
+        """The current state of the circuit."""
+        if self.retry_at is None:
+            return CircuitState.CLOSED
+        if dt_util.utcnow() < self.retry_at:
+            return CircuitState.OPEN
+        return CircuitState.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Whether a request should be attempted now."""
+        return self.state != CircuitState.OPEN
+
+    def backoff(self) -> timedelta:
+        """The delay before the next attempt, with jitter added on top.
+
+        Even the first backoff is longer than ``base_backoff`` (the polling interval).
+        """
+        exponent = max(0, self.failures - self.threshold)
+        backoff = self.base_backoff * 2**exponent
+        return min(self.max_backoff, backoff * (1 + random.random()))
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self.opened_at = None
+        self.retry_at = None
+        self.last_error = None
+
+    def record_failure(self, error: BaseException) -> timedelta | None:
+        """Record a failed request, opening the circuit once over the threshold.
+
+        Returns the backoff, if the circuit is open.
+        """
+        self.failures += 1
+        self.last_error = str(error) or type(error).__name__
+        if self.failures < self.threshold:
+            return None
+        now = dt_util.utcnow()
+        if self.opened_at is None:
+            self.opened_at = now
+        backoff = self.backoff()
+        self.retry_at = now + backoff
+        return backoff
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the circuit state as a dictionary."""
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "opened_at": self.opened_at,
+            "retry_at": self.retry_at,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,209 @@
+"""Optional local species classifier for postcard images.
+
+The model is run in a separate process, so that classification never blocks the
+event loop. It needs the ``onnxruntime``, ``numpy`` and ``Pillow`` packages, which
+are not installed by the integration: if they are missing, the classifier is
+disabled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+import io
+import multiprocessing
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import CLASSIFIER_DEFAULT_SIZE, CLASSIFIER_MAX_IMAGES, LOGGER
+
+if TYPE_CHECKING:
+    from birdbuddy.sightings import PostcardSighting
+
+_REQUIRED_MODULES = ("numpy", "onnxruntime", "PIL")
+
+
+class Classification(NamedTuple):
+    """The most likely species of a postcard, according to the local model."""
+
+    species_id: str | None
+    """The Bird Buddy species id, if the species is one of the postcard suggestions."""
+    name: str
+    confidence: int
+    """Confidence, in percent."""
+
+    def as_event_data(self) -> dict[str, Any]:
+        """Event data for the classification."""
+        return {
+            "species": {"id": self.species_id, "name": self.name},
+            "confidence": self.confidence,
+        }
+
+
+# Worker process state
+_session = None
+
+
+def _worker_init(model_path: str) -> None:
+    """Load the model, once per worker process."""
+    global _session  # pylint: disable=global-statement
+    import onnxruntime  # pylint: disable=import-outside-toplevel
+
+    _session = onnxruntime.InferenceSession(
+        model_path, providers=["CPUExecutionProvider"]
+    )
+
+
+def _classify_batch(images: list[bytes]) -> list[list[float]]:
+    """Return the probability of each label, for each image (in the worker)."""
+    # pylint: disable=import-outside-toplevel
+    import numpy as np
+    from PIL import Image
+
+    model_input = _session.get_inputs()[0]
+    shape = model_input.shape
+    channels_last = shape[-1] == 3
+    height, width = shape[1:3] if channels_last else shape[2:4]
+    if not isinstance(height, int) or not isinstance(width, int):
+        height = width = CLASSIFIER_DEFAULT_SIZE
+
+    arrays = []
+    for data in images:
+        with Image.open(io.BytesIO(data)) as image:
+            pixels = image.convert("RGB").resize((width, height))
+            array = np.asarray(pixels, dtype=np.float32) / 255.0
+        arrays.append(array if channels_last else array.transpose(2, 0, 1))
+
+    if shape[0] == 1:
+        # The model does not support batches: one image at a time
+        batches = [np.stack([a]) for a in arrays]
+    else:
+        batches = [np.stack(arrays)]
+    scores = np.concatenate(
+        [_session.run(None, {model_input.name: batch})[0] for batch in batches]
+    ).astype(np.float32)
+
+    if (scores < 0).any() or not np.allclose(scores.sum(axis=1), 1, atol=0.01):
+        # Logits: convert to probabilities
+        exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+        scores = exp / exp.sum(axis=1, keepdims=True)
+    return scores.tolist()
+
+
+def _read_labels(path: str) -> list[str]:
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+def _best_classification(
+    scores: list[list[float]],
+    labels: list[str],
+    sighting: PostcardSighting,
+) -> Classification | None:
+    """Combine the scores of all images of one postcard into a single species."""
+    if not scores:
+        return None
+    averages = [sum(column) / len(scores) for column in zip(*scores)]
+    best = max(range(len(averages)), key=averages.__getitem__)
+    if best >= len(labels):
+        return None
+    name = labels[best]
+    suggested = {
+        c.species.name.lower(): c.species.id
+        for s in sighting.report.sightings
+        for c in s.suggestions
+    }
+    return Classification(
+        suggested.get(name.lower()), name, round(averages[best] * 100)
+    )
+
+
+class LocalClassifier:
+    """Classifies postcard images with a local ONNX model, in a worker process."""
+
+    def __init__(self, hass: HomeAssistant, model_path: str, labels_path: str):
+        self._hass = hass
+        self._model_path = model_path
+        self._labels_path = labels_path
+        self._labels: list[str] = []
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def async_start(self) -> bool:
+        """Load the labels and start the worker. Returns False if not available."""
+        if missing := [
+            m
+            for m in _REQUIRED_MODULES
+            if not await self._hass.async_add_executor_job(find_spec, m)
+        ]:
+            LOGGER.error(
+                "Local classifier disabled: missing Python packages %s", missing
+            )
+            return False
+        self._labels = await self._hass.async_add_executor_job(
+            _read_labels, self._labels_path
+        )
+        self._pool = ProcessPoolExecutor(
+            max_workers=1,
+            # Forking Home Assistant's process (and its threads) is not safe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(self._model_path,),
+        )
+        return True
+
+    async def async_stop(self) -> None:
+        """Stop the worker."""
+        if pool := self._pool:
+            self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _async_fetch(self, url: str) -> bytes | None:
+        session = async_get_clientsession(self._hass)
+        try:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                return await response.read()
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.debug("Cannot download %s: %s", url, err)
+            return None
+
+    async def async_classify(
+        self, sightings: dict[str, PostcardSighting]
+    ) -> dict[str, Classification]:
+        """Classify the images of several postcards, in a single batch."""
+        if not self._pool:
+            return {}
+        urls = [
+            (postcard_id, url)
+            for postcard_id, sighting in sightings.items()
+            for media in sighting.medias[:CLASSIFIER_MAX_IMAGES]
+            if not media.is_video and (url := media.content_url)
+        ]
+        images = await asyncio.gather(*(self._async_fetch(url) for _, url in urls))
+        batch = [(p, image) for (p, _), image in zip(urls, images) if image]
+        if not batch:
+            return {}
+
+        try:
+            scores = await self._hass.loop.run_in_executor(
+                self._pool, _classify_batch, [image for _, image in batch]
+            )
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.warning("Local classification failed: %s", err)
+            return {}
+
+        by_postcard: dict[str, list[list[float]]] = {}
+        for (postcard_id, _), row in zip(batch, scores):
+            by_postcard.setdefault(postcard_id, []).append(row)
+        return {
+            postcard_id: result
+            for postcard_id, rows in by_postcard.items()
+            if (
+                result := _best_classification(
+                    rows, self._labels, sightings[postcard_id]
+                )
+            )
+        }
@@ -6,14 +6,26 @@ from birdbuddy.client import BirdBuddy
 from birdbuddy.exceptions import AuthenticationFailedError
 from typing import Any
 
+import os
+
 import voluptuous as vol
 
 from homeassistant import config_entries
 from homeassistant.const import CONF_PASSWORD, CONF_EMAIL
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.importlib import async_import_module
 
-from .const import DOMAIN
-
+from .const import (
+    CONF_CLASSIFIER_LABELS,
+    CONF_CLASSIFIER_MODEL,
+    CONF_COMPACT_EVENTS,
+    CONF_INDEX_NEW_POSTCARDS,
+    CONF_PROFILE_LOOP,
+    CONF_REFRESH_TOKEN,
+    DATA_FLOW_SESSIONS,
+    DOMAIN,
+)
 
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
@@ -32,6 +44,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._client = None
         super().__init__()
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -47,9 +67,17 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             if result is not None:
                 await self.async_set_unique_id(user_input[CONF_EMAIL].lower())
                 self._abort_if_unique_id_configured()
+                data = dict(user_input)
+                # pylint: disable-next=protected-access
+                if (refresh_token := self._client._refresh_token) is not None:
+                    data[CONF_REFRESH_TOKEN] = refresh_token
+                # The entry is set up with the signed in client: no second sign in
+                self.hass.data.setdefault(DATA_FLOW_SESSIONS, {})[
+                    self.unique_id
+                ] = self._client
                 return self.async_create_entry(
                     title=result["title"],
-                    data=user_input,
+                    data=data,
                 )
 
         return self.async_show_form(
@@ -77,3 +105,75 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return {
             "title": self._client.user.name,
         }
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle Bird Buddy options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self._entry_id = config_entry.entry_id
+        self._options = dict(config_entry.options)
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        errors = {}
+        if user_input is not None:
+            await self._async_validate_classifier(user_input, errors)
+            if not errors:
+                return self.async_create_entry(title="", data=user_input)
+            self._options = user_input
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_COMPACT_EVENTS,
+                        default=self._options.get(CONF_COMPACT_EVENTS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_INDEX_NEW_POSTCARDS,
+                        default=self._options.get(CONF_INDEX_NEW_POSTCARDS, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_PROFILE_LOOP,
+                        default=self._options.get(CONF_PROFILE_LOOP, False),
+                    ): bool,
+                    vol.Optional(
+                        CONF_CLASSIFIER_MODEL,
+                        description={
+                            "suggested_value": self._options.get(CONF_CLASSIFIER_MODEL)
+                        },
+                    ): str,
+                    vol.Optional(
+                        CONF_CLASSIFIER_LABELS,
+                        description={
+                            "suggested_value": self._options.get(CONF_CLASSIFIER_LABELS)
+                        },
+                    ): str,
+                }
+            ),
+            errors=errors,
+            description_placeholders={"webhook_url": await self._async_webhook_url()},
+        )
+
+    async def _async_webhook_url(self) -> str:
+        if not (coordinator := self.hass.data.get(DOMAIN, {}).get(self._entry_id)):
+            # Created once the account is set up
+            return "-"
+        push = await async_import_module(self.hass, f"{__package__}.push")
+        return push.async_webhook_url(self.hass, coordinator.async_get_webhook_id())
+
+    async def _async_validate_classifier(self, user_input, errors):
+        if not (model := user_input.get(CONF_CLASSIFIER_MODEL)):
+            return
+        for key, path in (
+            (CONF_CLASSIFIER_MODEL, model),
+            (CONF_CLASSIFIER_LABELS, user_input.get(CONF_CLASSIFIER_LABELS)),
+        ):
+            if not path or not await self.hass.async_add_executor_job(
+                os.path.isfile, self.hass.config.path(path)
+            ):
+                errors[key] = "file_not_found"
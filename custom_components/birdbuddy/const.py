@@ -13,9 +13,105 @@ MANUFACTURER = "Bird Buddy, Inc."
 # Default polling interval.
 # For best performance, this should be less than the access token expiration
 POLLING_INTERVAL = timedelta(minutes=10)
+# Accounts are polled in evenly spread slots of the interval, randomly offset by up to
+# this fraction of their slot, and at most this many at the same time.
+POLL_JITTER = 0.2
+POLL_MAX_CONCURRENT = 2
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+# Signed in clients of the config flows, handed to the entries they create
+DATA_FLOW_SESSIONS = f"{DOMAIN}_flow_sessions"
+# Refreshes requested through the local webhook run at once, then at most once per
+# this many seconds.
+PUSH_REFRESH_COOLDOWN = 15
+DATA_SIGHTING_INDEX = f"{DOMAIN}_sighting_index"
+DATA_LOOP_PROFILER = f"{DOMAIN}_loop_profiler"
+# With the loop profiler enabled, anything blocking the event loop for longer than
+# this many seconds is logged.
+LOOP_SLOW_THRESHOLD = 0.05
+SIGHTING_INDEX_FILENAME = "birdbuddy_sightings.db"
+
+# Polls first check for changes with a tiny request (the latest Feed item and the
+# volatile feeder fields), and skip the refresh if nothing changed. Slow-moving
+# feeder metadata (names, firmware versions, ...) is refreshed at this interval.
+METADATA_REFRESH_INTERVAL = timedelta(hours=1)
+
+# While the API is failing, polling backs off exponentially (with jitter), up to this.
+CIRCUIT_MAX_BACKOFF = timedelta(hours=2)
+
+# Feeder settings changed within this many seconds are sent together.
+SETTING_WRITE_DELAY = 0.5
+
+# Feed sync: new items are paged in, newest first, back to the last seen item.
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGES = 50
+
+# Persisted coordinator state
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 10
+# Recent visitors restored from storage are checked against the Feed after this
+# delay, in the background, rather than at startup.
+VISITOR_REVALIDATE_DELAY = timedelta(minutes=2)
+
+# Statistics backfill: the Feed is walked in pages, and at most this many pages deep.
+BACKFILL_FEED_PAGE_SIZE = 50
+BACKFILL_FEED_MAX_PAGES = 200
+# Maximum number of hourly rows imported into the recorder at once
+BACKFILL_BATCH_SIZE = 500
+
+ATTR_STALE = "stale"
+
+# Entry data, besides the email and password: the session of the latest sign in
+CONF_REFRESH_TOKEN = "refresh_token"
+
+# Options
+CONF_COMPACT_EVENTS = "compact_events"
+CONF_CLASSIFIER_MODEL = "classifier_model"
+CONF_CLASSIFIER_LABELS = "classifier_labels"
+CONF_PROFILE_LOOP = "profile_loop"
+CONF_INDEX_NEW_POSTCARDS = "index_new_postcards"
+
+# Local classifier: at most this many images of each postcard are classified, and
+# the result is used to collect postcards if at least this confident (unless the
+# collect_postcard call sets its own best_guess_confidence).
+CLASSIFIER_MAX_IMAGES = 3
+CLASSIFIER_MIN_CONFIDENCE = 50
+# Input size for models that do not declare one
+CLASSIFIER_DEFAULT_SIZE = 224
+
+# Full sightings of the latest postcards are kept in memory, for compact events.
+SIGHTING_CACHE_SIZE = 50
+# Signed URLs of this many media items are kept, to serve their stable local URLs.
+MEDIA_CACHE_SIZE = 200
+# At most this many species collections are kept (there are not that many species).
+COLLECTION_CACHE_SIZE = 1000
+# The media of the latest browsed collections are kept, to play the one picked.
+BROWSED_COLLECTION_CACHE_SIZE = 2
+# Media items indexed by feeder and date, for the media browser (oldest days dropped)
+MEDIA_INDEX_SIZE = 5000
+# The index is only kept in memory: at startup, it is filled again from this many
+# Feed pages, and from the species collections.
+MEDIA_INDEX_SEED_PAGES = 5
+
+# Images are resized to the smallest of these widths that is at least the requested
+# width, so that only a few variants of each image exist. The image entity serves
+# the display width, and entity pictures use the thumbnail width.
+IMAGE_VARIANT_WIDTHS = (160, 320, 640, 1280)
+IMAGE_THUMBNAIL_WIDTH = 320
+IMAGE_DISPLAY_WIDTH = 1280
+IMAGE_JPEG_QUALITY = 80
+# Resized images kept in memory (a few tens of kB each)
+IMAGE_VARIANT_CACHE_SIZE = 40
+# Local media URLs require authentication: entity pictures are signed for this long,
+# and signed again halfway through.
+MEDIA_URL_SIGN_EXPIRATION = timedelta(hours=24)
 
 CONF_FEEDER_ID = "feeder_id"
 TRIGGER_TYPE_POSTCARD = "new_postcard"
+TRIGGER_TYPE_SPECIES = "species_seen"
+TRIGGER_TYPE_UNLOCKED = "species_unlocked"
+TRIGGER_TYPE_UNRECOGNIZED = "unrecognized_visitor"
+CONF_SPECIES = "species"
+DATA_TRIGGER_DISPATCHER = f"{DOMAIN}_trigger_dispatcher"
 EVENT_NEW_POSTCARD_SIGHTING = f"{DOMAIN}_new_postcard_sighting"
 
 SERVICE_COLLECT_POSTCARD = "collect_postcard"
@@ -23,7 +119,8 @@ SERVICE_SCHEMA_COLLECT_POSTCARD = vol.Schema(
     {
         vol.Required("postcard"): cv.has_at_least_one_key("id"),
         vol.Required("sighting"): {
-            vol.Required("sightingReport"): {},
+            # Not included in compact events: looked up by postcard id instead
+            vol.Optional("sightingReport"): {},
             vol.Required("feeder"): vol.All(
                 cv.has_at_least_one_key("id"),
                 cv.has_at_least_one_key("name"),
@@ -37,3 +134,35 @@ SERVICE_SCHEMA_COLLECT_POSTCARD = vol.Schema(
     },
     extra=vol.ALLOW_EXTRA,
 )
+
+SERVICE_GET_SIGHTING = "get_sighting"
+SERVICE_SCHEMA_GET_SIGHTING = vol.Schema(
+    {
+        vol.Required("postcard_id"): cv.string,
+        # The feeder of the postcard, to find its account
+        vol.Optional(CONF_FEEDER_ID): cv.string,
+    }
+)
+
+SERVICE_QUERY_SIGHTINGS = "query_sightings"
+SIGHTING_QUERY_GROUPS = ("species", "feeder", "day", "hour")
+SERVICE_SCHEMA_QUERY_SIGHTINGS = vol.Schema(
+    {
+        vol.Optional(CONF_DEVICE_ID): cv.string,
+        vol.Optional(CONF_FEEDER_ID): cv.string,
+        # Species id or name
+        vol.Optional("species"): cv.string,
+        vol.Optional("start"): cv.datetime,
+        vol.Optional("end"): cv.datetime,
+        vol.Optional("recognized"): cv.boolean,
+        vol.Optional("group_by"): vol.In(SIGHTING_QUERY_GROUPS),
+        vol.Optional("limit", default=100): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+    }
+)
+
+API_RATE = 1.0
+"""Sustained API requests per second, per account."""
+API_BURST = 20
+"""API requests that can be made at once before being throttled."""
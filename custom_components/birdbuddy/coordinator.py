@@ -2,22 +2,76 @@
 
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncIterator, Mapping
+from datetime import datetime
+import time
+from typing import TYPE_CHECKING, Any
+
 from birdbuddy.client import BirdBuddy
+from birdbuddy.exceptions import AuthenticationFailedError
 from birdbuddy.feed import FeedNode, FeedNodeType
 from birdbuddy.feeder import Feeder
 from birdbuddy.media import Collection
 from birdbuddy.sightings import PostcardSighting, SightingFinishStrategy
+from birdbuddy.user import BirdBuddyUser
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import EventOrigin, HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import EventOrigin, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     CALLBACK_TYPE,
     DataUpdateCoordinator,
     UpdateFailed,
 )
+import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN, EVENT_NEW_POSTCARD_SIGHTING, LOGGER, POLLING_INTERVAL
+from .const import (
+    API_BURST,
+    API_RATE,
+    CIRCUIT_MAX_BACKOFF,
+    CLASSIFIER_MIN_CONFIDENCE,
+    CONF_COMPACT_EVENTS,
+    CONF_INDEX_NEW_POSTCARDS,
+    DOMAIN,
+    EVENT_NEW_POSTCARD_SIGHTING,
+    FEED_MAX_PAGES,
+    FEED_PAGE_SIZE,
+    LOGGER,
+    MEDIA_INDEX_SEED_PAGES,
+    METADATA_REFRESH_INTERVAL,
+    POLLING_INTERVAL,
+    PUSH_REFRESH_COOLDOWN,
+    SIGHTING_CACHE_SIZE,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+from .circuit import CircuitBreaker, CircuitState
 from .device import BirdBuddyDevice
-from .visitors import RecentVisitors, VisitorCallback
+from .governor import ApiGovernor
+from .images import ImageVariants
+from .media_index import MediaIndex
+from .media_urls import MediaResolver
+from .metrics import ApiMetrics, InstrumentedClient
+from .probe import ChangeProbe
+from .sighting_index import IndexedSighting, SightingIndex
+from .snapshots import CollectionSummary, MediaRef, async_fetch_collections
+from .util import (
+    FeedWalk,
+    LruCache,
+    Visit,
+    _async_iter_feed,
+    _compact_postcard_event,
+    _visits_from_node,
+)
+from .writes import SettingWriter
+
+if TYPE_CHECKING:
+    from .classifier import Classification, LocalClassifier
+    from .profiler import LoopProfiler
+    from .visitors import RecentVisitors, VisitorCallback
 
 
 class BirdBuddyDataUpdateCoordinator(DataUpdateCoordinator[BirdBuddy]):
@@ -26,6 +80,7 @@ class BirdBuddyDataUpdateCoordinator(DataUpdateCoordinator[BirdBuddy]):
     config_entry: ConfigEntry
     client: BirdBuddy
     feeders: dict[str, BirdBuddyDevice]
+    platforms: list[Platform]
     visitors: dict[str, RecentVisitors]
 
     def __init__(
@@ -35,26 +90,317 @@ class BirdBuddyDataUpdateCoordinator(DataUpdateCoordinator[BirdBuddy]):
         entry: ConfigEntry,
     ) -> None:
         """Initialize the BirdBuddy data coordinator."""
-        self.client = client
+        # The unwrapped client holds the session tokens
+        self._session = client
+        self._stored_refresh_token: str | None = None
+        self.metrics = ApiMetrics()
+        self.governor = ApiGovernor(API_RATE, API_BURST)
+        self.client = InstrumentedClient(client, self.metrics, self.governor)
+        self.circuit = CircuitBreaker(POLLING_INTERVAL, CIRCUIT_MAX_BACKOFF)
+        self.probe = ChangeProbe()
+        self.writer = SettingWriter(hass, self._async_feeder_changed)
+        self.media = MediaResolver(self.client)
+        self.media_index = MediaIndex()
+        # Older media is only indexed once browsed, at most once per run
+        self._media_index_seeded = False
+        self._media_index_lock = asyncio.Lock()
+        self.images = ImageVariants(hass)
+        self.collections: dict[str, CollectionSummary] = {}
         self.feeders = {}
         self.visitors = {}
+        self.sightings: LruCache[str, PostcardSighting] = LruCache(SIGHTING_CACHE_SIZE)
+        self.classifications: LruCache[str, Classification] = LruCache(
+            SIGHTING_CACHE_SIZE
+        )
+        self.classifier: LocalClassifier | None = None
+        # Only with the "profile the event loop" option
+        self.loop_profiler: LoopProfiler | None = None
+        self.index: SightingIndex | None = None
+        self._feeder_listeners: dict[str, dict[CALLBACK_TYPE, None]] = {}
         self.first_update = True
+        self.stale = False
+        self.feed_high_water: datetime | None = None
+        # The cursor and newest node of each Feed walk that did not reach the previous
+        # one (or the mark), oldest first
+        self._feed_resumes: list[tuple[str, datetime]] = []
+        # The mark and resume points of the latest walk, until its nodes are processed
+        self._feed_pending: (
+            tuple[datetime | None, list[tuple[str, datetime]]] | None
+        ) = None
+        self.last_full_refresh: datetime | None = None
+        # The visit history was imported up to this hour
+        self.backfill_until: datetime | None = None
+        # ... and indexed up to this hour (even without the recorder)
+        self.index_until: datetime | None = None
+        self._snapshot_user: BirdBuddyUser | None = None
+        self._visitor_snapshots: dict[str, dict] = {}
+        self._webhook_id: str | None = None
+        # Scheduled polls and webhook requests must not process the same Feed twice
+        self._update_lock = asyncio.Lock()
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
         super().__init__(
             hass,
             LOGGER,
             name=DOMAIN,
-            update_interval=POLLING_INTERVAL,
+            # Polled by the integration-wide PollScheduler
+            update_interval=None,
+            request_refresh_debouncer=Debouncer(
+                hass, LOGGER, cooldown=PUSH_REFRESH_COOLDOWN, immediate=True
+            ),
         )
+        self.config_entry = entry
+
+    async def async_load_state(self) -> None:
+        """Restore the state persisted by a previous run."""
+        if not (data := await self._store.async_load()):
+            return
+        if high_water := data.get("feed_high_water"):
+            self.feed_high_water = datetime.fromisoformat(high_water)
+        if backfill_until := data.get("backfill_until"):
+            self.backfill_until = datetime.fromisoformat(backfill_until)
+        if index_until := data.get("index_until") or backfill_until:
+            self.index_until = datetime.fromisoformat(index_until)
+        resumes = data.get("feed_resumes") or []
+        if resume := data.get("feed_resume"):
+            # Stored as a single walk by earlier versions
+            resumes = [resume]
+        self._feed_resumes = [
+            (resume["cursor"], datetime.fromisoformat(resume["newest"]))
+            for resume in resumes
+        ]
+        if user := data.get("user"):
+            self._snapshot_user = BirdBuddyUser(user)
+        if feeders := data.get("feeders"):
+            # Entities can be created from the last known snapshot, while the first
+            # live refresh is still pending.
+            self.feeders = {i: BirdBuddyDevice(f) for (i, f) in feeders.items()}
+            self.stale = True
+        self._visitor_snapshots = data.get("visitors") or {}
+        self._webhook_id = data.get("webhook_id")
+        if refresh_token := data.get("refresh_token"):
+            # Newer than the token of the config entry, if any: tokens are rotated
+            # pylint: disable-next=protected-access
+            self._session._refresh_token = self._stored_refresh_token = refresh_token
+
+    def _state_to_store(self) -> dict:
+        user = self.user
+        self._stored_refresh_token = self._refresh_token
+        return {
+            "feed_high_water": (
+                self.feed_high_water.isoformat() if self.feed_high_water else None
+            ),
+            "feed_resumes": [
+                {"cursor": cursor, "newest": newest.isoformat()}
+                for cursor, newest in self._feed_resumes
+            ],
+            "backfill_until": (
+                self.backfill_until.isoformat() if self.backfill_until else None
+            ),
+            "index_until": self.index_until.isoformat() if self.index_until else None,
+            "user": user.data if user else None,
+            "feeders": {i: f.data for (i, f) in self.feeders.items()},
+            "visitors": self._visitor_snapshots,
+            "webhook_id": self._webhook_id,
+            "refresh_token": self._stored_refresh_token,
+        }
+
+    @callback
+    def async_set_backfill_until(self, until: datetime, imported: bool = True) -> None:
+        """Remember up to when the visit history was indexed, and ``imported``."""
+        self.index_until = until
+        if imported:
+            self.backfill_until = until
+        self._store.async_delay_save(self._state_to_store, STORAGE_SAVE_DELAY)
+
+    @callback
+    def async_get_webhook_id(self) -> str:
+        """The id of the webhook refreshing this account, created when first needed."""
+        if not self._webhook_id:
+            # pylint: disable=import-outside-toplevel
+            from homeassistant.components.webhook import async_generate_id
+
+            self._webhook_id = async_generate_id()
+            self._store.async_delay_save(self._state_to_store, STORAGE_SAVE_DELAY)
+        return self._webhook_id
+
+    async def async_refresh_collections(self) -> dict[str, CollectionSummary]:
+        """Fetch the species collections."""
+        self.collections = await async_fetch_collections(self.client)
+        return self.collections
+
+    async def async_seed_media_index(self) -> None:
+        """Index the latest media again, when first browsed after a restart.
+
+        The first Feed pages are read, then the media of each species collection.
+        """
+        async with self._media_index_lock:
+            if self._media_index_seeded:
+                return
+            self._media_index_seeded = True
+            await self._async_seed_media_index()
+
+    async def _async_seed_media_index(self) -> None:
+        feeder_ids = list(self.feeders)
+        try:
+            async for node in _async_iter_feed(
+                self.client, FEED_PAGE_SIZE, max_pages=MEDIA_INDEX_SEED_PAGES
+            ):
+                self.media_index.add_node(node, feeder_ids)
+            if not self.collections:
+                await self.async_refresh_collections()
+            for collection in list(self.collections.values()):
+                medias = await self.client.collection(collection.collection_id)
+                self.media_index.add_collection(
+                    collection, map(MediaRef.from_media, medias.values()), feeder_ids
+                )
+        except Exception as exc:  # pylint: disable=broad-except
+            # Media found so far stays indexed, the rest is indexed when browsed
+            LOGGER.warning("Media indexing stopped early: %s", exc)
+        LOGGER.debug("Indexed %d media items", len(self.media_index))
+
+    @property
+    def _refresh_token(self) -> str | None:
+        """The refresh token of the current session."""
+        return self._session._refresh_token  # pylint: disable=protected-access
+
+    @property
+    def user(self) -> BirdBuddyUser | None:
+        """The logged in user, or the last known user if not refreshed yet."""
+        return self.client.user or self._snapshot_user
+
+    @callback
+    def async_add_feeder_listener(
+        self, feeder_id: str, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for changes to a single feeder, made outside of a refresh."""
+        listeners = self._feeder_listeners.setdefault(feeder_id, {})
+        listeners[update_callback] = None
+
+        @callback
+        def remove_listener() -> None:
+            listeners.pop(update_callback, None)
+            if not listeners:
+                self._feeder_listeners.pop(feeder_id, None)
+
+        return remove_listener
+
+    @callback
+    def async_update_feeder_listeners(self, feeder_id: str) -> None:
+        """Notify only the listeners of one feeder."""
+        for update_callback in list(self._feeder_listeners.get(feeder_id, ())):
+            update_callback()
+
+    @callback
+    def _async_feeder_changed(self, feeder_id: str) -> None:
+        """Notify listeners that a feeder changed outside of a refresh."""
+        self.async_update_feeder_listeners(feeder_id)
 
     def add_visitor_listener(
         self, feeder: Feeder, listener: VisitorCallback
     ) -> CALLBACK_TYPE:
         """Register a callback to be called when a new visitor is detected."""
         if feeder.id not in self.visitors:
-            self.visitors[feeder.id] = RecentVisitors(feeder, self.client, self.hass)
+            # Only loaded once the first visitor entity is added
+            from .visitors import (  # pylint: disable=import-outside-toplevel
+                RecentVisitors,
+            )
+
+            self.visitors[feeder.id] = RecentVisitors(
+                feeder,
+                self.client,
+                self.hass,
+                self.async_get_sighting,
+                refresh_collections=self.async_refresh_collections,
+                snapshot=self._visitor_snapshots.get(feeder.id),
+                on_change=self._async_visitors_changed,
+            )
         return self.visitors[feeder.id].register_callback(listener)
 
-    async def _process_feed(self, feed: list[FeedNode]) -> bool:
+    @callback
+    def _async_visitors_changed(self, visitors: RecentVisitors) -> None:
+        """Persist the latest visitor, to restore it at the next startup."""
+        if snapshot := visitors.as_snapshot():
+            self._visitor_snapshots[visitors.feeder.id] = snapshot
+            self._store.async_delay_save(self._state_to_store, STORAGE_SAVE_DELAY)
+
+    async def _async_iter_new_feed(self) -> AsyncIterator[FeedNode]:
+        """Page back through the Feed to the high-water mark, yielding each new node.
+
+        Without a high-water mark (first run), only the first page is returned. The
+        high-water mark only advances with ``_async_commit_feed()``, once every new
+        node has been processed, so an interrupted sync will resume from the same
+        point on the next update.
+
+        After a long time offline, the mark may be more than ``FEED_MAX_PAGES`` pages
+        back: the walk is then resumed from its last page at the next update, after
+        the nodes that arrived meanwhile. If those are more than ``FEED_MAX_PAGES``
+        pages too, that walk is resumed first, down to where the previous one started.
+        """
+        self._feed_pending = None
+        mark = self.feed_high_water
+        resumes = list(self._feed_resumes)
+        newest = resumes[-1][1] if resumes else mark
+        walk = FeedWalk()
+        async for node in _async_iter_feed(
+            self.client,
+            page_size=FEED_PAGE_SIZE,
+            # Down to the mark, or to the start of the walk to resume
+            newer_than=newest,
+            max_pages=FEED_MAX_PAGES if mark else 1,
+            walk=walk,
+        ):
+            if (created_at := node.created_at) and (not newest or created_at > newest):
+                newest = created_at
+            yield node
+
+        if mark and not walk.complete:
+            LOGGER.info(
+                "More than %d Feed pages since %s: the rest is read at the next update",
+                FEED_MAX_PAGES,
+                mark,
+            )
+            # The earlier interrupted walks are resumed after this one
+            resumes.append((walk.cursor, newest))
+        elif resumes:
+            # Down to where the previous interrupted walk started, or to the mark
+            cursor, _ = resumes.pop()
+            end = resumes[-1][1] if resumes else mark
+            LOGGER.debug("Resuming the Feed walk back to %s", end)
+            walk = FeedWalk()
+            async for node in _async_iter_feed(
+                self.client,
+                page_size=FEED_PAGE_SIZE,
+                newer_than=end,
+                max_pages=FEED_MAX_PAGES,
+                after=cursor,
+                walk=walk,
+            ):
+                yield node
+            if not walk.complete:
+                resumes.append((walk.cursor, newest))
+            elif resumes:
+                # Everything since the previous interrupted walk has been read
+                resumes[-1] = (resumes[-1][0], newest)
+
+        pending = (mark, resumes) if resumes else (newest, [])
+        if pending != (mark, self._feed_resumes):
+            self._feed_pending = pending
+
+    @callback
+    def _async_commit_feed(self) -> None:
+        """Advance the high-water mark past the nodes that were just processed."""
+        if (pending := self._feed_pending) is None:
+            return
+        self._feed_pending = None
+        LOGGER.debug(
+            "Updating latest seen Feed timestamp: %s -> %s",
+            self.feed_high_water,
+            pending[0],
+        )
+        self.feed_high_water, self._feed_resumes = pending
+        self._store.async_delay_save(self._state_to_store, STORAGE_SAVE_DELAY)
+
+    async def _process_feed(self) -> None:
         """Attempt to process new feed items.
 
         There are some options for how we can process these:
@@ -63,43 +409,115 @@ class BirdBuddyDataUpdateCoordinator(DataUpdateCoordinator[BirdBuddy]):
         - For all new postcards, we can simply emit a HA event, and leave it up to
           the user's automations to finish them, however (and if) the user wants.
         """
-        LOGGER.debug("Found feed items %s", feed)
-        postcards = [
-            node for node in feed if node.node_type == FeedNodeType.NewPostcard
-        ]
-
-        for node in feed:
+        postcards = []
+        visits = []
+        async for node in self._async_iter_new_feed():
+            LOGGER.debug("Found feed item %s", node)
+            self.media_index.add_node(node, list(self.feeders))
+            if self.index:
+                visits.extend(_visits_from_node(node, list(self.feeders)))
             if node.node_type == FeedNodeType.SpeciesUnlocked and (
                 c := Collection(node.get("collection"))
             ):
                 LOGGER.info("Recently unlocked species: %s", c.bird_name)
-                self.client.collections.setdefault(c.collection_id, c)
+                if self.collections:
+                    self.collections.setdefault(c.collection_id, CollectionSummary(c))
+            elif node.node_type == FeedNodeType.NewPostcard:
+                postcards.append(node)
+        if visits:
+            await self.async_index_visits(visits)
+        if postcards:
+            await self._process_postcards(postcards)
+        # Only now: if anything failed, the same nodes are processed again next time
+        self._async_commit_feed()
 
-        LOGGER.debug("Found postcards %s", postcards)
-        for postcard in postcards:
-            LOGGER.debug("A new postcard is ready to process: %s", postcard)
-            if not self.hass.bus.async_listeners().get(EVENT_NEW_POSTCARD_SIGHTING):
-                # if no one is listening, no sense in getting sighting data
-                LOGGER.debug("No event listeners: skipping postcard conversion")
-                continue
+    async def async_index_visits(self, visits: list[Visit]) -> None:
+        """Add collected visits to the sighting index."""
+        if not self.index:
+            return
+        await self.index.async_add(
+            self.hass,
+            [
+                IndexedSighting.from_visit(
+                    self.config_entry.entry_id,
+                    visit,
+                    f.name if (f := self.feeders.get(visit.feeder_id)) else None,
+                )
+                for visit in visits
+            ],
+        )
+
+    async def _process_postcards(self, postcards: list[FeedNode]) -> None:
+        """Emit an event for each new postcard of this update."""
+        LOGGER.debug("New postcards are ready to process: %s", postcards)
+        listening = bool(
+            self.hass.bus.async_listeners().get(EVENT_NEW_POSTCARD_SIGHTING)
+        )
+        # Reading the sighting changes the postcard on the server: without listeners,
+        # new postcards are only indexed if asked to (else, once they are collected)
+        index = (
+            self.index
+            if listening
+            or self.config_entry.options.get(CONF_INDEX_NEW_POSTCARDS, False)
+            else None
+        )
+        if not listening and not index:
+            # if no one is listening, no sense in getting sighting data
+            LOGGER.debug("No event listeners: skipping postcard conversion")
+            return
 
-            # emit a new event with sighting data and postcard data
-            # expose services that can:
-            # 1. auto-collect a recognized bird
-            # 2. manually assign a species
-            # 3. auto-collect a best-guess species, using sightingReport confidence
-            # 4. assign the sighting as "mystery visitor"
-            # 5. all-in-one service that can choose the best option of 1, 3, or 4
-            # Automations could use the sighting media URLs to do additional AI processing,
-            # such as with Merlin or other AI classifiers, and then do #2 with the results.
-            # If this is a viable option, we can supply a Recipe in docs to show how this could
-            # be done. Similarly, we can supply some default blueprints to handle this with
-            # user input.
+        # emit a new event with sighting data and postcard data
+        # expose services that can:
+        # 1. auto-collect a recognized bird
+        # 2. manually assign a species
+        # 3. auto-collect a best-guess species, using sightingReport confidence
+        # 4. assign the sighting as "mystery visitor"
+        # 5. all-in-one service that can choose the best option of 1, 3, or 4
+        # Automations could use the sighting media URLs to do additional AI processing,
+        # such as with Merlin or other AI classifiers, and then do #2 with the results.
+        # If this is a viable option, we can supply a Recipe in docs to show how this could
+        # be done. Similarly, we can supply some default blueprints to handle this with
+        # user input.
+        sightings: dict[str, PostcardSighting] = {}
+        for postcard in postcards:
             sighting = await self.client.sighting_from_postcard(postcard=postcard)
-            data = {
-                "postcard": postcard.data,
-                "sighting": sighting.data,
-            }
+            sightings[postcard.node_id] = self.sightings[postcard.node_id] = sighting
+            for media in sighting.medias:
+                self.media.add(media)
+            self.media_index.add_postcard(postcard, sighting)
+
+        if self.classifier and listening:
+            # All images of this update are classified in a single batch
+            self.classifications.update(await self.classifier.async_classify(sightings))
+
+        if index:
+            await index.async_add(
+                self.hass,
+                [
+                    indexed
+                    for postcard in postcards
+                    for indexed in IndexedSighting.from_postcard(
+                        self.config_entry.entry_id,
+                        postcard,
+                        sightings[postcard.node_id],
+                    )
+                ],
+            )
+        if not listening:
+            # The sightings were only needed for the index
+            return
+
+        for postcard in postcards:
+            sighting = sightings[postcard.node_id]
+            if self.config_entry.options.get(CONF_COMPACT_EVENTS, False):
+                data = _compact_postcard_event(postcard, sighting)
+            else:
+                data = {
+                    "postcard": postcard.data,
+                    "sighting": sighting.data,
+                }
+            if classification := self.classifications.get(postcard.node_id):
+                data["classification"] = classification.as_event_data()
             self.hass.bus.fire(
                 event_type=EVENT_NEW_POSTCARD_SIGHTING,
                 event_data=data,
@@ -107,44 +525,182 @@ class BirdBuddyDataUpdateCoordinator(DataUpdateCoordinator[BirdBuddy]):
             )
 
     async def _async_update_data(self) -> BirdBuddy:
+        async with self._update_lock:
+            return await self._async_update_data_locked()
+
+    async def _async_update_data_locked(self) -> BirdBuddy:
+        if not self.circuit.allow_request():
+            # Don't keep hammering a failing API: wait for the backoff to expire
+            return self._serve_snapshot(
+                UpdateFailed(
+                    f"Bird Buddy API unavailable until {self.circuit.retry_at}"
+                )
+            )
+
+        recovering = self.circuit.state != CircuitState.CLOSED
+        start = time.perf_counter()
         try:
-            await self.client.refresh()
+            data = await self._async_update_feeders()
+        except UpdateFailed as err:
+            if backoff := self.circuit.record_failure(err):
+                LOGGER.warning(
+                    "Bird Buddy update failed (%s attempts), retrying after %s: %s",
+                    self.circuit.failures,
+                    backoff,
+                    err,
+                )
+            return self._serve_snapshot(err)
+        finally:
+            self.metrics.last_poll_duration = time.perf_counter() - start
+
+        if recovering:
+            LOGGER.info("Bird Buddy API recovered")
+        self.circuit.record_success()
+        return data
+
+    def _serve_snapshot(self, err: UpdateFailed) -> BirdBuddy:
+        """Keep serving the last known feeder data, if any, marked as stale."""
+        if not self.feeders:
+            raise err
+        self.stale = True
+        return self.client
+
+    async def _async_update_feeders(self) -> BirdBuddy:
+        try:
+            # The first update refreshes everything, and does not process the Feed
+            probe = (
+                None if self.first_update else await self.probe.async_probe(self.client)
+            )
+            full = probe is None or self._metadata_due()
+            if not full and not probe.changed:
+                LOGGER.debug("Nothing changed: skipping the refresh")
+                if self._refresh_token != self._stored_refresh_token:
+                    self._store.async_delay_save(
+                        self._state_to_store, STORAGE_SAVE_DELAY
+                    )
+                return self.client
+            if full or probe.feeders.keys() != self.feeders.keys():
+                await self._async_full_refresh()
+            elif probe.feeders_changed:
+                self._merge_feeders(probe.feeders)
 
             # Skip processing the Feed on the first update. This works around a minor issue
             # where the `automation` integration is not loaded yet by the time we make our first
             # update call. If we proceed, we might emit the postcard feed items while there are
-            # no automations listening; and because refresh_feed() keeps track of the last seen
-            # feed item timestamp, that would prevent seeing that postcard again.
+            # no automations listening; and because the Feed high-water mark keeps track of the
+            # last seen feed item timestamp, that would prevent seeing that postcard again.
             # This delays the first attempt at postcard handling until the next update interval.
-            if not self.first_update:
-                feed = await self.client.refresh_feed()
-                await self._process_feed(feed)
+            if not self.first_update and (probe is None or probe.feed_changed):
+                await self._process_feed()
+        except UpdateFailed:
+            self.probe.reset()
+            raise
         except Exception as exc:
+            self.probe.reset()
             raise UpdateFailed(exc) from exc
 
+        self.first_update = False
+        self.stale = False
+        self._store.async_delay_save(self._state_to_store, STORAGE_SAVE_DELAY)
+        return self.client
+
+    def _metadata_due(self) -> bool:
+        """Whether the slow-moving feeder metadata should be refreshed."""
+        return (
+            self.stale
+            or self.last_full_refresh is None
+            or dt_util.utcnow() - self.last_full_refresh >= METADATA_REFRESH_INTERVAL
+        )
+
+    async def _async_full_refresh(self) -> None:
+        """Refresh the user and every field of every feeder."""
+        resumed = self._refresh_token is not None
+        try:
+            await self.client.refresh()
+        except AuthenticationFailedError:
+            if not resumed or self._refresh_token is not None:
+                raise
+            # The session could not be resumed: the client dropped its refresh token
+            LOGGER.info("Bird Buddy session expired: signing in again")
+            await self.client.refresh()
         if not self.client.feeders:
             raise UpdateFailed("No Feeders found")
+        self._merge_feeders(self.client.feeders)
+        self.last_full_refresh = dt_util.utcnow()
 
-        feeders = {
-            id: BirdBuddyDevice(f) for (id, f) in self.client.feeders.items()
-        }  # noqa: A001
+    def _merge_feeders(self, feeders: Mapping[str, Mapping[str, Any]]) -> None:
+        """Update the feeders with (some of) their fields."""
         # pylint: disable=invalid-name
         for i, f in feeders.items():
             if i in self.feeders:
                 self.feeders[i].update(f)
             else:
-                self.feeders[i] = f
-        self.first_update = False
-        return self.client
+                self.feeders[i] = BirdBuddyDevice(f)
+
+    async def async_get_sighting(self, postcard_id: str) -> PostcardSighting:
+        """The full sighting of a postcard that was seen recently.
+
+        The sighting is only converted from the postcard once, when it is new:
+        converting it again would change it on the server.
+        """
+        if (sighting := self.sightings.get(postcard_id)) is None:
+            raise HomeAssistantError(
+                f"The sighting of postcard '{postcard_id}' is no longer in memory"
+            )
+        return sighting
+
+    async def _apply_classification(
+        self,
+        sighting: PostcardSighting,
+        classification: Classification,
+        confidence: int | None,
+    ) -> PostcardSighting:
+        """Choose the locally classified species for undecided sightings.
+
+        Only species suggested by Bird Buddy can be chosen, and only if the local
+        classification is at least as confident as the best-guess threshold.
+        """
+        threshold = CLASSIFIER_MIN_CONFIDENCE if confidence is None else confidence
+        if not classification.species_id or classification.confidence < threshold:
+            return sighting
+        report = original = sighting.report
+        for s in original.sightings:
+            if s.is_recognized or classification.species_id not in {
+                c.species.id for c in s.suggestions
+            }:
+                continue
+            LOGGER.debug(
+                "Choosing locally classified species %s (%s%%) for sighting %s",
+                classification.name,
+                classification.confidence,
+                s.id,
+            )
+            report = await self.client.sighting_choose_species(
+                s.id, classification.species_id, report
+            )
+        if report is original:
+            return sighting
+        return PostcardSighting(sighting.data | {"sightingReport": report.data})
 
     async def handle_collect_postcard(self, data: dict[str, any]) -> bool:
         """Handle the `birdbuddy.collect_postcard` service call."""
-        sighting = PostcardSighting(data["sighting"])
         postcard_id = data["postcard"]["id"]
+        if "sightingReport" in data["sighting"]:
+            sighting = PostcardSighting(data["sighting"])
+        else:
+            # From a compact event
+            sighting = await self.async_get_sighting(postcard_id)
         strategy = SightingFinishStrategy(data.get("strategy", "recognized"))
         confidence = data.get("best_guess_confidence")
         share_media = data.get("share_media", False)
 
+        if strategy != SightingFinishStrategy.RECOGNIZED and (
+            classification := self.classifications.get(postcard_id)
+        ):
+            sighting = await self._apply_classification(
+                sighting, classification, confidence
+            )
+
         LOGGER.debug(
             "Calling collect_postcard: id=%s, sighting=%s, strategy=%s",
             postcard_id,
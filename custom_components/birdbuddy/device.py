@@ -4,10 +4,39 @@ from homeassistant.helpers.entity import DeviceInfo
 from birdbuddy.feeder import Feeder
 from .const import DOMAIN, MANUFACTURER
 
+# Feeder fields used by the integration. Other fields (such as the members of the
+# feeder, with their names and emails) are not kept in memory or in storage.
+FEEDER_KEYS = frozenset(
+    {
+        "__typename",
+        "audioEnabled",
+        "availableFirmwareVersion",
+        "battery",
+        "firmwareVersion",
+        "food",
+        "frequency",
+        "id",
+        "locationCity",
+        "locationCountry",
+        "name",
+        "offGrid",
+        "ownerName",
+        "powerProfile",
+        "serialNumber",
+        "signal",
+        "state",
+        "temperature",
+    }
+)
+
 
 class BirdBuddyDevice(Feeder):
     """Represents one Bird Buddy device"""
 
+    def __setitem__(self, key: str, item: any) -> None:
+        if key in FEEDER_KEYS:
+            super().__setitem__(key, item)
+
     @property
     def device_info(self) -> DeviceInfo:
         """The Home Assistant DeviceInfo"""
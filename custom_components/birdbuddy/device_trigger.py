@@ -10,14 +10,13 @@ from homeassistant.components.device_automation import DEVICE_TRIGGER_BASE_SCHEM
 from homeassistant.components.device_automation.exceptions import (
     InvalidDeviceAutomationConfig,
 )
-from homeassistant.components.homeassistant.triggers import event as event_trigger
 from homeassistant.const import (
     CONF_DEVICE_ID,
     CONF_DOMAIN,
     CONF_PLATFORM,
     CONF_TYPE,
 )
-from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HassJob, HomeAssistant
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.trigger import TriggerActionType, TriggerInfo
 from homeassistant.helpers.typing import ConfigType
@@ -25,20 +24,32 @@ from homeassistant.helpers.typing import ConfigType
 from . import DOMAIN
 from .const import (
     CONF_FEEDER_ID,
-    EVENT_NEW_POSTCARD_SIGHTING,
+    CONF_SPECIES,
     TRIGGER_TYPE_POSTCARD,
+    TRIGGER_TYPE_SPECIES,
+    TRIGGER_TYPE_UNLOCKED,
+    TRIGGER_TYPE_UNRECOGNIZED,
 )
 from .hass_util import (
     _find_coordinator_by_device,
     _feeder_id_for_device,
 )
 
-TRIGGER_TYPES = {TRIGGER_TYPE_POSTCARD}
+from .trigger_dispatcher import TriggerKey, async_get_dispatcher
+
+TRIGGER_TYPES = {
+    TRIGGER_TYPE_POSTCARD,
+    TRIGGER_TYPE_SPECIES,
+    TRIGGER_TYPE_UNLOCKED,
+    TRIGGER_TYPE_UNRECOGNIZED,
+}
 
 TRIGGER_SCHEMA = DEVICE_TRIGGER_BASE_SCHEMA.extend(
     {
         vol.Required(CONF_TYPE): vol.In(TRIGGER_TYPES),
         vol.Optional(CONF_FEEDER_ID): cv.string,
+        # Species id or name, for the species_seen trigger
+        vol.Optional(CONF_SPECIES): cv.string,
     }
 )
 
@@ -48,6 +59,8 @@ async def async_validate_trigger_config(
 ) -> ConfigType:
     """Validate config."""
     config = TRIGGER_SCHEMA(config)
+    if config[CONF_TYPE] == TRIGGER_TYPE_SPECIES and not config.get(CONF_SPECIES):
+        raise InvalidDeviceAutomationConfig("A species is required")
     coordinator = _find_coordinator_by_device(hass, config[CONF_DEVICE_ID])
     if not coordinator:
         raise InvalidDeviceAutomationConfig()
@@ -69,17 +82,32 @@ async def async_get_triggers(
         CONF_DOMAIN: DOMAIN,
     }
 
-    # new postcard trigger
-    triggers.append(
+    # new postcard triggers
+    triggers.extend(
         {
             **base_trigger,
-            CONF_TYPE: TRIGGER_TYPE_POSTCARD,
+            CONF_TYPE: trigger_type,
             CONF_FEEDER_ID: feeder_id,
         }
+        for trigger_type in (
+            TRIGGER_TYPE_POSTCARD,
+            TRIGGER_TYPE_SPECIES,
+            TRIGGER_TYPE_UNLOCKED,
+            TRIGGER_TYPE_UNRECOGNIZED,
+        )
     )
     return triggers
 
 
+async def async_get_trigger_capabilities(
+    hass: HomeAssistant, config: ConfigType
+) -> dict[str, vol.Schema]:
+    """List trigger capabilities."""
+    if config[CONF_TYPE] == TRIGGER_TYPE_SPECIES:
+        return {"extra_fields": vol.Schema({vol.Required(CONF_SPECIES): cv.string})}
+    return {}
+
+
 async def async_attach_trigger(
     hass: HomeAssistant,
     config: ConfigType,
@@ -87,20 +115,14 @@ async def async_attach_trigger(
     trigger_info: TriggerInfo,
 ) -> CALLBACK_TYPE:
     """Attach a trigger."""
-    event_data = {}
     if CONF_FEEDER_ID not in config:
         config[CONF_FEEDER_ID] = _feeder_id_for_device(hass, config[CONF_DEVICE_ID])
-    if CONF_FEEDER_ID in config:
-        # Add feeder id to trigger event data
-        # The event will include .sighting.feeder.id, so that's what we will trigger on
-        event_data["sighting"] = {"feeder": {"id": config[CONF_FEEDER_ID]}}
-    event_config = event_trigger.TRIGGER_SCHEMA(
-        {
-            event_trigger.CONF_PLATFORM: "event",
-            event_trigger.CONF_EVENT_TYPE: EVENT_NEW_POSTCARD_SIGHTING,
-            event_trigger.CONF_EVENT_DATA: event_data,
-        }
+    # The event will include .sighting.feeder.id, so that's what we will trigger on
+    key = TriggerKey(
+        config[CONF_TYPE], config.get(CONF_FEEDER_ID), config.get(CONF_SPECIES)
     )
-    return await event_trigger.async_attach_trigger(
-        hass, event_config, action, trigger_info, platform_type="device"
+    return async_get_dispatcher(hass).async_attach(
+        key,
+        HassJob(action, f"birdbuddy trigger {trigger_info}"),
+        trigger_info["trigger_data"],
     )
@@ -0,0 +1,50 @@
+"""Diagnostics support for Bird Buddy."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_REFRESH_TOKEN, DATA_LOOP_PROFILER, DOMAIN
+from .coordinator import BirdBuddyDataUpdateCoordinator
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    "memberEmail",
+    "serialNumber",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: BirdBuddyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    profiler = coordinator.loop_profiler
+    shared = hass.data.get(DATA_LOOP_PROFILER) if profiler else None
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "feeders": async_redact_data(
+            {i: f.data for (i, f) in coordinator.feeders.items()}, TO_REDACT
+        ),
+        "stale": coordinator.stale,
+        "circuit": coordinator.circuit.as_dict(),
+        "api": coordinator.metrics.as_dict(),
+        "governor": coordinator.governor.as_dict(),
+        "probe": coordinator.probe.as_dict(),
+        "last_full_refresh": (
+            coordinator.last_full_refresh.isoformat()
+            if coordinator.last_full_refresh
+            else None
+        ),
+        "loop_profile": profiler.as_dict() if profiler else None,
+        # The event handlers of every entry, while this one is profiled
+        "loop_profile_shared": shared.as_dict() if shared else None,
+    }
@@ -1,7 +1,12 @@
 """Bird Buddy entity helpers"""
 
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from .const import ATTR_STALE
 from .coordinator import BirdBuddyDataUpdateCoordinator, BirdBuddyDevice
 
 
@@ -20,6 +25,15 @@ class BirdBuddyMixin(CoordinatorEntity, RestoreEntity):
         self.feeder = feeder
         self._attr_device_info = feeder.device_info
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Changes to this feeder alone (e.g., settings) don't notify other feeders
+        self.async_on_remove(
+            self.coordinator.async_add_feeder_listener(
+                self.feeder.id, self._handle_coordinator_update
+            )
+        )
+
     def _handle_coordinator_update(self) -> None:
         self.device_info.update(self.feeder.device_info)
         return super()._handle_coordinator_update()
@@ -34,3 +48,28 @@ class BirdBuddyMixin(CoordinatorEntity, RestoreEntity):
     @property
     def available(self) -> bool:
         return self.feeder is not None
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        attrs = super().extra_state_attributes
+        if self.coordinator.stale:
+            # Showing the last known state, not yet confirmed by a live refresh
+            return {**(attrs or {}), ATTR_STALE: True}
+        return attrs
+
+
+class BirdBuddyAccountEntity(CoordinatorEntity):
+    """Helper for entities of a Bird Buddy account, rather than of a feeder"""
+
+    coordinator: BirdBuddyDataUpdateCoordinator
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+        key: str,
+        name: str,
+    ) -> None:
+        super().__init__(coordinator)
+        self._attr_name = f"Bird Buddy {entry.title} {name}"
+        self._attr_unique_id = f"{entry.entry_id}-{key}"
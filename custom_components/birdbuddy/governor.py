@@ -0,0 +1,146 @@
+"""Account-wide API request budget."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import heapq
+import itertools
+from typing import Any
+
+
+class ApiPriority(IntEnum):
+    """Priority of an API request. Lower values are served first."""
+
+    HIGH = 0
+    """Postcard processing and user actions."""
+    NORMAL = 1
+    """Polling, recent visitors and firmware checks."""
+    LOW = 2
+    """Media browsing and statistics backfill."""
+
+
+OPERATION_PRIORITIES = {
+    "finish_postcard": ApiPriority.HIGH,
+    "set_power_profile": ApiPriority.HIGH,
+    "sighting_choose_species": ApiPriority.HIGH,
+    "sighting_from_postcard": ApiPriority.HIGH,
+    "toggle_audio_enabled": ApiPriority.HIGH,
+    "toggle_off_grid": ApiPriority.HIGH,
+    "update_firmware_start": ApiPriority.HIGH,
+}
+"""Default priority of client operations, if not ``ApiPriority.NORMAL``."""
+
+_current_priority: ContextVar[ApiPriority | None] = ContextVar(
+    "birdbuddy_api_priority", default=None
+)
+
+
+@contextmanager
+def api_priority(priority: ApiPriority) -> Iterator[None]:
+    """Run API requests made within this context (and its tasks) at ``priority``."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def priority_for(operation: str) -> ApiPriority:
+    """The priority of an API request for ``operation`` in the current context."""
+    if (priority := _current_priority.get()) is not None:
+        return priority
+    return OPERATION_PRIORITIES.get(operation, ApiPriority.NORMAL)
+
+
+class ApiGovernor:
+    """Token bucket shared by every API request of one account.
+
+    Requests are allowed through immediately while tokens are available. Once the
+    bucket is empty, requests wait for the next token, highest priority first.
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated: float | None = None
+        self._waiters: list[tuple[ApiPriority, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._requests = {p: 0 for p in ApiPriority}
+        self._throttled = {p: 0 for p in ApiPriority}
+        self._wait_time = {p: 0.0 for p in ApiPriority}
+        self._max_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self._updated is not None:
+            elapsed = now - self._updated
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+    async def acquire(self, priority: ApiPriority = ApiPriority.NORMAL) -> None:
+        """Wait until the request is allowed through."""
+        loop = asyncio.get_running_loop()
+        self._refill(loop.time())
+        self._requests[priority] += 1
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        start = loop.time()
+        future: asyncio.Future[None] = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._throttled[priority] += 1
+        self._release()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted, but will not be used
+                self._tokens += 1
+            raise
+        finally:
+            waited = loop.time() - start
+            self._wait_time[priority] += waited
+            self._max_wait = max(self._max_wait, waited)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._release()
+
+    def _release(self) -> None:
+        """Hand out the available tokens to the highest priority waiters."""
+        loop = asyncio.get_running_loop()
+        self._refill(loop.time())
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                # Cancelled while waiting
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        if self._waiters and self._timer is None:
+            delay = (1 - self._tokens) / self._rate
+            self._timer = loop.call_later(max(0.0, delay), self._on_timer)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the throttling statistics as a dictionary."""
+        return {
+            "rate": self._rate,
+            "burst": self._burst,
+            "tokens": round(self._tokens, 2),
+            "waiting": len(self._waiters),
+            "max_wait": self._max_wait,
+            "priorities": {
+                p.name.lower(): {
+                    "requests": self._requests[p],
+                    "throttled": self._throttled[p],
+                    "wait_time": self._wait_time[p],
+                }
+                for p in ApiPriority
+            },
+        }
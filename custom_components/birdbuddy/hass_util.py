@@ -1,9 +1,15 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import device_registry as dr
 
 from .const import DOMAIN
-from .coordinator import BirdBuddyDataUpdateCoordinator
+
+if TYPE_CHECKING:
+    from .coordinator import BirdBuddyDataUpdateCoordinator
 
 
 def _feeder_id_for_device(
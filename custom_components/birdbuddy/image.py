@@ -1,16 +1,11 @@
 """The Bird Buddy image entity."""
 
-from birdbuddy.media import Media, is_media_expired
-from homeassistant.components.image import (
-    UNDEFINED,
-    ImageEntity,
-    Image,
-)
+from homeassistant.components.image import ImageEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN, LOGGER
+from .const import DOMAIN, IMAGE_DISPLAY_WIDTH, IMAGE_THUMBNAIL_WIDTH, LOGGER
 from .coordinator import BirdBuddyDataUpdateCoordinator
 from .device import BirdBuddyDevice
 from .entity import BirdBuddyMixin
@@ -36,7 +31,7 @@ class BirdBuddyRecentVisitorImageEntity(BirdBuddyMixin, ImageEntity):
     _attr_has_entity_name = True
     _attr_name = "Recent Visitor Image"
 
-    _latest_media: Media | None = None
+    _media_id: str | None = None
 
     def __init__(
         self,
@@ -47,7 +42,6 @@ class BirdBuddyRecentVisitorImageEntity(BirdBuddyMixin, ImageEntity):
         """Initialize the entity."""
         ImageEntity.__init__(self, hass)
         BirdBuddyMixin.__init__(self, feeder, coordinator)
-        self._latest_media = None
         self._attr_unique_id = f"{self.feeder.id}-recent-image"
 
     def image(self) -> bytes | None:
@@ -55,25 +49,6 @@ class BirdBuddyRecentVisitorImageEntity(BirdBuddyMixin, ImageEntity):
         # See async_image()
         return None
 
-    async def _async_load_image_from_url(self, url: str) -> Image | None:
-        """
-        Load an image by URL, ensuring compatibility with Home Assistant.
-
-        This method overrides the parent implementation because cloudfront
-        sometimes returns a `text/plain` content type for image data, which
-        is incompatible with Home Assistant's requirement for `image/*`.
-        To address this, the content type is explicitly set to `image/jpeg`.
-
-        If there's an HTTP error, `fetch_url` will still raise the appropriate
-        exception.
-        """
-        if response := await self._fetch_url(url):
-            return Image(
-                content=response.content,
-                content_type="image/jpeg",
-            )
-        return None
-
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
         self.async_on_remove(
@@ -83,29 +58,44 @@ class BirdBuddyRecentVisitorImageEntity(BirdBuddyMixin, ImageEntity):
             )
         )
 
+    async def async_image(self) -> bytes | None:
+        """Return bytes of image.
+
+        The image is resized (and always re-encoded as JPEG, even though cloudfront
+        sometimes returns it as `text/plain`), and cached by media id.
+        """
+        if not self._media_id:
+            return None
+        try:
+            # Signed URLs expire: resolve the current URL of the latest media
+            if not (
+                media := await self.coordinator.media.async_resolve(self._media_id)
+            ):
+                return None
+            return await self.coordinator.images.async_get(media, IMAGE_DISPLAY_WIDTH)
+        except Exception as err:  # pylint: disable=broad-except
+            # e.g. the download failed, or it is not an image Pillow can read
+            LOGGER.debug("Cannot get image %s: %s", self._media_id, err)
+            return None
+
     @callback
     def _on_recent_visitor(self, visitors: RecentVisitors) -> None:
-        self._update_url(visitors.latest_media)
+        media = visitors.latest_media
+        if not media or media.id == self._media_id:
+            # Same visitor (perhaps with new signed URLs): nothing changed
+            return
+        LOGGER.debug("Updating latest image for %s: %s", self.feeder.name, media.id)
+        self.coordinator.media.add(media)
+        self._media_id = media.id
+        self._attr_image_last_updated = media.created_at
         self.async_write_ha_state()
-
-    def _update_url(self, media: Media) -> None:
-        if (
-            media
-            and (url := media.content_url or media.thumbnail_url)
-            and (created_at := media.created_at)
-            and not is_media_expired(url)
-        ):
-            LOGGER.debug(
-                "Updating latest image for %s: %s",
-                self.feeder.name,
-                url,
+        if not media.is_video and not media.is_expired:
+            # Prepare the images before the frontend asks for them (restored media
+            # may be expired: it is resolved again when requested)
+            self.coordinator.config_entry.async_create_background_task(
+                self.hass,
+                self.coordinator.images.async_prefetch(
+                    media, (IMAGE_THUMBNAIL_WIDTH, IMAGE_DISPLAY_WIDTH)
+                ),
+                name=f"{self.entity_id} - prepare image",
             )
-            self._attr_image_url = url
-            self._attr_image_last_updated = created_at
-            self._attr_entity_picture = url
-            self._cached_image = None
-        elif (url := self.image_url) and url is not UNDEFINED and is_media_expired(url):
-            # Clear it
-            self._attr_image_url = None
-            self._attr_image_last_updated = None
-            self._attr_entity_picture = None
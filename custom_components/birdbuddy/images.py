@@ -0,0 +1,129 @@
+"""Resized variants of Bird Buddy images."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+import io
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    IMAGE_JPEG_QUALITY,
+    IMAGE_VARIANT_CACHE_SIZE,
+    IMAGE_VARIANT_WIDTHS,
+    LOGGER,
+)
+from .snapshots import MediaRef
+from .util import LruCache
+
+
+def _variant_width(width: int | None) -> int | None:
+    """The variant width to serve for a requested width (None for the original)."""
+    if width is None:
+        return None
+    return next((w for w in IMAGE_VARIANT_WIDTHS if w >= width), None)
+
+
+def _resize(data: bytes, widths: Iterable[int | None]) -> dict[int | None, bytes]:
+    """Resize and re-encode an image to each of ``widths`` (in the executor)."""
+    # Pillow is a Home Assistant core dependency, but slow to import
+    from PIL import Image  # pylint: disable=import-outside-toplevel
+
+    variants: dict[int | None, bytes] = {}
+    with Image.open(io.BytesIO(data)) as image:
+        largest = max((w for w in widths if w), default=None)
+        if largest and largest < image.width:
+            # JPEG: decode at a reduced scale, which is much faster
+            image.draft("RGB", (largest, image.height * largest // image.width))
+        image.load()
+        for width in widths:
+            if not width or width >= image.size[0]:
+                # Never scale up
+                variants[width] = data
+                continue
+            height = max(1, round(image.size[1] * width / image.size[0]))
+            variant = image.convert("RGB").resize(
+                (width, height), Image.Resampling.LANCZOS, reducing_gap=3.0
+            )
+            output = io.BytesIO()
+            variant.save(output, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+            variants[width] = output.getvalue()
+    return variants
+
+
+class ImageVariants:
+    """Downloads images, and keeps resized variants of them.
+
+    Variants are keyed by media id and width: the image of a media item never
+    changes, even when its signed URLs do.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, maxsize: int = IMAGE_VARIANT_CACHE_SIZE
+    ) -> None:
+        self._hass = hass
+        self._variants: LruCache[tuple[str, int | None], bytes] = LruCache(maxsize)
+        self._pending: dict[str, asyncio.Task[dict[int | None, bytes]]] = {}
+
+    async def async_get(self, media: MediaRef, width: int | None = None) -> bytes:
+        """The image of ``media``, resized for ``width``."""
+        width = _variant_width(width)
+        if (data := self._variants.get((media.id, width))) is not None:
+            return data
+        variants = await self._async_generate(media, [width])
+        return variants[width]
+
+    async def async_prefetch(self, media: MediaRef, widths: Iterable[int]) -> None:
+        """Generate the variants of ``media`` for ``widths``, if not already done."""
+        missing = {
+            w
+            for w in map(_variant_width, widths)
+            if (media.id, w) not in self._variants
+        }
+        if not missing:
+            return
+        try:
+            await self._async_generate(media, missing)
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.debug("Cannot prepare image %s: %s", media.id, err)
+
+    async def _async_generate(
+        self, media: MediaRef, widths: Iterable[int | None]
+    ) -> dict[int | None, bytes]:
+        # The same image is only downloaded once at a time
+        if pending := self._pending.get(media.id):
+            variants = await asyncio.shield(pending)
+            if all(w in variants for w in widths):
+                return variants
+        task = self._hass.async_create_task(
+            self._async_download_and_resize(media, list(widths)),
+            eager_start=True,
+        )
+        self._pending[media.id] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._pending.get(media.id) is task:
+                del self._pending[media.id]
+
+    async def _async_download_and_resize(
+        self, media: MediaRef, widths: list[int | None]
+    ) -> dict[int | None, bytes]:
+        session = async_get_clientsession(self._hass)
+        async with session.get(media.content_url or media.thumbnail_url) as response:
+            response.raise_for_status()
+            data = await response.read()
+        variants = await self._hass.async_add_executor_job(_resize, data, widths)
+        LOGGER.debug(
+            "Resized image %s (%d bytes): %s",
+            media.id,
+            len(data),
+            {w: len(v) for w, v in variants.items()},
+        )
+        for width, variant in variants.items():
+            if width is not None:
+                # Originals are large, and only served on request
+                self._variants[(media.id, width)] = variant
+        return variants
@@ -0,0 +1,196 @@
+"""In-memory index of an account's media, by feeder, day and week."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from datetime import datetime
+from typing import TYPE_CHECKING, NamedTuple
+
+from birdbuddy.media import Media
+import homeassistant.util.dt as dt_util
+
+from .const import MEDIA_INDEX_SIZE
+from .snapshots import MediaRef
+from .util import _feeder_id_for_media, _medias_from_node
+
+if TYPE_CHECKING:
+    from birdbuddy.feed import FeedNode
+    from birdbuddy.sightings import PostcardSighting
+
+    from .snapshots import CollectionSummary
+
+
+class IndexedMedia(NamedTuple):
+    """A media item, with what it shows and where it was captured."""
+
+    media: MediaRef
+    created_at: datetime
+    feeder_id: str
+    species_name: str | None
+    collection_id: str | None
+    """The species collection, once the media was collected."""
+    day: str
+    """Local date, e.g. ``2024-05-01``."""
+    week: str
+    """ISO week of the local date, e.g. ``2024-W18``."""
+
+
+def _buckets(created_at: datetime) -> tuple[str, str]:
+    local = dt_util.as_local(created_at)
+    year, week, _ = local.isocalendar()
+    return local.date().isoformat(), f"{year}-W{week:02d}"
+
+
+class MediaIndex:
+    """The media of an account, bucketed as it is seen.
+
+    Media is added from the Feed, from new postcards and from browsed collections.
+    Listing the buckets, or the media of one bucket, takes time proportional to
+    that listing only. Once ``maxsize`` media items are indexed, the oldest days
+    are dropped.
+    """
+
+    def __init__(self, maxsize: int = MEDIA_INDEX_SIZE) -> None:
+        self.maxsize = maxsize
+        self._media: dict[str, IndexedMedia] = {}
+        self._by_day: dict[str, dict[str, IndexedMedia]] = {}
+        self._by_week: dict[str, dict[str, IndexedMedia]] = {}
+        self._by_feeder: dict[str, dict[str, dict[str, IndexedMedia]]] = {}
+        self._feeder_counts: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._media)
+
+    def get(self, media_id: str) -> IndexedMedia | None:
+        """The indexed media item, if known."""
+        return self._media.get(media_id)
+
+    def add(
+        self,
+        media: MediaRef,
+        feeder_id: str,
+        species_name: str | None = None,
+        collection_id: str | None = None,
+        created_at: datetime | None = None,
+    ) -> None:
+        """Index a media item, or update it (e.g., with its latest signed URLs)."""
+        if not (created_at := media.created_at or created_at):
+            return
+        if existing := self._media.get(media.id):
+            species_name = species_name or existing.species_name
+            collection_id = collection_id or existing.collection_id
+            self._remove(existing)
+        item = IndexedMedia(
+            media,
+            created_at,
+            feeder_id,
+            species_name,
+            collection_id,
+            *_buckets(created_at),
+        )
+        self._media[media.id] = item
+        self._by_day.setdefault(item.day, {})[media.id] = item
+        self._by_week.setdefault(item.week, {})[media.id] = item
+        self._by_feeder.setdefault(feeder_id, {}).setdefault(item.day, {})[
+            media.id
+        ] = item
+        self._feeder_counts[feeder_id] += 1
+        while len(self._media) > self.maxsize and len(self._by_day) > 1:
+            self._drop_day(min(self._by_day))
+
+    def add_node(self, node: FeedNode, feeder_ids: list[str]) -> None:
+        """Index the media of a Feed item."""
+        species = node.get("species") or []
+        if not species and (s := (node.get("collection") or {}).get("species")):
+            species = [s]
+        species_name = ", ".join(s["name"] for s in species if s.get("name")) or None
+        collection_id = (node.get("collection") or {}).get("id")
+        for media in _medias_from_node(node):
+            if feeder_id := _feeder_id_for_media(media, feeder_ids):
+                self.add(
+                    MediaRef.from_media(Media(media)),
+                    feeder_id,
+                    species_name,
+                    collection_id,
+                    node.created_at,
+                )
+
+    def add_postcard(self, postcard: FeedNode, sighting: PostcardSighting) -> None:
+        """Index the media of a new (not yet collected) postcard."""
+        if not (feeder_id := sighting.feeder.get("id")):
+            return
+        for media in sighting.medias:
+            self.add(
+                MediaRef.from_media(media),
+                feeder_id,
+                created_at=postcard.created_at,
+            )
+
+    def add_collection(
+        self,
+        collection: CollectionSummary,
+        medias: Iterable[MediaRef],
+        feeder_ids: list[str],
+    ) -> None:
+        """Index the media of a species collection."""
+        for media in medias:
+            # Like Media, MediaRef keeps the thumbnail URL (which has the feeder id)
+            if feeder_id := _feeder_id_for_media(
+                {"thumbnailUrl": media.thumbnail_url}, feeder_ids
+            ):
+                self.add(
+                    media, feeder_id, collection.bird_name, collection.collection_id
+                )
+
+    def feeders(self) -> dict[str, int]:
+        """The number of media items of each feeder."""
+        return dict(self._feeder_counts)
+
+    def days(self, feeder_id: str | None = None) -> dict[str, int]:
+        """The number of media items of each day (of a feeder), newest first."""
+        days = self._by_feeder.get(feeder_id, {}) if feeder_id else self._by_day
+        return {day: len(days[day]) for day in sorted(days, reverse=True)}
+
+    def weeks(self) -> dict[str, int]:
+        """The number of media items of each week, newest first."""
+        return {
+            week: len(self._by_week[week])
+            for week in sorted(self._by_week, reverse=True)
+        }
+
+    def day(self, day: str, feeder_id: str | None = None) -> list[IndexedMedia]:
+        """The media items of a day (of a feeder), newest first."""
+        if feeder_id:
+            items = self._by_feeder.get(feeder_id, {}).get(day, {})
+        else:
+            items = self._by_day.get(day, {})
+        return _newest_first(items.values())
+
+    def week(self, week: str) -> list[IndexedMedia]:
+        """The media items of a week, newest first."""
+        return _newest_first(self._by_week.get(week, {}).values())
+
+    def _remove(self, item: IndexedMedia) -> None:
+        media_id = item.media.id
+        del self._media[media_id]
+        for buckets, key in (
+            (self._by_day, item.day),
+            (self._by_week, item.week),
+            (self._by_feeder[item.feeder_id], item.day),
+        ):
+            del buckets[key][media_id]
+            if not buckets[key]:
+                del buckets[key]
+        self._feeder_counts[item.feeder_id] -= 1
+        if not self._feeder_counts[item.feeder_id]:
+            del self._feeder_counts[item.feeder_id]
+            del self._by_feeder[item.feeder_id]
+
+    def _drop_day(self, day: str) -> None:
+        for item in list(self._by_day[day].values()):
+            self._remove(item)
+
+
+def _newest_first(items: Iterable[IndexedMedia]) -> list[IndexedMedia]:
+    return sorted(items, key=lambda item: item.created_at, reverse=True)
@@ -1,8 +1,9 @@
 """Bird Buddy Media Source"""
 
-from datetime import datetime
-from typing import Optional, cast
-from birdbuddy.media import Collection, Media
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Optional, cast
 
 from homeassistant.components.media_player import MediaClass, MediaType
 from homeassistant.components.media_source.error import MediaSourceError, Unresolvable
@@ -16,8 +17,23 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 import homeassistant.util.dt as dt_util
 
-from .const import DOMAIN
-from .coordinator import BirdBuddyDataUpdateCoordinator
+from .const import BROWSED_COLLECTION_CACHE_SIZE, DOMAIN
+from .governor import ApiPriority, api_priority
+from .snapshots import MediaRef
+from .util import LruCache
+
+if TYPE_CHECKING:
+    from .coordinator import BirdBuddyDataUpdateCoordinator
+    from .media_index import IndexedMedia
+    from .snapshots import CollectionSummary
+
+# Pseudo collection ids of the media index trees
+_VIEW_FEEDER = "@feeder"
+_VIEW_DAY = "@day"
+_VIEW_WEEK = "@week"
+_VIEW_MEDIA = "@media"
+"""Media that was not collected: it is not in any collection."""
+_VIEWS = {_VIEW_FEEDER: "By feeder", _VIEW_DAY: "By day", _VIEW_WEEK: "By week"}
 
 
 class BirdBuddyMediaSource(MediaSource):
@@ -29,6 +45,10 @@ class BirdBuddyMediaSource(MediaSource):
         """Initialize BirdBuddyMediaSource."""
         super().__init__(DOMAIN)
         self.hass = hass
+        # Media of the latest browsed collections, by (entry id, collection id)
+        self._browsed: LruCache[tuple[str, str], dict[str, MediaRef]] = LruCache(
+            BROWSED_COLLECTION_CACHE_SIZE
+        )
 
     def _root_media_source(self) -> BrowseMediaSource:
         return BrowseMediaSource(
@@ -69,39 +89,83 @@ class BirdBuddyMediaSource(MediaSource):
                 f"Incomplete media identifier specified: {item.identifier}"
             )
 
-        coordinator: BirdBuddyDataUpdateCoordinator = self.hass.data[DOMAIN][config_id]
-        medias = await coordinator.client.collection(collection_id)
-        media = medias[media_id]
-
-        url = media.content_url
-        if not url:
+        # The media was most likely picked from a collection that was just browsed
+        medias = self._browsed.get((config_id, collection_id))
+        media = medias.get(media_id) if medias else None
+        if not media or media.is_expired:
+            coordinator: BirdBuddyDataUpdateCoordinator = self.hass.data[DOMAIN][
+                config_id
+            ]
+            indexed = coordinator.media_index.get(media_id)
+            if indexed and not indexed.media.is_expired:
+                media = indexed.media
+            elif collection_id == _VIEW_MEDIA:
+                # Not collected (yet): only the Feed has its latest URLs
+                if indexed:
+                    coordinator.media.add(indexed.media)
+                with api_priority(ApiPriority.LOW):
+                    media = await coordinator.media.async_resolve(media_id)
+            else:
+                with api_priority(ApiPriority.LOW):
+                    medias = await self._async_fetch_collection(
+                        coordinator, config_id, collection_id
+                    )
+                media = medias.get(media_id)
+
+        if not media or not (url := media.content_url):
             raise Unresolvable(f"Could not resolve media item: {item.identifier}")
 
         return PlayMedia(url, _mime_type(media))
 
+    async def _async_fetch_collection(
+        self,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+        config_id: str,
+        collection_id: str,
+    ) -> dict[str, MediaRef]:
+        """Fetch the media of a collection, keeping only what the media source uses."""
+        medias = await coordinator.client.collection(collection_id)
+        refs = {media_id: MediaRef.from_media(m) for media_id, m in medias.items()}
+        self._browsed[(config_id, collection_id)] = refs
+        if collection := coordinator.collections.get(collection_id):
+            coordinator.media_index.add_collection(
+                collection, refs.values(), list(coordinator.feeders)
+            )
+        return refs
+
     async def async_browse_media(
         self,
         item: MediaSourceItem,
     ) -> BrowseMediaSource:
         """Return media."""
+        # Browsing must not hold up polling or postcard processing
+        with api_priority(ApiPriority.LOW):
+            return await self._async_browse_media(item)
+
+    async def _async_browse_media(self, item: MediaSourceItem) -> BrowseMediaSource:
         if item.identifier:
             config = None
             coordinator: BirdBuddyDataUpdateCoordinator = None
-            config_id, collection_id, _ = self._parse_identifier(item.identifier)
+            config_id, collection_id, key = self._parse_identifier(item.identifier)
             if config_id:
                 config = self._get_config_or_raise(config_id)
                 coordinator = self.hass.data[DOMAIN][config_id]
 
-            if coordinator and not coordinator.client.collections:
-                await coordinator.client.refresh_collections()
+            if config and collection_id in _VIEWS:
+                # Only kept in memory: filled again when first browsed after a restart
+                await coordinator.async_seed_media_index()
+                return self._build_media_view(config, coordinator, collection_id, key)
+
+            if coordinator and not coordinator.collections:
+                await coordinator.async_refresh_collections()
 
             if config and collection_id:
                 if (
-                    not coordinator.client.collections
-                    or collection_id not in coordinator.client.collections
+                    not coordinator.collections
+                    or collection_id not in coordinator.collections
                 ):
-                    await coordinator.client.refresh_collections()
-                collection = coordinator.client.collections[collection_id]
+                    await coordinator.async_refresh_collections()
+                collection = coordinator.collections[collection_id]
                 return await self._build_media_collection_entries(
                     config, coordinator, collection
                 )
@@ -126,7 +190,7 @@ class BirdBuddyMediaSource(MediaSource):
             can_play=False,
             can_expand=True,
             children_media_class=MediaClass.DIRECTORY,
-            thumbnail=coordinator.client.user.avatar_url,
+            thumbnail=user.avatar_url if (user := coordinator.user) else None,
         )
 
     def _build_media_config(self, config: ConfigEntry) -> BrowseMediaSource:
@@ -147,7 +211,7 @@ class BirdBuddyMediaSource(MediaSource):
     def _build_media_collection(
         cls,
         config: ConfigEntry,
-        collection: Collection,
+        collection: CollectionSummary,
     ) -> BrowseMediaSource:
         return BrowseMediaSource(
             domain=DOMAIN,
@@ -158,32 +222,41 @@ class BirdBuddyMediaSource(MediaSource):
             can_play=False,
             can_expand=True,
             children_media_class=MediaClass.IMAGE,
-            thumbnail=collection.cover_media.thumbnail_url,
+            thumbnail=(
+                collection.cover_media.thumbnail_url if collection.cover_media else None
+            ),
         )
 
     async def _build_media_collection_entries(
         self,
         config: ConfigEntry,
         coordinator: BirdBuddyDataUpdateCoordinator,
-        collection: Collection,
+        collection: CollectionSummary,
     ) -> BrowseMediaSource:
         base = self._build_media_collection(config, collection)
-        base.children = []
-        medias = await coordinator.client.collection(collection.collection_id)
-        for media_id, media in medias.items():
-            relative_title = _best_timedelta_title(media.created_at, dt_util.utcnow())
-            base.children.append(
-                BrowseMediaSource(
-                    domain=DOMAIN,
-                    identifier=f"{config.entry_id}#{collection.collection_id}#{media_id}",
-                    media_class=_media_class(media),
-                    media_content_type=_mime_type(media),
-                    title=relative_title,
-                    can_play=media.is_video,
-                    can_expand=media.is_video,
-                    thumbnail=media.thumbnail_url,
-                )
+        medias = await self._async_fetch_collection(
+            coordinator, config.entry_id, collection.collection_id
+        )
+        # Collections can have thousands of media: the same "now" for all of them
+        now = dt_util.now()
+        prefix = base.identifier
+        base.children = [
+            BrowseMediaSource(
+                domain=DOMAIN,
+                identifier=f"{prefix}#{media_id}",
+                media_class=_media_class(media),
+                media_content_type=_mime_type(media),
+                title=(
+                    _best_timedelta_title(media.created_at, now)
+                    if media.created_at
+                    else media_id
+                ),
+                can_play=media.is_video,
+                can_expand=media.is_video,
+                thumbnail=media.thumbnail_url,
             )
+            for media_id, media in medias.items()
+        ]
         return base
 
     async def _build_media_collections(
@@ -192,8 +265,11 @@ class BirdBuddyMediaSource(MediaSource):
         coordinator: BirdBuddyDataUpdateCoordinator,
     ) -> BrowseMediaSource:
         base = self._account_media_source(config)
-        collections = await coordinator.client.refresh_collections()
+        collections = await coordinator.async_refresh_collections()
         base.children = [
+            _directory(f"{config.entry_id}#{view}", title)
+            for view, title in _VIEWS.items()
+        ] + [
             self._build_media_collection(
                 config,
                 c,
@@ -202,21 +278,161 @@ class BirdBuddyMediaSource(MediaSource):
         ]
         return base
 
+    def _build_media_view(
+        self,
+        config: ConfigEntry,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+        view: str,
+        key: str | None,
+    ) -> BrowseMediaSource:
+        """A level of the "By feeder", "By day" or "By week" trees.
+
+        These only list the media indexed so far: from the latest Feed pages and
+        collections (when first browsed), new postcards and the collections that were
+        browsed since.
+        """
+        index = coordinator.media_index
+        identifier = f"{config.entry_id}#{view}"
+        if view == _VIEW_FEEDER:
+            feeder_id, _, day = (key or "").partition("/")
+            if not feeder_id:
+                return _directory(
+                    identifier,
+                    _VIEWS[view],
+                    [
+                        _directory(
+                            f"{identifier}#{feeder_id}",
+                            f"{_feeder_name(coordinator, feeder_id)} ({count})",
+                        )
+                        for feeder_id, count in index.feeders().items()
+                    ],
+                )
+            if not day:
+                return _directory(
+                    f"{identifier}#{feeder_id}",
+                    _feeder_name(coordinator, feeder_id),
+                    [
+                        _directory(
+                            f"{identifier}#{feeder_id}/{day}",
+                            f"{_day_title(day)} ({count})",
+                        )
+                        for day, count in index.days(feeder_id).items()
+                    ],
+                )
+            return _media_directory(
+                config,
+                f"{identifier}#{key}",
+                f"{_feeder_name(coordinator, feeder_id)}, {_day_title(day)}",
+                index.day(day, feeder_id),
+            )
+
+        if view == _VIEW_WEEK:
+            if not key:
+                return _directory(
+                    identifier,
+                    _VIEWS[view],
+                    [
+                        _directory(
+                            f"{identifier}#{week}", f"{_week_title(week)} ({count})"
+                        )
+                        for week, count in index.weeks().items()
+                    ],
+                )
+            return _media_directory(
+                config, f"{identifier}#{key}", _week_title(key), index.week(key)
+            )
+
+        if not key:
+            return _directory(
+                identifier,
+                _VIEWS[view],
+                [
+                    _directory(f"{identifier}#{day}", f"{_day_title(day)} ({count})")
+                    for day, count in index.days().items()
+                ],
+            )
+        return _media_directory(
+            config, f"{identifier}#{key}", _day_title(key), index.day(key)
+        )
+
+
+def _directory(
+    identifier: str, title: str, children: list[BrowseMediaSource] | None = None
+) -> BrowseMediaSource:
+    return BrowseMediaSource(
+        domain=DOMAIN,
+        identifier=identifier,
+        media_class=MediaClass.DIRECTORY,
+        media_content_type="",
+        title=title,
+        can_play=False,
+        can_expand=True,
+        children=children,
+        children_media_class=MediaClass.DIRECTORY,
+    )
+
+
+def _media_directory(
+    config: ConfigEntry, identifier: str, title: str, items: list[IndexedMedia]
+) -> BrowseMediaSource:
+    base = _directory(identifier, title)
+    base.children_media_class = MediaClass.IMAGE
+    now = dt_util.now()
+    base.children = []
+    for item in items:
+        media = item.media
+        age = _best_timedelta_title(item.created_at, now)
+        base.children.append(
+            BrowseMediaSource(
+                domain=DOMAIN,
+                # Resolved like the media of its collection, when it was collected
+                identifier=(
+                    f"{config.entry_id}#{item.collection_id or _VIEW_MEDIA}#{media.id}"
+                ),
+                media_class=_media_class(media),
+                media_content_type=_mime_type(media),
+                title=f"{item.species_name} ({age})" if item.species_name else age,
+                can_play=media.is_video,
+                can_expand=media.is_video,
+                thumbnail=media.thumbnail_url,
+            )
+        )
+    return base
+
+
+def _feeder_name(coordinator: BirdBuddyDataUpdateCoordinator, feeder_id: str) -> str:
+    return feeder.name if (feeder := coordinator.feeders.get(feeder_id)) else feeder_id
+
+
+def _day_title(day: str) -> str:
+    try:
+        return date.fromisoformat(day).strftime("%a, %x")
+    except ValueError:
+        return day
+
+
+def _week_title(week: str) -> str:
+    try:
+        monday = date.fromisoformat(f"{week}-1")
+    except ValueError:
+        return week
+    return f"Week of {monday.strftime('%x')}"
+
 
 async def async_get_media_source(hass: HomeAssistant) -> BirdBuddyMediaSource:
     """Set up media source."""
     return BirdBuddyMediaSource(hass)
 
 
-def _media_class(media: Media) -> MediaClass:
-    if media.get("__typename") == "MediaVideo":
+def _media_class(media: MediaRef) -> MediaClass:
+    if media.is_video:
         return MediaClass.VIDEO
     return MediaClass.IMAGE
 
 
-def _mime_type(media: Media) -> str:
+def _mime_type(media: MediaRef) -> str:
     # TODO: Media class should expose this
-    if media.get("__typename") == "MediaVideo":
+    if media.is_video:
         return "video/mp4"
     return "image/jpeg"
 
@@ -224,7 +440,7 @@ def _mime_type(media: Media) -> str:
 def _best_timedelta_title(other: datetime, now: datetime) -> str:
     # TODO: better way to get easily recognizeable, localized, and relative (as needed) datetimes.
 
-    other = other.astimezone(dt_util.DEFAULT_TIME_ZONE).replace(microsecond=0)
+    other = other.astimezone(now.tzinfo).replace(microsecond=0)
     if other > now:
         # whoops?
         return other.strftime("%c")
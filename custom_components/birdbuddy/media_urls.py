@@ -0,0 +1,154 @@
+"""Stable local URLs for Bird Buddy media."""
+
+from __future__ import annotations
+
+import asyncio
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from birdbuddy.media import Media, is_media_expired
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.components.http.auth import async_sign_path
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, LOGGER, MEDIA_CACHE_SIZE, MEDIA_URL_SIGN_EXPIRATION
+from .snapshots import MediaRef
+from .util import LruCache, _medias_from_node
+
+if TYPE_CHECKING:
+    from birdbuddy.client import BirdBuddy
+
+    from .coordinator import BirdBuddyDataUpdateCoordinator
+
+MEDIA_URL = "/api/birdbuddy/media/{entry_id}/{media_id}"
+
+
+def media_url(entry_id: str, media_id: str, width: int | None = None) -> str:
+    """The local URL of a media item, which stays the same while the media exists.
+
+    With a ``width``, the URL serves the image resized to (about) that width.
+    """
+    url = MEDIA_URL.format(entry_id=entry_id, media_id=media_id)
+    return f"{url}?width={width}" if width else url
+
+
+@callback
+def async_signed_media_url(
+    hass: HomeAssistant, entry_id: str, media_id: str, width: int | None = None
+) -> str | None:
+    """The local URL of a media item, signed to be used without authentication.
+
+    Returns None if the URL cannot be served (without the http integration).
+    """
+    if hass.http is None:
+        return None
+    url = async_sign_path(
+        hass,
+        MEDIA_URL.format(entry_id=entry_id, media_id=media_id),
+        MEDIA_URL_SIGN_EXPIRATION,
+        use_content_user=True,
+    )
+    # The width is not part of the signature (nor is it for camera snapshots)
+    return f"{url}&width={width}" if width else url
+
+
+def _media_content_url(media: Media | MediaRef) -> str | None:
+    return media.content_url or media.thumbnail_url
+
+
+class MediaResolver:
+    """Resolves media ids to their current signed URLs.
+
+    Signed media URLs expire. Media seen recently is kept, and expired media is
+    looked up again in the latest Feed items.
+    """
+
+    def __init__(self, client: BirdBuddy, maxsize: int = MEDIA_CACHE_SIZE) -> None:
+        self._client = client
+        self._media: LruCache[str, MediaRef] = LruCache(maxsize)
+        self._lock = asyncio.Lock()
+
+    def add(self, media: Media | MediaRef) -> None:
+        """Remember the latest signed URLs of a media item."""
+        self._media[media.id] = MediaRef.from_media(media)
+
+    def _get_fresh(self, media_id: str) -> MediaRef | None:
+        media = self._media.get(media_id)
+        if media and not is_media_expired(_media_content_url(media)):
+            return media
+        return None
+
+    async def async_resolve(self, media_id: str) -> MediaRef | None:
+        """The media item with unexpired URLs, or None if it cannot be found."""
+        if media := self._get_fresh(media_id):
+            return media
+        if media_id not in self._media:
+            # Only media that was seen before can be served
+            return None
+        async with self._lock:
+            # Another request may have refreshed it in the meantime
+            if media := self._get_fresh(media_id):
+                return media
+            LOGGER.debug("Media %s is expired or unknown: refreshing", media_id)
+            feed = await self._client.feed()
+            for node in feed.nodes:
+                for item in _medias_from_node(node):
+                    self.add(Media(item))
+        return self._get_fresh(media_id)
+
+
+class BirdBuddyMediaView(HomeAssistantView):
+    """Redirects a local media URL to the current signed URL of the media.
+
+    Entity pictures use signed URLs, see ``async_signed_media_url``. With a
+    ``width`` query parameter, the resized image is served directly instead.
+    """
+
+    url = MEDIA_URL
+    name = "api:birdbuddy:media"
+    requires_auth = True
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+
+    async def get(
+        self, request: web.Request, entry_id: str, media_id: str
+    ) -> web.StreamResponse:
+        """Redirect to the signed URL of the media, or serve a resized image."""
+        coordinator: BirdBuddyDataUpdateCoordinator | None
+        if not (coordinator := self.hass.data.get(DOMAIN, {}).get(entry_id)):
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        try:
+            media = await coordinator.media.async_resolve(media_id)
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.warning("Cannot resolve media %s: %s", media_id, err)
+            return web.Response(status=HTTPStatus.BAD_GATEWAY)
+        if not media:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        if "width" in request.query and not media.is_video:
+            try:
+                width = int(request.query["width"])
+            except ValueError:
+                return web.Response(status=HTTPStatus.BAD_REQUEST)
+            try:
+                data = await coordinator.images.async_get(media, width)
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.warning("Cannot resize media %s: %s", media_id, err)
+                return web.Response(status=HTTPStatus.BAD_GATEWAY)
+            return web.Response(
+                body=data,
+                content_type="image/jpeg",
+                # The image of a media item never changes
+                headers={"Cache-Control": "private, max-age=86400"},
+            )
+        url = (
+            media.thumbnail_url
+            if "thumbnail" in request.query
+            else _media_content_url(media)
+        )
+        return web.Response(
+            status=HTTPStatus.FOUND,
+            # Signed URLs are valid for much longer than this
+            headers={"Location": url, "Cache-Control": "private, max-age=300"},
+        )
@@ -0,0 +1,219 @@
+"""Bird Buddy API call metrics."""
+
+from __future__ import annotations
+
+from collections import deque
+from contextvars import ContextVar
+from functools import partial
+import math
+import time
+from typing import TYPE_CHECKING, Any
+
+import orjson
+
+from .const import LOGGER
+from .governor import priority_for
+
+if TYPE_CHECKING:
+    from .governor import ApiGovernor
+
+INSTRUMENTED_OPERATIONS = {
+    "collection",
+    "feed",
+    "finish_postcard",
+    "refresh",
+    "refresh_collections",
+    "refresh_feed",
+    "set_power_profile",
+    "sighting_choose_species",
+    "sighting_from_postcard",
+    "toggle_audio_enabled",
+    "toggle_off_grid",
+    "update_firmware_check",
+    "update_firmware_start",
+}
+"""Client methods that make API requests."""
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+"""Upper bounds (in seconds) of the latency histogram buckets."""
+
+_RECENT_SAMPLES = 100
+
+# The response sizes of the API call in progress (in this task)
+_response_sizes: ContextVar[list[int] | None] = ContextVar(
+    "birdbuddy_response_sizes", default=None
+)
+
+
+def _percentile(samples: list[float], percentile: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(percentile * len(ordered)) - 1)]
+
+
+class OperationMetrics:
+    """Metrics for a single API operation."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors: dict[str, int] = {}
+        self.histogram = [0] * len(LATENCY_BUCKETS)
+        self.total_time = 0.0
+        self.payload_bytes = 0
+        self.last_payload_bytes = 0
+        self._recent: deque[float] = deque(maxlen=_RECENT_SAMPLES)
+
+    def record(self, duration: float, payload: int, error: BaseException | None):
+        """Record one call, and the size of its responses."""
+        self.count += 1
+        self.total_time += duration
+        self._recent.append(duration)
+        self.histogram[
+            next(i for i, b in enumerate(LATENCY_BUCKETS) if duration <= b)
+        ] += 1
+        if error is not None:
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+        else:
+            self.payload_bytes += payload
+            self.last_payload_bytes = payload
+
+    @property
+    def recent(self) -> list[float]:
+        """The latest call durations."""
+        return list(self._recent)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dictionary."""
+        return {
+            "count": self.count,
+            "errors": dict(self.errors),
+            "latency_histogram": {
+                str(bound): n for bound, n in zip(LATENCY_BUCKETS, self.histogram)
+            },
+            "latency_mean": self.total_time / self.count if self.count else None,
+            "latency_p95": _percentile(self.recent, 0.95),
+            "payload_bytes": self.payload_bytes,
+            "last_payload_bytes": self.last_payload_bytes,
+        }
+
+
+class ApiMetrics:
+    """Metrics for all API operations of one account."""
+
+    def __init__(self) -> None:
+        self.operations: dict[str, OperationMetrics] = {}
+        self.last_poll_duration: float | None = None
+
+    def record(
+        self,
+        operation: str,
+        duration: float,
+        payload: int = 0,
+        error: BaseException | None = None,
+    ) -> None:
+        """Record one API call."""
+        self.operations.setdefault(operation, OperationMetrics()).record(
+            duration, payload, error
+        )
+
+    @property
+    def latency_p95(self) -> float | None:
+        """95th percentile latency of the latest calls, across all operations."""
+        return _percentile(
+            [d for op in self.operations.values() for d in op.recent], 0.95
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dictionary."""
+        return {
+            "last_poll_duration": self.last_poll_duration,
+            "latency_p95": self.latency_p95,
+            "operations": {
+                name: op.as_dict() for name, op in sorted(self.operations.items())
+            },
+        }
+
+
+class _MeasuredGraphqlClient:
+    """Passes GraphQL requests through, measuring the size of each response.
+
+    The Bird Buddy client decodes the response body itself: its size is that of
+    the decoded GraphQL response, encoded again as compact JSON.
+    """
+
+    def __init__(self, graphql: Any) -> None:
+        self._graphql = graphql
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._graphql, name)
+
+    async def execute_async(self, *args, **kwargs) -> Any:
+        response = await self._graphql.execute_async(*args, **kwargs)
+        if (sizes := _response_sizes.get()) is not None:
+            try:
+                sizes.append(len(orjson.dumps(response)))
+            except TypeError:
+                pass
+        return response
+
+
+class InstrumentedClient:
+    """Wraps the Bird Buddy client, recording metrics for every API call.
+
+    If a governor is given, every API call must first be let through by it.
+    Everything else is passed through to the wrapped client as-is.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        metrics: ApiMetrics,
+        governor: ApiGovernor | None = None,
+    ) -> None:
+        self._client = client
+        self._metrics = metrics
+        self._governor = governor
+        if not isinstance(client.graphql, _MeasuredGraphqlClient):
+            # Every request of the client goes through its GraphQL client
+            client.graphql = _MeasuredGraphqlClient(client.graphql)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if name in INSTRUMENTED_OPERATIONS:
+            return partial(self._async_call, name)
+        return attr
+
+    async def async_query(
+        self, operation: str, query: str, variables: dict | None = None
+    ) -> dict:
+        """Make a GraphQL request of the integration's own, recorded as ``operation``."""
+        # pylint: disable=protected-access
+        return await self._async_invoke(
+            operation, self._client._make_request, query=query, variables=variables
+        )
+
+    async def _async_call(self, operation: str, *args, **kwargs) -> Any:
+        # Resolved on every call, so that the method can still be replaced
+        method = getattr(self._client, operation)
+        return await self._async_invoke(operation, method, *args, **kwargs)
+
+    async def _async_invoke(self, operation: str, method, *args, **kwargs) -> Any:
+        if self._governor is not None:
+            await self._governor.acquire(priority_for(operation))
+        sizes: list[int] = []
+        token = _response_sizes.set(sizes)
+        start = time.perf_counter()
+        try:
+            result = await method(*args, **kwargs)
+        except Exception as exc:
+            self._metrics.record(operation, time.perf_counter() - start, error=exc)
+            raise
+        finally:
+            _response_sizes.reset(token)
+        duration = time.perf_counter() - start
+        # Including any retry, e.g. after signing in again
+        self._metrics.record(operation, duration, sum(sizes))
+        LOGGER.debug("API %s took %.3fs (%d bytes)", operation, duration, sum(sizes))
+        return result
@@ -0,0 +1,144 @@
+"""Cheap check for changes, before a full refresh of an account."""
+
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import homeassistant.util.dt as dt_util
+import orjson
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    from .metrics import InstrumentedClient
+
+PROBE = """
+query meProbe {
+  me {
+    feed(first: 1) {
+      edges {
+        node {
+          ... on FeedItem {
+            id
+            createdAt
+          }
+          __typename
+        }
+      }
+    }
+    feeders {
+      ... on FeederForPrivate {
+        id
+        state
+        battery {
+          charging
+          percentage
+          state
+        }
+        food {
+          state
+        }
+        signal {
+          state
+          value
+        }
+        temperature {
+          value
+        }
+      }
+      ... on FeederForOwner {
+        offGrid
+        audioEnabled
+        powerProfile
+      }
+      ... on FeederForMemberPending {
+        id
+      }
+      __typename
+    }
+  }
+}
+""".strip()
+"""The latest Feed item, and the feeder fields that change often.
+
+Slow-moving feeder metadata (name, firmware versions, owner, location) is only
+fetched by the full refresh.
+"""
+
+
+def _fingerprint(data: Any) -> str:
+    return hashlib.sha1(orjson.dumps(data, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class ProbeResult(NamedTuple):
+    """What changed since the previous probe."""
+
+    feed_changed: bool
+    feeders_changed: bool
+    feeders: dict[str, dict[str, Any]]
+    """The volatile fields of each feeder, by feeder id."""
+
+    @property
+    def changed(self) -> bool:
+        """Whether anything changed."""
+        return self.feed_changed or self.feeders_changed
+
+
+class ChangeProbe:
+    """Checks what changed in an account, with a tiny request.
+
+    The probe fetches the latest Feed item and the volatile feeder fields only,
+    compared with the user, feeders (with all their metadata) and Feed pages of a
+    full refresh.
+    """
+
+    def __init__(self) -> None:
+        self._feed: str | None = None
+        self._feeders: str | None = None
+        self.probes = 0
+        self.hits = 0
+        self.last_change: datetime | None = None
+
+    async def async_probe(self, client: InstrumentedClient) -> ProbeResult | None:
+        """Probe the account, or None if the probe failed."""
+        try:
+            data = (await client.async_query("probe", PROBE))["me"]
+            edges = data["feed"]["edges"]
+            feeders = {f["id"]: f for f in data["feeders"]}
+        except Exception as err:  # pylint: disable=broad-except
+            LOGGER.debug("Change probe failed: %s", err)
+            return None
+        feed = _fingerprint(edges[0]["node"] if edges else None)
+        feeders_fingerprint = _fingerprint(data["feeders"])
+        result = ProbeResult(
+            feed_changed=feed != self._feed,
+            feeders_changed=feeders_fingerprint != self._feeders,
+            feeders=feeders,
+        )
+        self._feed = feed
+        self._feeders = feeders_fingerprint
+        self.probes += 1
+        if result.changed:
+            self.last_change = dt_util.utcnow()
+        else:
+            self.hits += 1
+        return result
+
+    def reset(self) -> None:
+        """Forget the probed state: the next probe sees everything as changed.
+
+        For when the changes seen by the last probe could not be processed.
+        """
+        self._feed = None
+        self._feeders = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the probe statistics as a dictionary."""
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else None,
+            "last_change": self.last_change.isoformat() if self.last_change else None,
+        }
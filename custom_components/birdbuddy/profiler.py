@@ -0,0 +1,253 @@
+"""Opt-in timing of the integration's work on the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Generator, Iterable
+import functools
+import inspect
+import os
+import time
+from typing import Any, TypeVar
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_LOOP_PROFILER, LOGGER, LOOP_SLOW_THRESHOLD
+
+_T = TypeVar("_T")
+_ASYNCIO_DIR = os.path.dirname(asyncio.__file__)
+_MISSING = object()
+
+COORDINATOR_STEPS = (
+    "_async_update_data",
+    "_async_update_feeders",
+    "_process_feed",
+    "_process_postcards",
+    "_apply_classification",
+    "_merge_feeders",
+    "_state_to_store",
+    "_async_visitors_changed",
+    "async_get_sighting",
+    "async_index_visits",
+    "async_refresh_collections",
+    "async_update_listeners",
+    "async_update_feeder_listeners",
+    "handle_collect_postcard",
+)
+"""Coordinator methods timed by the profiler."""
+
+
+def _definition_site(func: Callable) -> str:
+    code = getattr(inspect.unwrap(func), "__code__", None)
+    if code is None:
+        return "?"
+    return f"{code.co_filename}:{code.co_firstlineno}"
+
+
+def _suspension_site(coro: Any) -> str | None:
+    """Where a coroutine (or the innermost coroutine it awaits) is suspended.
+
+    Frames of asyncio itself (e.g., ``asyncio.sleep``) are skipped.
+    """
+    frame = None
+    while coro is not None and (cr_frame := getattr(coro, "cr_frame", None)):
+        if not cr_frame.f_code.co_filename.startswith(_ASYNCIO_DIR):
+            frame = cr_frame
+        coro = getattr(coro, "cr_await", None)
+    if frame is None:
+        return None
+    return f"{frame.f_code.co_filename}:{frame.f_lineno}"
+
+
+class FunctionTiming:
+    """Time spent on the event loop by one function (including its callees)."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timing as a dictionary."""
+        return {
+            "calls": self.calls,
+            "total": round(self.total, 6),
+            "mean": round(self.total / self.calls, 6) if self.calls else None,
+            "max": round(self.max, 6),
+            "slow": self.slow,
+        }
+
+
+class LoopProfiler:
+    """Times the integration's callbacks and coroutines, while on the event loop.
+
+    A coroutine is only timed while it runs: each step between two suspensions is
+    measured, and the time spent waiting for I/O is not. Any call (or coroutine
+    step) blocking the loop for more than ``threshold`` seconds is logged, with
+    the place where it ran.
+    """
+
+    def __init__(self, threshold: float = LOOP_SLOW_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.timings: dict[str, FunctionTiming] = {}
+
+    def record(self, name: str, elapsed: float, site: Callable[[], str]) -> None:
+        """Record the time ``name`` ran on the loop, once."""
+        timing = self.timings.setdefault(name, FunctionTiming())
+        timing.total += elapsed
+        timing.max = max(timing.max, elapsed)
+        if elapsed > self.threshold:
+            timing.slow += 1
+            LOGGER.warning(
+                "%s blocked the event loop for %.3fs (at %s)", name, elapsed, site()
+            )
+
+    def wrap(self, func: Callable[..., _T], name: str | None = None) -> Callable:
+        """Time every call of ``func``."""
+        name = name or func.__qualname__
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                self.timings.setdefault(name, FunctionTiming()).calls += 1
+                return await _TimedCoroutine(self, name, func, func(*args, **kwargs))
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.timings.setdefault(name, FunctionTiming()).calls += 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(
+                    name,
+                    time.perf_counter() - start,
+                    lambda: _definition_site(func),
+                )
+
+        return wrapper
+
+    def instrument(self, obj: object, names: Iterable[str]) -> CALLBACK_TYPE:
+        """Time the methods ``names`` of ``obj``, when called through ``obj``.
+
+        Returns a callback that restores the original methods.
+        """
+        originals: dict[str, Any] = {}
+        for method in names:
+            func = getattr(obj, method, None)
+            if func is None or getattr(func, "_profiled", False):
+                continue
+            wrapper = self.wrap(func, f"{type(obj).__name__}.{method}")
+            wrapper._profiled = True  # pylint: disable=protected-access
+            originals[method] = vars(obj).get(method, _MISSING)
+            setattr(obj, method, wrapper)
+
+        @callback
+        def restore() -> None:
+            for method, original in originals.items():
+                if original is _MISSING:
+                    # The wrapper only shadowed the method of the class
+                    delattr(obj, method)
+                else:
+                    setattr(obj, method, original)
+
+        return restore
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the timings as a dictionary, by decreasing total time."""
+        return {
+            "threshold": self.threshold,
+            "functions": {
+                name: timing.as_dict()
+                for name, timing in sorted(
+                    self.timings.items(), key=lambda item: -item[1].total
+                )
+            },
+        }
+
+
+class _TimedCoroutine:
+    """Awaits a coroutine, timing each of its steps."""
+
+    def __init__(
+        self, profiler: LoopProfiler, name: str, func: Callable, coro: Awaitable
+    ) -> None:
+        self._profiler = profiler
+        self._name = name
+        self._func = func
+        self._coro = coro
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        steps = self._coro.__await__()
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is not None:
+                    future = steps.throw(error)
+                else:
+                    future = steps.send(value)
+            except StopIteration as stop:
+                self._record(start)
+                return stop.value
+            except BaseException:
+                self._record(start)
+                raise
+            self._record(start)
+            try:
+                value, error = (yield future), None
+            except GeneratorExit:
+                steps.close()
+                raise
+            except BaseException as err:  # pylint: disable=broad-except
+                value, error = None, err
+
+    def _record(self, start: float) -> None:
+        self._profiler.record(
+            self._name,
+            time.perf_counter() - start,
+            lambda: _suspension_site(self._coro) or _definition_site(self._func),
+        )
+
+
+class SharedLoopProfiler(LoopProfiler):
+    """Times objects shared by every entry, while any entry is profiled."""
+
+    def __init__(self, threshold: float = LOOP_SLOW_THRESHOLD) -> None:
+        super().__init__(threshold)
+        self._users: dict[int, tuple[int, CALLBACK_TYPE]] = {}
+
+    def instrument(self, obj: object, names: Iterable[str]) -> CALLBACK_TYPE:
+        """Time the methods ``names`` of ``obj``, until every user is done.
+
+        Returns a callback for each user, which restores the original methods
+        once they are all done.
+        """
+        key = id(obj)
+        if key in self._users:
+            users, restore = self._users[key]
+        else:
+            users, restore = 0, super().instrument(obj, names)
+        self._users[key] = (users + 1, restore)
+
+        @callback
+        def release() -> None:
+            users, restore = self._users.pop(key)
+            if users > 1:
+                self._users[key] = (users - 1, restore)
+            else:
+                restore()
+
+        return release
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> SharedLoopProfiler:
+    """Get the profiler of what every entry shares, creating it if needed."""
+    if (profiler := hass.data.get(DATA_LOOP_PROFILER)) is None:
+        profiler = hass.data[DATA_LOOP_PROFILER] = SharedLoopProfiler()
+    return profiler
@@ -0,0 +1,59 @@
+"""Local webhook, to refresh an account as soon as a postcard is announced."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from aiohttp.web import Request
+from homeassistant.components import webhook
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.network import NoURLAvailableError
+
+from .const import DOMAIN, LOGGER
+
+if TYPE_CHECKING:
+    from .coordinator import BirdBuddyDataUpdateCoordinator
+
+
+@callback
+def async_register_webhook(
+    hass: HomeAssistant, coordinator: BirdBuddyDataUpdateCoordinator
+) -> CALLBACK_TYPE:
+    """Refresh ``coordinator`` whenever its webhook is called.
+
+    A local forwarder (e.g., relaying the Bird Buddy app notifications) can POST to
+    the webhook, so that new postcards are seen within seconds instead of at the
+    next poll. Requests are debounced by the coordinator.
+    """
+    webhook_id = coordinator.async_get_webhook_id()
+
+    async def _async_handle_webhook(
+        hass: HomeAssistant, webhook_id: str, request: Request
+    ) -> None:
+        LOGGER.debug("Refresh requested by webhook: %s", coordinator.config_entry.title)
+        await coordinator.async_request_refresh()
+
+    webhook.async_register(
+        hass,
+        DOMAIN,
+        f"Bird Buddy refresh ({coordinator.config_entry.title})",
+        webhook_id,
+        _async_handle_webhook,
+        local_only=True,
+        allowed_methods=("POST",),
+    )
+
+    @callback
+    def unregister() -> None:
+        webhook.async_unregister(hass, webhook_id)
+
+    return unregister
+
+
+@callback
+def async_webhook_url(hass: HomeAssistant, webhook_id: str) -> str:
+    """The local URL of a webhook (only its path, if there is no known URL)."""
+    try:
+        return webhook.async_generate_url(hass, webhook_id, prefer_external=False)
+    except NoURLAvailableError:
+        return webhook.async_generate_path(webhook_id)
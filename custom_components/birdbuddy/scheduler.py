@@ -0,0 +1,110 @@
+"""Polling schedule shared by every Bird Buddy account."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import math
+import random
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from .const import DATA_SCHEDULER, LOGGER, POLL_JITTER, POLL_MAX_CONCURRENT
+
+if TYPE_CHECKING:
+    from .coordinator import BirdBuddyDataUpdateCoordinator
+
+
+class PollScheduler:
+    """Polls every account once per interval, spread evenly over the interval.
+
+    Each account is given its own slot of the interval (with some random jitter
+    within the slot), so that several accounts do not all poll at the same time.
+    At most ``max_concurrent`` accounts are refreshed at once.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        interval: timedelta,
+        max_concurrent: int = POLL_MAX_CONCURRENT,
+    ) -> None:
+        self._hass = hass
+        self._interval = interval.total_seconds()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._epoch = hass.loop.time()
+        self._coordinators: dict[str, BirdBuddyDataUpdateCoordinator] = {}
+        self._offsets: dict[str, float] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+
+    @property
+    def offsets(self) -> dict[str, float]:
+        """The offset (in seconds) of each account's slot within the interval."""
+        return dict(self._offsets)
+
+    @callback
+    def async_register(
+        self, coordinator: BirdBuddyDataUpdateCoordinator
+    ) -> CALLBACK_TYPE:
+        """Start polling ``coordinator``. Returns a callback to stop polling it."""
+        entry_id = coordinator.config_entry.entry_id
+        self._coordinators[entry_id] = coordinator
+        self._async_rebalance()
+
+        @callback
+        def unregister() -> None:
+            self._coordinators.pop(entry_id, None)
+            self._offsets.pop(entry_id, None)
+            if timer := self._timers.pop(entry_id, None):
+                timer.cancel()
+            self._async_rebalance()
+
+        return unregister
+
+    @callback
+    def _async_rebalance(self) -> None:
+        """Give every account an equal slot of the interval."""
+        slot = self._interval / max(1, len(self._coordinators))
+        for i, entry_id in enumerate(sorted(self._coordinators)):
+            self._offsets[entry_id] = i * slot + random.uniform(0, slot * POLL_JITTER)
+            self._async_schedule(entry_id)
+        LOGGER.debug("Polling schedule: %s", self._offsets)
+
+    @callback
+    def _async_schedule(self, entry_id: str) -> None:
+        """Schedule the next poll of an account, at the start of its next slot."""
+        if timer := self._timers.pop(entry_id, None):
+            timer.cancel()
+        loop = self._hass.loop
+        start = self._epoch + self._offsets[entry_id]
+        periods = math.floor((loop.time() - start) / self._interval) + 1
+        self._timers[entry_id] = loop.call_at(
+            start + periods * self._interval, self._async_poll, entry_id
+        )
+
+    @callback
+    def _async_poll(self, entry_id: str) -> None:
+        self._timers.pop(entry_id, None)
+        coordinator = self._coordinators[entry_id]
+        self._async_schedule(entry_id)
+        entry = coordinator.config_entry
+        if entry.pref_disable_polling:
+            return
+        entry.async_create_background_task(
+            self._hass,
+            self._async_refresh(coordinator),
+            name=f"{coordinator.name} - {entry.title} - refresh",
+        )
+
+    async def _async_refresh(self, coordinator: BirdBuddyDataUpdateCoordinator) -> None:
+        async with self._semaphore:
+            await coordinator.async_refresh()
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant, interval: timedelta) -> PollScheduler:
+    """Get the integration-wide poll scheduler, creating it if needed."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = PollScheduler(hass, interval)
+    return scheduler
@@ -2,15 +2,15 @@
 
 from __future__ import annotations
 
+from functools import partial
+
 from birdbuddy.feeder import PowerProfile
-from birdbuddy.exceptions import GraphqlError
 
 from homeassistant.components.select import (
     SelectEntity,
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -58,7 +58,10 @@ class BirdBuddyPowerProfileSelector(BirdBuddyMixin, SelectEntity):
 
     @property
     def current_option(self) -> str | None:
-        return self.feeder.power_profile.value.lower()
+        profile = self.coordinator.writer.value(
+            self.feeder.id, "power_profile", self.feeder.power_profile
+        )
+        return profile.value.lower()
 
     @property
     def available(self) -> bool:
@@ -67,15 +70,9 @@ class BirdBuddyPowerProfileSelector(BirdBuddyMixin, SelectEntity):
     async def async_select_option(self, option: str) -> None:
         option = PowerProfile(option.upper())
         assert option != PowerProfile.UNKNOWN
-        try:
-            result = await self.coordinator.client.set_power_profile(
-                self.feeder,
-                option,
-            )
-            if result:
-                self.feeder.update(result)
-                self.async_write_ha_state()
-        except GraphqlError as err:
-            raise HomeAssistantError(
-                f"Cannot set Power Profile for {self.entity_id} to {option}: {err}"
-            ) from err
+        await self.coordinator.writer.async_write(
+            self.feeder,
+            "power_profile",
+            option,
+            partial(self.coordinator.client.set_power_profile, self.feeder),
+        )
@@ -6,7 +6,6 @@ from typing import Any
 
 from birdbuddy.birds import Species
 from birdbuddy.feed import FeedNodeType
-from birdbuddy.media import Media, is_media_expired
 from birdbuddy.sightings import PostcardSighting
 
 from homeassistant.components.sensor import (
@@ -18,17 +17,28 @@ from homeassistant.components.sensor import (
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    ATTR_ENTITY_PICTURE,
     PERCENTAGE,
     SIGNAL_STRENGTH_DECIBELS_MILLIWATT,
     UnitOfTemperature,
+    UnitOfTime,
 )
 from homeassistant.helpers.entity import EntityCategory
 from homeassistant.core import Event, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .const import DOMAIN, EVENT_NEW_POSTCARD_SIGHTING, LOGGER
+from homeassistant.helpers.event import async_track_time_interval
+
+from .circuit import CircuitState
+from .const import (
+    DOMAIN,
+    EVENT_NEW_POSTCARD_SIGHTING,
+    IMAGE_THUMBNAIL_WIDTH,
+    LOGGER,
+    MEDIA_URL_SIGN_EXPIRATION,
+)
 from .coordinator import BirdBuddyDataUpdateCoordinator
-from .entity import BirdBuddyMixin
+from .entity import BirdBuddyAccountEntity, BirdBuddyMixin
+from .media_urls import async_signed_media_url
 from .device import BirdBuddyDevice
 from .util import _find_media_with_species
 from .visitors import RecentVisitors
@@ -50,6 +60,13 @@ async def async_setup_entry(
     async_add_entities(BirdBuddyFoodStateEntity(f, coordinator) for f in feeders)
     # Incubating: Temperature always reports 0
     async_add_entities(BirdBuddyTemperatureEntity(f, coordinator) for f in feeders)
+    async_add_entities(
+        [
+            BirdBuddyPollDurationEntity(entry, coordinator),
+            BirdBuddyApiLatencyEntity(entry, coordinator),
+            BirdBuddyCircuitEntity(entry, coordinator),
+        ]
+    )
 
 
 class BirdBuddyBatteryEntity(BirdBuddyMixin, SensorEntity):
@@ -77,7 +94,10 @@ class BirdBuddyBatteryEntity(BirdBuddyMixin, SensorEntity):
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any]:
-        return {"level": self.feeder.battery.state.value}
+        return {
+            **(super().extra_state_attributes or {}),
+            "level": self.feeder.battery.state.value,
+        }
 
 
 class BirdBuddySignalEntity(BirdBuddyMixin, SensorEntity):
@@ -106,7 +126,10 @@ class BirdBuddySignalEntity(BirdBuddyMixin, SensorEntity):
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any]:
-        return {"level": self.feeder.signal.state.value}
+        return {
+            **(super().extra_state_attributes or {}),
+            "level": self.feeder.signal.state.value,
+        }
 
 
 class BirdBuddyRecentVisitorEntity(BirdBuddyMixin, RestoreSensor):
@@ -117,8 +140,8 @@ class BirdBuddyRecentVisitorEntity(BirdBuddyMixin, RestoreSensor):
     _attr_icon = "mdi:bird"
     _attr_name = "Recent Visitor"
     _attr_extra_state_attributes = {}
-
-    _latest_media: Media | None = None
+    # Signed again periodically: not worth recording
+    _unrecorded_attributes = frozenset({ATTR_ENTITY_PICTURE})
 
     def __init__(
         self,
@@ -127,6 +150,7 @@ class BirdBuddyRecentVisitorEntity(BirdBuddyMixin, RestoreSensor):
     ) -> None:
         super().__init__(feeder, coordinator)
         self._attr_unique_id = f"{self.feeder.id}-recent-visitor"
+        self._picture: tuple[str, int | None] | None = None
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
@@ -136,23 +160,11 @@ class BirdBuddyRecentVisitorEntity(BirdBuddyMixin, RestoreSensor):
                 self._on_recent_visitor,
             )
         )
-
-    @property
-    def entity_picture(self) -> str | None:
-        if picture := super().entity_picture:
-            if not is_media_expired(picture):
-                return picture
-            self._attr_entity_picture = None
-
-        # FIXME: no good way to refresh if the picture url is expired
-
-        if self._latest_media:
-            picture = self._latest_media.content_url or self._latest_media.thumbnail_url
-            if not is_media_expired(picture):
-                return picture
-            self._latest_media = None
-
-        return None
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass, self._async_sign_picture, MEDIA_URL_SIGN_EXPIRATION / 2
+            )
+        )
 
     @property
     def native_value(self) -> str:
@@ -161,15 +173,37 @@ class BirdBuddyRecentVisitorEntity(BirdBuddyMixin, RestoreSensor):
             return attr
         return None
 
+    @callback
+    def _async_sign_picture(self, _=None) -> None:
+        """Sign the picture again before it expires."""
+        if self._picture:
+            self._sign_picture()
+            self.async_write_ha_state()
+
+    def _sign_picture(self) -> None:
+        # Signed Bird Buddy URLs change and expire: use the stable local URL instead.
+        # Signed once per picture, so that the state only changes with the visitor.
+        self._attr_entity_picture = async_signed_media_url(
+            self.hass, self.coordinator.config_entry.entry_id, *self._picture
+        )
+
     @callback
     def _on_recent_visitor(self, visitors: RecentVisitors) -> None:
         media = visitors.latest_media
         species = visitors.latest_species
+        picture = self._picture
+        value = self._attr_native_value
         if media:
-            self._latest_media = media
-            self._attr_entity_picture = media.content_url
+            self.coordinator.media.add(media)
+            picture = (media.id, None if media.is_video else IMAGE_THUMBNAIL_WIDTH)
         if species:
-            self._attr_native_value = species.name
+            value = species.name
+        if (picture, value) == (self._picture, self._attr_native_value):
+            return
+        if picture != self._picture:
+            self._picture = picture
+            self._sign_picture()
+        self._attr_native_value = value
         self.async_write_ha_state()
 
 
@@ -280,3 +314,88 @@ class BirdBuddyFoodStateEntity(BirdBuddyMixin, SensorEntity):
         await super().add_to_platform_finish()
         if self.enabled:
             LOGGER.warning("Bird Buddy Food Level entity is incubating")
+
+
+class BirdBuddyPollDurationEntity(BirdBuddyAccountEntity, SensorEntity):
+    """Duration of the latest Bird Buddy poll."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+    ) -> None:
+        super().__init__(entry, coordinator, "poll-duration", "Last Poll Duration")
+
+    @property
+    def native_value(self) -> float | None:
+        if (duration := self.coordinator.metrics.last_poll_duration) is None:
+            return None
+        return round(duration * 1000)
+
+
+class BirdBuddyApiLatencyEntity(BirdBuddyAccountEntity, SensorEntity):
+    """95th percentile latency of the latest Bird Buddy API calls."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+    ) -> None:
+        super().__init__(entry, coordinator, "api-p95", "API Latency")
+
+    @property
+    def native_value(self) -> float | None:
+        if (latency := self.coordinator.metrics.latency_p95) is None:
+            return None
+        return round(latency * 1000)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        operations = self.coordinator.metrics.operations.values()
+        return {
+            "calls": sum(op.count for op in operations),
+            "errors": sum(sum(op.errors.values()) for op in operations),
+        }
+
+
+class BirdBuddyCircuitEntity(BirdBuddyAccountEntity, SensorEntity):
+    """State of the Bird Buddy API circuit breaker."""
+
+    _attr_device_class = SensorDeviceClass.ENUM
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_icon = "mdi:cloud-alert"
+    _attr_options = [s.value for s in CircuitState]
+    _attr_translation_key = "circuit_state"
+
+    def __init__(
+        self,
+        entry: ConfigEntry,
+        coordinator: BirdBuddyDataUpdateCoordinator,
+    ) -> None:
+        super().__init__(entry, coordinator, "api-circuit", "API Circuit")
+
+    @property
+    def native_value(self) -> str:
+        return self.coordinator.circuit.state.value
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any]:
+        circuit = self.coordinator.circuit
+        return {
+            "failures": circuit.failures,
+            "retry_at": circuit.retry_at,
+            "last_error": circuit.last_error,
+        }
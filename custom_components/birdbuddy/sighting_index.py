@@ -0,0 +1,297 @@
+"""Local SQLite index of Bird Buddy sightings."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from datetime import datetime
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .const import (
+    DATA_SIGHTING_INDEX,
+    LOGGER,
+    SIGHTING_INDEX_FILENAME,
+)
+from .util import Visit, _top_species
+
+if TYPE_CHECKING:
+    from birdbuddy.feed import FeedNode
+    from birdbuddy.sightings import PostcardSighting
+
+_SCHEMA_VERSION = 1
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sightings (
+    media_id TEXT NOT NULL,
+    species_id TEXT NOT NULL,
+    entry_id TEXT NOT NULL,
+    postcard_id TEXT,
+    feeder_id TEXT NOT NULL,
+    feeder_name TEXT,
+    species_name TEXT,
+    confidence INTEGER,
+    recognized INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (media_id, species_id)
+);
+CREATE INDEX IF NOT EXISTS ix_sightings_feeder ON sightings (feeder_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_sightings_species ON sightings (species_id, created_at);
+CREATE INDEX IF NOT EXISTS ix_sightings_species_name
+    ON sightings (species_name COLLATE NOCASE, created_at);
+CREATE INDEX IF NOT EXISTS ix_sightings_time ON sightings (created_at);
+"""
+_UPSERT = """
+INSERT INTO sightings (
+    media_id, species_id, entry_id, postcard_id, feeder_id, feeder_name,
+    species_name, confidence, recognized, created_at
+) VALUES (
+    :media_id, :species_id, :entry_id, :postcard_id, :feeder_id, :feeder_name,
+    :species_name, :confidence, :recognized, :created_at
+)
+ON CONFLICT (media_id, species_id) DO UPDATE SET
+    postcard_id = coalesce(postcard_id, excluded.postcard_id),
+    feeder_name = coalesce(excluded.feeder_name, feeder_name),
+    species_name = coalesce(excluded.species_name, species_name),
+    confidence = max(confidence, excluded.confidence),
+    recognized = max(recognized, excluded.recognized)
+"""
+# Once a media item is recognized, earlier guesses about it are no longer relevant
+_DELETE_GUESSES = """
+DELETE FROM sightings
+WHERE media_id = :media_id AND recognized = 0 AND species_id != :species_id
+"""
+_GROUP_KEYS = {
+    "species": ("species_id", "max(species_name)"),
+    "feeder": ("feeder_id", "max(feeder_name)"),
+    # In Home Assistant's time zone, not the one of SQLite (or the process)
+    "day": ("local_strftime('%Y-%m-%d', created_at)", "NULL"),
+    "hour": ("local_strftime('%Y-%m-%dT%H:00', created_at)", "NULL"),
+}
+
+
+def _local_strftime(fmt: str, timestamp: float) -> str:
+    return dt_util.as_local(dt_util.utc_from_timestamp(timestamp)).strftime(fmt)
+
+
+class IndexedSighting(NamedTuple):
+    """One species in one visit (media item)."""
+
+    entry_id: str
+    postcard_id: str | None
+    media_id: str
+    feeder_id: str
+    feeder_name: str | None
+    species_id: str
+    """Empty for visitors without any species guess."""
+    species_name: str | None
+    confidence: int | None
+    recognized: bool
+    created_at: datetime
+
+    @classmethod
+    def from_visit(
+        cls, entry_id: str, visit: Visit, feeder_name: str | None = None
+    ) -> IndexedSighting:
+        """A (collected, so recognized) visit from the Feed or a Collection."""
+        return cls(
+            entry_id,
+            None,
+            visit.media_id,
+            visit.feeder_id,
+            feeder_name,
+            visit.species_id,
+            visit.species_name,
+            100,
+            True,
+            visit.created_at,
+        )
+
+    @classmethod
+    def from_postcard(
+        cls, entry_id: str, postcard: FeedNode, sighting: PostcardSighting
+    ) -> list[IndexedSighting]:
+        """The species of a new postcard: recognized, or else the best guess."""
+        if not (medias := sighting.medias) or not (created_at := postcard.created_at):
+            return []
+        feeder = sighting.feeder
+        base = {
+            "entry_id": entry_id,
+            "postcard_id": postcard.node_id,
+            "media_id": medias[0].id,
+            "feeder_id": feeder.get("id"),
+            "feeder_name": feeder.get("name"),
+            "created_at": created_at,
+        }
+        report = sighting.report
+        if recognized := [
+            s.species for s in report.sightings if s.is_recognized and s.get("species")
+        ]:
+            return [
+                cls(
+                    **base,
+                    species_id=s.id,
+                    species_name=s.name,
+                    confidence=100,
+                    recognized=True,
+                )
+                for s in recognized
+            ]
+        species, confidence = _top_species(report)
+        return [
+            cls(
+                **base,
+                species_id=(species or {}).get("id") or "",
+                species_name=(species or {}).get("name"),
+                confidence=confidence,
+                recognized=False,
+            )
+        ]
+
+    def as_row(self) -> dict[str, Any]:
+        """Parameters of the upsert statement."""
+        return self._asdict() | {"created_at": self.created_at.timestamp()}
+
+
+class SightingIndex:
+    """Sightings of every account, in a local SQLite database.
+
+    The database is only accessed from the executor: every method that is not
+    prefixed with ``async_`` blocks.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def open(self) -> None:
+        """Open the database, creating it if needed."""
+        connection = sqlite3.connect(self._path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.create_function("local_strftime", 2, _local_strftime)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.executescript(_SCHEMA)
+            connection.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+        self._connection = connection
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+
+    def add(self, sightings: Iterable[IndexedSighting]) -> None:
+        """Add or update sightings."""
+        rows = [s.as_row() for s in sightings]
+        with self._lock:
+            if not (connection := self._connection):
+                # Closed at shutdown
+                return
+            with connection:
+                connection.executemany(
+                    _DELETE_GUESSES, [r for r in rows if r["recognized"]]
+                )
+                connection.executemany(_UPSERT, rows)
+
+    def query(
+        self,
+        *,
+        feeder_id: str | None = None,
+        species: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        recognized: bool | None = None,
+        group_by: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Find sightings (newest first), or count them by ``group_by``."""
+        where = []
+        params: list[Any] = []
+        if feeder_id:
+            where.append("feeder_id = ?")
+            params.append(feeder_id)
+        if species:
+            where.append("(species_id = ? OR species_name = ? COLLATE NOCASE)")
+            params.extend((species, species))
+        if start:
+            where.append("created_at >= ?")
+            params.append(start.timestamp())
+        if end:
+            where.append("created_at < ?")
+            params.append(end.timestamp())
+        if recognized is not None:
+            where.append("recognized = ?")
+            params.append(int(recognized))
+        condition = f"WHERE {' AND '.join(where)}" if where else ""
+
+        if group_by:
+            key, name = _GROUP_KEYS[group_by]
+            sql = (
+                f"SELECT {key} AS key, {name} AS name, count(*) AS count,"
+                " min(created_at) AS first_seen, max(created_at) AS last_seen"
+                f" FROM sightings {condition} GROUP BY 1 ORDER BY count DESC, key"
+                " LIMIT ?"
+            )
+        else:
+            sql = (
+                "SELECT postcard_id, media_id, feeder_id, feeder_name, species_id,"
+                " species_name, confidence, recognized, created_at"
+                f" FROM sightings {condition} ORDER BY created_at DESC LIMIT ?"
+            )
+        params.append(limit)
+        with self._lock:
+            if not (connection := self._connection):
+                raise sqlite3.ProgrammingError("The sighting index is closed")
+            rows = connection.execute(sql, params).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    async def async_add(
+        self, hass: HomeAssistant, sightings: list[IndexedSighting]
+    ) -> None:
+        """Add or update sightings, in the executor."""
+        if not sightings:
+            return
+        try:
+            await hass.async_add_executor_job(self.add, sightings)
+        except sqlite3.Error as err:
+            LOGGER.warning("Cannot index %d sightings: %s", len(sightings), err)
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    result = dict(row)
+    for key in ("created_at", "first_seen", "last_seen"):
+        if key in result:
+            result[key] = dt_util.utc_from_timestamp(result[key]).isoformat()
+    if "recognized" in result:
+        result["recognized"] = bool(result["recognized"])
+    if "species_id" in result and not result["species_id"]:
+        result["species_id"] = None
+    return result
+
+
+async def _async_open_index(hass: HomeAssistant) -> SightingIndex:
+    index = SightingIndex(hass.config.path(SIGHTING_INDEX_FILENAME))
+    await hass.async_add_executor_job(index.open)
+
+    async def _async_close(_event: Event) -> None:
+        await hass.async_add_executor_job(index.close)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close)
+    return index
+
+
+async def async_get_index(hass: HomeAssistant) -> SightingIndex:
+    """Get the integration-wide sighting index, opening it if needed."""
+    if (task := hass.data.get(DATA_SIGHTING_INDEX)) is None:
+        # Several accounts may be set up at the same time: open it only once
+        task = hass.data[DATA_SIGHTING_INDEX] = hass.async_create_task(
+            _async_open_index(hass)
+        )
+    return await asyncio.shield(task)
@@ -0,0 +1,129 @@
+"""Compact snapshots of Bird Buddy API objects.
+
+The API objects keep the whole GraphQL response (preview images, signed URLs of
+every size, sharing details, ...). The integration only keeps the few fields that
+entities and the media source use.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from birdbuddy.birds import Species
+from birdbuddy.media import Collection, Media, is_media_expired
+
+from .const import COLLECTION_CACHE_SIZE
+
+if TYPE_CHECKING:
+    from birdbuddy.client import BirdBuddy
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parse a timestamp of the API (e.g., ``2024-05-01T10:00:00.000Z``).
+
+    Same result as ``FeedNode.parse_datetime``, which uses ``strptime``: an order of
+    magnitude slower, for every media item of a collection.
+    """
+    return datetime.fromisoformat(value)
+
+
+class MediaRef:
+    """The id and signed URLs of a media item."""
+
+    __slots__ = ("id", "is_video", "created_at", "content_url", "thumbnail_url")
+
+    def __init__(
+        self,
+        media_id: str,
+        is_video: bool,
+        created_at: datetime | None,
+        content_url: str | None,
+        thumbnail_url: str | None,
+    ) -> None:
+        self.id = media_id
+        self.is_video = is_video
+        self.created_at = created_at
+        self.content_url = content_url
+        self.thumbnail_url = thumbnail_url
+
+    @classmethod
+    def from_media(cls, media: Media | MediaRef) -> MediaRef:
+        """Snapshot of a media item."""
+        if isinstance(media, MediaRef):
+            return media
+        return cls(
+            media.id,
+            media.get("__typename") == "MediaVideo",
+            (
+                parse_timestamp(created_at)
+                if (created_at := media.get("createdAt"))
+                else None
+            ),
+            media.content_url,
+            media.get("thumbnailUrl"),
+        )
+
+    @property
+    def is_expired(self) -> bool:
+        """`True` if the media URL is expired"""
+        return is_media_expired(self.thumbnail_url or self.content_url)
+
+    def __repr__(self) -> str:
+        return f"MediaRef({self.id})"
+
+
+class CollectionSummary:
+    """The fields of a species collection used by the integration."""
+
+    __slots__ = (
+        "collection_id",
+        "species_id",
+        "bird_name",
+        "feeder_name",
+        "last_visit",
+        "total_visits",
+        "cover_media",
+    )
+
+    def __init__(self, collection: Collection) -> None:
+        cover = collection.get("coverCollectionMedia") or {}
+        species = collection.get("species") or {}
+        self.collection_id: str = collection.collection_id
+        self.species_id: str | None = species.get("id")
+        self.bird_name: str | None = species.get("name")
+        self.feeder_name: str | None = cover.get("feederName")
+        self.last_visit: datetime | None = (
+            parse_timestamp(last) if (last := collection.get("visitLastTime")) else None
+        )
+        self.total_visits: int = collection.total_visits
+        self.cover_media: MediaRef | None = (
+            MediaRef.from_media(Media(media)) if (media := cover.get("media")) else None
+        )
+
+    @property
+    def species(self) -> Species | None:
+        """The bird species of this collection"""
+        if not self.species_id:
+            return None
+        return Species({"id": self.species_id, "name": self.bird_name})
+
+    def __repr__(self) -> str:
+        return f"CollectionSummary({self.collection_id}, {self.bird_name})"
+
+
+async def async_fetch_collections(
+    client: BirdBuddy, maxsize: int = COLLECTION_CACHE_SIZE
+) -> dict[str, CollectionSummary]:
+    """Fetch the species collections, keeping only their summaries.
+
+    The client keeps (and only ever adds to) the raw collections it has fetched:
+    they are dropped, once summarized.
+    """
+    collections = await client.refresh_collections()
+    summaries = {
+        collection_id: CollectionSummary(collection)
+        for collection_id, collection in list(collections.items())[:maxsize]
+    }
+    collections.clear()
+    return summaries
@@ -0,0 +1,228 @@
+"""Long-term statistics backfill for Bird Buddy visits."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+
+from birdbuddy.client import BirdBuddy
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistic_during_period,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import (
+    BACKFILL_BATCH_SIZE,
+    BACKFILL_FEED_MAX_PAGES,
+    BACKFILL_FEED_PAGE_SIZE,
+    DOMAIN,
+    LOGGER,
+)
+from .device import BirdBuddyDevice
+from .snapshots import async_fetch_collections
+from .util import (
+    FeedWalk,
+    Visit,
+    _async_iter_feed,
+    _feeder_id_for_media,
+    _visits_from_node,
+)
+
+
+def _statistic_id(feeder_id: str, species_id: str) -> str:
+    """The external statistic id for visits of one species at one feeder."""
+    return f"{DOMAIN}:visits_{slugify(feeder_id)}_{slugify(species_id)}"
+
+
+async def _async_iter_visits(
+    client: BirdBuddy,
+    feeder_ids: list[str],
+    since: datetime | None = None,
+    walk: FeedWalk | None = None,
+) -> AsyncIterator[Visit]:
+    """Walk the Feed history and every Collection, yielding each unique visit.
+
+    With ``since``, only the Feed is walked back to that time: visits collected
+    since then are in the Feed too. How the Feed walk ended is recorded in ``walk``.
+    """
+    seen: set[str] = set()
+
+    async for node in _async_iter_feed(
+        client,
+        page_size=BACKFILL_FEED_PAGE_SIZE,
+        newer_than=since - timedelta(microseconds=1) if since else None,
+        max_pages=BACKFILL_FEED_MAX_PAGES,
+        walk=walk,
+    ):
+        for visit in _visits_from_node(node, feeder_ids):
+            if since and visit.created_at < since:
+                continue
+            if visit.media_id not in seen:
+                seen.add(visit.media_id)
+                yield visit
+
+    if since:
+        return
+    collections = await async_fetch_collections(client)
+    for collection in collections.values():
+        if not (species := collection.species):
+            continue
+        medias = await client.collection(collection.collection_id)
+        for media_id, media in medias.items():
+            if media_id in seen or not media.get("createdAt"):
+                continue
+            if feeder_id := _feeder_id_for_media(media, feeder_ids):
+                seen.add(media_id)
+                yield Visit(
+                    feeder_id, species.id, species.name, media.created_at, media_id
+                )
+
+
+class VisitAggregator:
+    """Aggregate visits into hourly buckets per feeder and species."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[tuple[str, str], dict[datetime, int]] = defaultdict(
+            lambda: defaultdict(int)
+        )
+        self._names: dict[str, str] = {}
+
+    def add(self, visit: Visit) -> None:
+        """Count one visit."""
+        hour = dt_util.as_utc(visit.created_at).replace(
+            minute=0, second=0, microsecond=0
+        )
+        self._buckets[(visit.feeder_id, visit.species_id)][hour] += 1
+        if visit.species_name:
+            self._names[visit.species_id] = visit.species_name
+
+    @property
+    def newest(self) -> datetime | None:
+        """The start of the newest hour with a visit."""
+        return max((max(hours) for hours in self._buckets.values()), default=None)
+
+    def statistic_ids(self) -> list[str]:
+        """The statistic ids of the aggregated visits."""
+        return [_statistic_id(*key) for key in self._buckets]
+
+    def statistics(
+        self,
+        feeders: dict[str, BirdBuddyDevice],
+        base_sums: dict[str, float] | None = None,
+    ) -> list[tuple[StatisticMetaData, list[StatisticData]]]:
+        """Build the statistics metadata and hourly rows for each feeder and species.
+
+        The sums continue from ``base_sums`` (by statistic id), if any.
+        """
+        result = []
+        for (feeder_id, species_id), hours in self._buckets.items():
+            feeder = feeders.get(feeder_id)
+            species_name = self._names.get(species_id, species_id)
+            metadata = StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"{feeder.name if feeder else feeder_id} {species_name} visits",
+                source=DOMAIN,
+                statistic_id=_statistic_id(feeder_id, species_id),
+                unit_of_measurement=None,
+            )
+            total = (base_sums or {}).get(metadata["statistic_id"], 0)
+            rows = []
+            for hour in sorted(hours):
+                total += hours[hour]
+                rows.append(StatisticData(start=hour, state=hours[hour], sum=total))
+            result.append((metadata, rows))
+        return result
+
+
+def _sums_before(
+    hass: HomeAssistant, statistic_ids: list[str], since: datetime
+) -> dict[str, float]:
+    """The sum of each statistic before the hour ``since`` (which is re-imported).
+
+    That is the sum of the last hour before ``since``: the hours after it may have
+    been imported already, by a backfill that stopped early.
+    """
+    sums = {}
+    for statistic_id in statistic_ids:
+        # From the start, so the change is the sum of the last row before ``since``
+        period = statistic_during_period(
+            hass, None, since, statistic_id, {"change"}, None
+        )
+        if (total := period.get("change")) is not None:
+            sums[statistic_id] = total
+    return sums
+
+
+async def async_backfill_statistics(
+    hass: HomeAssistant,
+    client: BirdBuddy,
+    feeders: dict[str, BirdBuddyDevice],
+    on_visits: Callable[[list[Visit]], Awaitable[None]] | None = None,
+    since: datetime | None = None,
+) -> datetime | None:
+    """Import the account's visit history as external statistics.
+
+    The Feed and Collections are streamed one page at a time, and only the hourly
+    aggregates are kept in memory. Statistics are imported in batches of
+    ``BACKFILL_BATCH_SIZE`` rows.
+
+    The visits are also passed to ``on_visits``, in batches of the same size.
+
+    With ``since`` (the start of an hour, returned by a previous backfill), only the
+    hours from then on are imported again, with their sums continuing the existing
+    statistics. Returns the start of the newest imported hour, to pass as ``since``
+    next time, or None if the history could not be walked completely.
+
+    Without the recorder, the visits are still passed to ``on_visits``, but nothing
+    is imported: the hour returned then only applies to ``on_visits``.
+    """
+    if not (recorder := "recorder" in hass.config.components):
+        if not on_visits:
+            LOGGER.debug("Recorder is not loaded: skipping statistics backfill")
+            return None
+        LOGGER.debug("Recorder is not loaded: only indexing the visit history")
+
+    aggregator = VisitAggregator()
+    visits: list[Visit] = []
+    walk = FeedWalk()
+    complete = True
+    try:
+        async for visit in _async_iter_visits(client, list(feeders), since, walk):
+            aggregator.add(visit)
+            if on_visits:
+                visits.append(visit)
+                if len(visits) >= BACKFILL_BATCH_SIZE:
+                    await on_visits(visits)
+                    visits = []
+    except Exception as exc:  # pylint: disable=broad-except
+        # Import whatever we managed to collect so far
+        LOGGER.warning("Statistics backfill stopped early: %s", exc)
+        complete = False
+    if visits:
+        await on_visits(visits)
+    if recorder:
+        base_sums = None
+        if since and (statistic_ids := aggregator.statistic_ids()):
+            base_sums = await get_instance(hass).async_add_executor_job(
+                _sums_before, hass, statistic_ids, since
+            )
+
+        imported = 0
+        for metadata, rows in aggregator.statistics(feeders, base_sums):
+            for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+                batch = rows[start : start + BACKFILL_BATCH_SIZE]
+                async_add_external_statistics(hass, metadata, batch)
+                imported += len(batch)
+        LOGGER.info("Imported %d hourly visit statistics", imported)
+
+    # Without a mark, the Feed is only walked back so far: Collections have the rest
+    if not complete or (since and not walk.complete):
+        return None
+    return aggregator.newest or since
@@ -1,5 +1,6 @@
 """Bird Buddy switches"""
 
+from functools import partial
 from typing import Any
 
 from birdbuddy.feeder import FeederState
@@ -56,19 +57,23 @@ class BirdBuddyOffGridSwitch(BirdBuddyMixin, SwitchEntity):
 
     @property
     def is_on(self) -> bool:
-        return self.feeder.is_off_grid
+        return self.coordinator.writer.value(
+            self.feeder.id, "off_grid", self.feeder.is_off_grid
+        )
 
     async def async_turn_on(self, **kwargs: Any) -> None:
-        result = await self.coordinator.client.toggle_off_grid(self.feeder, True)
-        if result:
-            self.feeder.update(result)
-            self.coordinator.async_update_listeners()
+        await self._async_set(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        result = await self.coordinator.client.toggle_off_grid(self.feeder, False)
-        if result:
-            self.feeder.update(result)
-            self.coordinator.async_update_listeners()
+        await self._async_set(False)
+
+    async def _async_set(self, value: bool) -> None:
+        await self.coordinator.writer.async_write(
+            self.feeder,
+            "off_grid",
+            value,
+            partial(self.coordinator.client.toggle_off_grid, self.feeder),
+        )
 
 
 class BirdBuddyAudioSwitch(BirdBuddyMixin, SwitchEntity):
@@ -96,20 +101,24 @@ class BirdBuddyAudioSwitch(BirdBuddyMixin, SwitchEntity):
 
     @property
     def is_on(self) -> bool:
-        return self.feeder.is_audio_enabled
+        return self.coordinator.writer.value(
+            self.feeder.id, "audio_enabled", self.feeder.is_audio_enabled
+        )
 
     @property
     def icon(self) -> str | None:
         return "mdi:microphone" if self.is_on else "mdi:microphone-off"
 
     async def async_turn_on(self, **kwargs: Any) -> None:
-        result = await self.coordinator.client.toggle_audio_enabled(self.feeder, True)
-        if result:
-            self.feeder.update(result)
-            self.coordinator.async_update_listeners()
+        await self._async_set(True)
 
     async def async_turn_off(self, **kwargs: Any) -> None:
-        result = await self.coordinator.client.toggle_audio_enabled(self.feeder, False)
-        if result:
-            self.feeder.update(result)
-            self.coordinator.async_update_listeners()
+        await self._async_set(False)
+
+    async def _async_set(self, value: bool) -> None:
+        await self.coordinator.writer.async_write(
+            self.feeder,
+            "audio_enabled",
+            value,
+            partial(self.coordinator.client.toggle_audio_enabled, self.feeder),
+        )
@@ -0,0 +1,163 @@
+"""Routes postcard events to the device triggers that match them."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, NamedTuple
+
+from birdbuddy.sightings import SightingReport
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    HassJob,
+    HomeAssistant,
+    callback,
+)
+
+from .const import (
+    DATA_TRIGGER_DISPATCHER,
+    EVENT_NEW_POSTCARD_SIGHTING,
+    LOGGER,
+    TRIGGER_TYPE_POSTCARD,
+    TRIGGER_TYPE_SPECIES,
+    TRIGGER_TYPE_UNLOCKED,
+    TRIGGER_TYPE_UNRECOGNIZED,
+)
+
+
+class TriggerKey(NamedTuple):
+    """Index key of an attached trigger."""
+
+    trigger_type: str
+    feeder_id: str | None
+    """None matches every feeder."""
+    species: str | None = None
+    """Species id or name (case-insensitive), for species triggers."""
+
+
+class _PostcardSummary(NamedTuple):
+    species: set[str]
+    """Ids and names of the recognized species (case-folded)."""
+    recognized: bool | None
+    """None if the event does not say."""
+    unlocked: bool
+
+
+def _species_keys(species: Mapping[str, Any] | None) -> set[str]:
+    if not species:
+        return set()
+    return {str(v).casefold() for k in ("id", "name") if (v := species.get(k))}
+
+
+def _summarize(sighting: Mapping[str, Any]) -> _PostcardSummary:
+    """What a postcard event's sighting data says about the visitor."""
+    if "sightingReport" in sighting:
+        report = SightingReport(sighting["sightingReport"])
+        recognized = [s for s in report.sightings if s.is_recognized]
+        return _PostcardSummary(
+            species=set().union(*(_species_keys(s.get("species")) for s in recognized)),
+            recognized=bool(recognized),
+            unlocked=any(s.is_unlocked for s in recognized),
+        )
+    # Compact event
+    recognized = sighting.get("recognized")
+    return _PostcardSummary(
+        species=_species_keys(sighting.get("species")) if recognized else set(),
+        recognized=recognized,
+        unlocked=bool(sighting.get("unlocked")),
+    )
+
+
+class PostcardTriggerDispatcher:
+    """Dispatches each postcard event to the matching triggers only.
+
+    Instead of one event listener (with its own event data matching) per
+    automation, a single listener looks up the matching triggers by type, feeder
+    and species.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._triggers: dict[TriggerKey, list[tuple[HassJob, dict[str, Any]]]] = {}
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_attach(
+        self, key: TriggerKey, job: HassJob, trigger_data: dict[str, Any]
+    ) -> CALLBACK_TYPE:
+        """Run ``job`` for every postcard matching ``key``."""
+        if key.species:
+            key = key._replace(species=key.species.casefold())
+        entry = (job, trigger_data)
+        self._triggers.setdefault(key, []).append(entry)
+        if not self._unsub:
+            self._unsub = self._hass.bus.async_listen(
+                EVENT_NEW_POSTCARD_SIGHTING, self._async_handle_event
+            )
+
+        @callback
+        def detach() -> None:
+            triggers = self._triggers[key]
+            triggers.remove(entry)
+            if not triggers:
+                del self._triggers[key]
+            if not self._triggers and self._unsub:
+                self._unsub()
+                self._unsub = None
+
+        return detach
+
+    def _keys(self, sighting: Mapping[str, Any]) -> list[TriggerKey]:
+        """The keys of the triggers matching a postcard."""
+        feeder_id = (sighting.get("feeder") or {}).get("id")
+        summary = _summarize(sighting)
+        keys = []
+        for feeder in {feeder_id, None}:
+            keys.append(TriggerKey(TRIGGER_TYPE_POSTCARD, feeder))
+            keys.extend(
+                TriggerKey(TRIGGER_TYPE_SPECIES, feeder, species)
+                for species in summary.species
+            )
+            if summary.unlocked:
+                keys.append(TriggerKey(TRIGGER_TYPE_UNLOCKED, feeder))
+            if summary.recognized is False:
+                keys.append(TriggerKey(TRIGGER_TYPE_UNRECOGNIZED, feeder))
+        return keys
+
+    @callback
+    def _async_handle_event(self, event: Event) -> None:
+        # Looked up on each event, so that it can be instrumented by the profiler
+        self._async_dispatch(event)
+
+    @callback
+    def _async_dispatch(self, event: Event) -> None:
+        sighting = event.data.get("sighting") or {}
+        try:
+            keys = self._keys(sighting)
+        except (AttributeError, TypeError, ValueError) as err:
+            LOGGER.warning("Cannot dispatch postcard event %s: %s", event.data, err)
+            return
+        for key in keys:
+            for job, trigger_data in self._triggers.get(key, ()):
+                self._hass.async_run_hass_job(
+                    job,
+                    {
+                        "trigger": {
+                            **trigger_data,
+                            "platform": "device",
+                            "event": event,
+                            "description": f"event '{event.event_type}'",
+                        }
+                    },
+                    event.context,
+                )
+
+
+@callback
+def async_get_dispatcher(hass: HomeAssistant) -> PostcardTriggerDispatcher:
+    """Get the integration-wide trigger dispatcher, creating it if needed."""
+    if (dispatcher := hass.data.get(DATA_TRIGGER_DISPATCHER)) is None:
+        dispatcher = hass.data[DATA_TRIGGER_DISPATCHER] = PostcardTriggerDispatcher(
+            hass
+        )
+    return dispatcher
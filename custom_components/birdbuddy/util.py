@@ -1,7 +1,98 @@
 """Bird Buddy utilities"""
 
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar
+from urllib.parse import urlsplit
+
 from birdbuddy.feed import FeedNode
 
+if TYPE_CHECKING:
+    from birdbuddy.client import BirdBuddy
+    from birdbuddy.sightings import PostcardSighting, SightingReport
+
+_KT = TypeVar("_KT")
+_VT = TypeVar("_VT")
+
+
+class Visit(NamedTuple):
+    """A single bird visit, as seen in the Feed or in a Collection."""
+
+    feeder_id: str
+    species_id: str
+    species_name: str
+    created_at: datetime
+    media_id: str
+
+
+class LruCache(OrderedDict, Generic[_KT, _VT]):
+    """A dict holding at most ``maxsize`` items, evicting the least recently used."""
+
+    def __init__(self, maxsize: int) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key: _KT, default: _VT | None = None) -> _VT | None:
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key: _KT, value: _VT) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+def _top_species(report: SightingReport) -> tuple[dict | None, int | None]:
+    """The most likely species of a sighting report, and its confidence."""
+    for sighting in report.sightings:
+        if sighting.is_recognized and (species := sighting.get("species")):
+            return {"id": species.get("id"), "name": species.get("name")}, 100
+
+    best = max(
+        (m for m in report.highest_confidence_matches.values() if m),
+        key=lambda m: m["confidence"],
+        default=None,
+    )
+    if not best:
+        return None, None
+    names = {
+        c.species.id: c.species.name for s in report.sightings for c in s.suggestions
+    }
+    species_id = best["speciesCode"]
+    return {"id": species_id, "name": names.get(species_id)}, best["confidence"]
+
+
+def _compact_postcard_event(
+    postcard: FeedNode, sighting: PostcardSighting
+) -> dict[str, Any]:
+    """A small postcard event payload, without the media URLs or the full report.
+
+    The full sighting can be retrieved with the ``birdbuddy.get_sighting`` service.
+    """
+    species, confidence = _top_species(sighting.report)
+    medias = sighting.medias
+    return {
+        "compact": True,
+        "postcard": {"id": postcard.node_id, "createdAt": postcard.get("createdAt")},
+        "sighting": {
+            "feeder": {
+                "id": sighting.feeder.get("id"),
+                "name": sighting.feeder.get("name"),
+            },
+            "species": species,
+            "confidence": confidence,
+            "recognized": any(s.is_recognized for s in sighting.report.sightings),
+            "unlocked": any(s.is_unlocked for s in sighting.report.sightings),
+            "thumbnail": medias[0].id if medias else None,
+        },
+    }
+
 
 def _find_media_with_species(feeder_id: str, items: list[FeedNode]) -> list[FeedNode]:
     return [
@@ -18,3 +109,96 @@ def _find_media_with_species(feeder_id: str, items: list[FeedNode]) -> list[Feed
         )
         and item.get("species", None)
     ]
+
+
+def _feeder_id_for_media(media: dict, feeder_ids: list[str]) -> str | None:
+    """Return the feeder id that captured this media.
+
+    Media does not reference its feeder directly, but the feeder id is part of
+    the path of its signed media URLs, e.g.
+    ``https://<media host>/<feeder id>/<media file>?Expires=...&Signature=...``.
+    Feeder ids are UUIDs, so one cannot match inside another; the query string
+    (whose signature could contain anything) is ignored.
+    """
+    path = urlsplit(media.get("thumbnailUrl") or "").path
+    return next((f for f in feeder_ids if f in path), None)
+
+
+def _medias_from_node(node: FeedNode) -> list[dict]:
+    """The media of a Feed node: either a single ``media``, or a ``medias`` list."""
+    return node.get("medias") or ([m] if (m := node.get("media")) else [])
+
+
+def _visits_from_node(node: FeedNode, feeder_ids: list[str]) -> Iterator[Visit]:
+    """Yield the visits contained in a single Feed node.
+
+    ``FeedItemCollectedPostcard`` nodes contain ``medias`` and ``species`` lists, while
+    ``FeedItemSpeciesSighting`` and ``FeedItemSpeciesUnlocked`` contain a single ``media``
+    and the ``collection`` it was added to.
+    """
+    if not (created_at := node.created_at):
+        return
+    species = node.get("species") or []
+    if not species and (s := (node.get("collection") or {}).get("species")):
+        species = [s]
+    medias = _medias_from_node(node)
+    if not (species and medias):
+        return
+    media = next((m for m in medias if m.get("__typename") == "MediaImage"), medias[0])
+    if not (feeder_id := _feeder_id_for_media(media, feeder_ids)):
+        return
+    for s in species:
+        if s.get("id"):
+            yield Visit(feeder_id, s["id"], s.get("name"), created_at, media["id"])
+
+
+class FeedWalk:
+    """How a walk through the Feed ended."""
+
+    def __init__(self) -> None:
+        self.complete = False
+        """Whether ``newer_than`` (or the end of the Feed) was reached."""
+        self.cursor: str | None = None
+        """The end cursor of the last page read, to resume an incomplete walk."""
+
+
+async def _async_iter_feed(
+    client: BirdBuddy,
+    page_size: int = 20,
+    newer_than: datetime | None = None,
+    max_pages: int | None = None,
+    after: str | None = None,
+    walk: FeedWalk | None = None,
+) -> AsyncIterator[FeedNode]:
+    """Page through the Feed, newest first (or from the ``after`` cursor).
+
+    Paging stops at the end of the Feed, after ``max_pages`` pages, or at the first
+    page containing a node that is not newer than ``newer_than``. How it stopped is
+    recorded in ``walk``.
+    """
+    cursor = after
+    pages = 0
+    while True:
+        feed = await client.feed(first=page_size, after=cursor)
+        pages += 1
+        reached_end = False
+        for node in feed.nodes:
+            if newer_than and node.created_at and node.created_at <= newer_than:
+                reached_end = True
+                continue
+            yield node
+        next_cursor = feed.page_end_cursor
+        if walk:
+            walk.cursor = next_cursor
+        if (
+            reached_end
+            or not feed.get("pageInfo", {}).get("hasNextPage")
+            or not next_cursor
+            or next_cursor == cursor
+        ):
+            if walk:
+                walk.complete = True
+            return
+        if max_pages is not None and pages >= max_pages:
+            return
+        cursor = next_cursor
@@ -1,19 +1,23 @@
 """Helpers for managing recent visitors."""
 
-from typing import TypeVar
-from collections.abc import Callable
+from datetime import datetime
+from typing import Any, TypeVar
+from collections.abc import Awaitable, Callable
 
 from birdbuddy.birds import Species
 from birdbuddy.client import BirdBuddy
 from birdbuddy.feed import FeedNodeType
 from birdbuddy.feeder import Feeder
-from birdbuddy.media import Media, is_media_expired
+from birdbuddy.media import Media
 from birdbuddy.sightings import PostcardSighting
 
 from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.update_coordinator import CALLBACK_TYPE
 
-from .const import EVENT_NEW_POSTCARD_SIGHTING, LOGGER
+from .const import EVENT_NEW_POSTCARD_SIGHTING, LOGGER, VISITOR_REVALIDATE_DELAY
+from .governor import ApiPriority, api_priority
 from .util import _find_media_with_species
 
 _RecentVisitors = TypeVar("_RecentVisitors", bound="RecentVisitors")
@@ -28,15 +32,35 @@ class RecentVisitors:
         feeder: Feeder,
         client: BirdBuddy,
         hass: HomeAssistant,
+        get_sighting: Callable[[str], Awaitable[PostcardSighting]],
+        refresh_collections: Callable[[], Awaitable[dict]] | None = None,
+        snapshot: dict[str, Any] | None = None,
+        on_change: VisitorCallback | None = None,
     ) -> None:
-        """Initialize the recent visitors manager."""
+        """Initialize the recent visitors manager.
+
+        The latest visitor is restored from ``snapshot`` (see ``as_snapshot()``), and
+        ``on_change`` is called whenever it changes. ``get_sighting`` returns the
+        sighting already read for a postcard id: reading it again from the postcard
+        would change the postcard on the server.
+        """
         self.hass = hass
         self.client = client
         self.feeder = feeder
+        self._get_sighting = get_sighting
+        self._refresh_collections = (
+            refresh_collections or self.client.refresh_collections
+        )
         self._listeners: set[VisitorCallback] = set()
         self._disposable: Callable[[], None] | None = None
+        self._on_change = on_change
         self._latest_media: Media | None = None
         self._latest_species: Species | None = None
+        if snapshot:
+            if media := snapshot.get("media"):
+                self._latest_media = Media(media)
+            if species := snapshot.get("species"):
+                self._latest_species = Species(species)
 
     @property
     def latest_media(self) -> Media | None:
@@ -48,13 +72,21 @@ class RecentVisitors:
         """Return the latest species."""
         return self._latest_species
 
+    def as_snapshot(self) -> dict[str, Any] | None:
+        """The latest visitor, to be persisted."""
+        if not self._latest_media and not self._latest_species:
+            return None
+        return {
+            "media": self._latest_media.data if self._latest_media else None,
+            "species": self._latest_species.data if self._latest_species else None,
+        }
+
     def register_callback(self, listener: VisitorCallback) -> CALLBACK_TYPE:
         """Register a callback to be called when a new visitor is detected."""
         if not self._listeners:
             self._disposable = self._start()
-        if self._latest_media and not is_media_expired(
-            self._latest_media.content_url or self._latest_media.thumbnail_url
-        ):
+        if self._latest_media or self._latest_species:
+            # Even expired media: entities resolve it by id to its current URLs
             listener(self)
         self._listeners.add(listener)
         return lambda: self.unregister_callback(listener)
@@ -83,13 +115,37 @@ class RecentVisitors:
             )
 
         LOGGER.info("Listening for new visitors to feeder %s", self.feeder.name)
-        self.hass.add_job(self._update_latest_visitor)
-        return self.hass.bus.async_listen(
+        if self._latest_media or self._latest_species:
+            # Restored from storage: check it later, without delaying the startup
+            cancel_revalidate = async_call_later(
+                self.hass, VISITOR_REVALIDATE_DELAY, self._async_revalidate
+            )
+        else:
+            cancel_revalidate = None
+            self.hass.add_job(self._update_latest_visitor)
+        unsub = self.hass.bus.async_listen(
             EVENT_NEW_POSTCARD_SIGHTING,
             self._on_new_postcard,
             event_filter=filter_my_postcards,
         )
 
+        def dispose() -> None:
+            if cancel_revalidate:
+                cancel_revalidate()
+            unsub()
+
+        return dispose
+
+    async def _async_revalidate(self, _now: datetime | None = None) -> None:
+        """Check the restored visitor against the Feed, in the background."""
+        with api_priority(ApiPriority.LOW):
+            try:
+                await self._update_latest_visitor()
+            except Exception as err:  # pylint: disable=broad-except
+                LOGGER.debug(
+                    "Cannot revalidate recent visitor of %s: %s", self.feeder.name, err
+                )
+
     async def _update_latest_visitor(self) -> None:
         feed = await self.client.feed()
 
@@ -121,7 +177,7 @@ class RecentVisitors:
 
         if not self._latest_species:
             # Did not find media in the feed.
-            c = await self.client.refresh_collections()
+            c = await self._refresh_collections()
             c = [c for c in c.values() if c.feeder_name == self.feeder.name]
             if c := max(c, default=None, key=(lambda x: x.last_visit)):
                 self._latest_species = c.species
@@ -143,10 +199,20 @@ class RecentVisitors:
         """Notify listeners of the latest visitor."""
         for listener in self._listeners:
             listener(self)
+        if self._on_change:
+            self._on_change(self)
 
     async def _on_new_postcard(self, event: Event | None = None) -> None:
         """Handle a new postcard sighting."""
-        postcard = PostcardSighting(event.data["sighting"])
+        if event.data.get("compact"):
+            # The compact event does not include the sighting report or media
+            try:
+                postcard = await self._get_sighting(event.data["postcard"]["id"])
+            except HomeAssistantError as err:
+                LOGGER.debug("Skipping the new postcard: %s", err)
+                return
+        else:
+            postcard = PostcardSighting(event.data["sighting"])
 
         assert postcard.report.sightings
         assert postcard.medias
@@ -158,6 +224,10 @@ class RecentVisitors:
         if media:
             self._latest_media = media
 
+        classification = event.data.get("classification") or {}
+        # Only a species suggested by Bird Buddy has an id, not any label of the model
+        classified_id = classification.get("species", {}).get("id")
+
         if unlocked := [
             s for s in postcard.report.sightings if s.sighting_type.is_unlocked
         ]:
@@ -178,6 +248,14 @@ class RecentVisitors:
                 "Reporting recent visitor from recognized: %s",
                 self._latest_species.name,
             )
+        elif classified_id:
+            # Next best, the local classifier's species
+            self._latest_species = Species(classification["species"])
+            LOGGER.debug(
+                "Reporting recent visitor from local classification: %s (%s%%)",
+                self._latest_species.name,
+                classification["confidence"],
+            )
         elif guessable := [s for s in postcard.report.sightings if s.suggestions]:
             # Else, select one that has a list of suggestions
             suggested = guessable[0].suggestions[0]
@@ -0,0 +1,132 @@
+"""Debounced, optimistic writes of feeder settings."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import LOGGER, SETTING_WRITE_DELAY
+from .device import BirdBuddyDevice
+
+SettingKey = tuple[str, str]
+"""A feeder id and setting name."""
+
+SettingSender = Callable[[Any], Awaitable[dict | None]]
+"""Sends the value of a setting, returning the updated feeder data."""
+
+
+class _PendingWrite:
+    """The latest value written to one setting, not sent yet."""
+
+    def __init__(self, feeder: BirdBuddyDevice, value: Any, send: SettingSender):
+        self.feeder = feeder
+        self.value = value
+        self.send = send
+
+
+class SettingWriter:
+    """Writes feeder settings optimistically, and sends them to the API debounced.
+
+    The desired value is shown immediately, while the API request is delayed by
+    ``delay``. Only the latest value of each (feeder, setting) is sent, and all
+    settings written within the same delay are sent concurrently. If a request
+    fails, the setting rolls back to the last known value of the feeder.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        on_change: Callable[[str], None],
+        delay: float = SETTING_WRITE_DELAY,
+    ) -> None:
+        self._hass = hass
+        self._on_change = on_change
+        self._delay = delay
+        self._desired: dict[SettingKey, Any] = {}
+        self._pending: dict[SettingKey, _PendingWrite] = {}
+        self._batch: asyncio.Future[dict[SettingKey, BaseException]] | None = None
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+
+    def value(self, feeder_id: str, setting: str, default: Any) -> Any:
+        """The desired value of a setting, or ``default`` if nothing is pending."""
+        return self._desired.get((feeder_id, setting), default)
+
+    async def async_write(
+        self,
+        feeder: BirdBuddyDevice,
+        setting: str,
+        value: Any,
+        send: SettingSender,
+    ) -> None:
+        """Write a setting, and wait until it has been sent."""
+        key = (feeder.id, setting)
+        self._desired[key] = value
+        self._pending[key] = _PendingWrite(feeder, value, send)
+        self._on_change(feeder.id)
+
+        if self._batch is None:
+            self._batch = self._hass.loop.create_future()
+            self._flush_handle = self._hass.loop.call_later(
+                self._delay, self._async_start_flush
+            )
+        errors = await asyncio.shield(self._batch)
+        if err := errors.get(key):
+            raise HomeAssistantError(
+                f"Cannot set {setting} for {feeder.name} to {value}: {err}"
+            ) from err
+
+    @callback
+    def async_cancel(self) -> None:
+        """Drop the writes that were not sent yet, e.g. when the entry unloads."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if (batch := self._batch) is None:
+            return
+        pending, self._pending = self._pending, {}
+        self._batch = None
+        for key in pending:
+            self._desired.pop(key, None)
+        err = HomeAssistantError("the integration was unloaded")
+        batch.set_result(dict.fromkeys(pending, err))
+
+    @callback
+    def _async_start_flush(self) -> None:
+        self._flush_handle = None
+        batch, self._batch = self._batch, None
+        pending, self._pending = self._pending, {}
+        self._hass.async_create_task(
+            self._async_flush(batch, pending), "birdbuddy setting writes"
+        )
+
+    async def _async_flush(
+        self,
+        batch: asyncio.Future[dict[SettingKey, BaseException]],
+        pending: dict[SettingKey, _PendingWrite],
+    ) -> None:
+        # Wait for any earlier batch, so the same setting is never sent out of order
+        async with self._lock:
+            results = await asyncio.gather(
+                *(write.send(write.value) for write in pending.values()),
+                return_exceptions=True,
+            )
+
+        errors = {}
+        for (key, write), result in zip(pending.items(), results):
+            # Including a cancelled request, which is not an Exception
+            if isinstance(result, BaseException):
+                LOGGER.warning("Failed to set %s for %s: %s", key[1], key[0], result)
+                errors[key] = result
+            elif result:
+                write.feeder.update(result)
+            if key not in self._pending:
+                # Nothing newer written: show the actual (or rolled back) value
+                self._desired.pop(key, None)
+        for feeder_id in {key[0] for key in pending}:
+            self._on_change(feeder_id)
+        batch.set_result(errors)
@@ -0,0 +1,113 @@
+"""Test the Bird Buddy local classifier."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.sightings import PostcardSighting, SightingReport
+from homeassistant.core import Event, HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.birdbuddy.classifier import Classification, _best_classification
+from custom_components.birdbuddy.const import DOMAIN, EVENT_NEW_POSTCARD_SIGHTING
+from custom_components.birdbuddy.coordinator import BirdBuddyDataUpdateCoordinator
+from custom_components.birdbuddy.visitors import RecentVisitors
+
+LABELS = ["Blue Jay", "Northern Cardinal", "House Finch"]
+
+
+def _suggestion(species_id: str, name: str) -> dict:
+    return {
+        "__typename": "CollectionSpecies",
+        "species": {"__typename": "SpeciesBird", "id": species_id, "name": name},
+    }
+
+
+SIGHTING = PostcardSighting(
+    {
+        "feeder": {"id": "feeder", "name": "Feeder"},
+        "sightingReport": {
+            "reportToken": "token",
+            "sightings": [
+                {
+                    "__typename": "SightingCantDecideWhichBird",
+                    "id": "sighting",
+                    "suggestions": [
+                        _suggestion("jay", "Blue Jay"),
+                        _suggestion("cardinal", "Northern Cardinal"),
+                    ],
+                }
+            ],
+        },
+    }
+)
+
+
+def test_best_classification() -> None:
+    """Test the scores of every image are averaged, and matched to a suggestion."""
+    result = _best_classification([[0.1, 0.8, 0.1], [0.3, 0.6, 0.1]], LABELS, SIGHTING)
+    assert result == Classification("cardinal", "Northern Cardinal", 70)
+
+    # Not one of Bird Buddy's suggestions: the species id is not known
+    result = _best_classification([[0.1, 0.1, 0.8]], LABELS, SIGHTING)
+    assert result == Classification(None, "House Finch", 80)
+
+
+async def test_collect_with_classification(hass: HomeAssistant) -> None:
+    """Test collect_postcard chooses the classified species for undecided sightings."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    client = MagicMock()
+    client.sighting_choose_species = AsyncMock(
+        return_value=SightingReport({"reportToken": "new", "sightings": []})
+    )
+    client.finish_postcard = AsyncMock(return_value=True)
+    coordinator = BirdBuddyDataUpdateCoordinator(hass, client, entry)
+    coordinator.classifications["postcard"] = Classification(
+        "cardinal", "Northern Cardinal", 70
+    )
+    data = {"postcard": {"id": "postcard"}, "sighting": SIGHTING.data}
+
+    # Below the requested threshold
+    await coordinator.handle_collect_postcard(
+        data | {"strategy": "best_guess", "best_guess_confidence": 80}
+    )
+    client.sighting_choose_species.assert_not_awaited()
+
+    await coordinator.handle_collect_postcard(data | {"strategy": "best_guess"})
+    client.sighting_choose_species.assert_awaited_once()
+    assert client.sighting_choose_species.await_args.args[:2] == (
+        "sighting",
+        "cardinal",
+    )
+    finished = client.finish_postcard.await_args.args[1]
+    assert finished.report.token == "new"
+
+
+async def test_visitor_from_classification(hass: HomeAssistant) -> None:
+    """Test the recent visitor is only a classified species if Bird Buddy knows it."""
+    visitors = RecentVisitors(MagicMock(), MagicMock(), hass, AsyncMock())
+    media = {
+        "__typename": "MediaImage",
+        "id": "media",
+        "createdAt": "2024-05-01T10:00:00.000Z",
+        "contentUrl": "https://media.example/media.jpg",
+    }
+    data = {"sighting": SIGHTING.data | {"medias": [media]}}
+
+    finch = Classification(None, "House Finch", 80)
+    await visitors._on_new_postcard(
+        Event(
+            EVENT_NEW_POSTCARD_SIGHTING,
+            data | {"classification": finch.as_event_data()},
+        )
+    )
+    # Not a Bird Buddy species: the first suggestion instead
+    assert visitors.latest_species.name == "Blue Jay"
+
+    cardinal = Classification("cardinal", "Northern Cardinal", 70)
+    await visitors._on_new_postcard(
+        Event(
+            EVENT_NEW_POSTCARD_SIGHTING,
+            data | {"classification": cardinal.as_event_data()},
+        )
+    )
+    assert visitors.latest_species.name == "Northern Cardinal"
@@ -1,13 +1,23 @@
 """Test the Bird Buddy config flow."""
 from unittest.mock import PropertyMock, patch
 
+from birdbuddy.client import BirdBuddy
 from birdbuddy.exceptions import AuthenticationFailedError, NoResponseError
 from birdbuddy.user import BirdBuddyUser
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant
 from homeassistant.data_entry_flow import FlowResultType
 
-from custom_components.birdbuddy.const import DOMAIN
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.birdbuddy.const import (
+    CONF_COMPACT_EVENTS,
+    CONF_INDEX_NEW_POSTCARDS,
+    CONF_PROFILE_LOOP,
+    CONF_REFRESH_TOKEN,
+    DATA_FLOW_SESSIONS,
+    DOMAIN,
+)
 
 
 async def test_form(hass: HomeAssistant) -> None:
@@ -44,6 +54,52 @@ async def test_form(hass: HomeAssistant) -> None:
     assert len(mock_setup_entry.mock_calls) == 1
 
 
+async def test_form_keeps_session(hass: HomeAssistant) -> None:
+    """Test the signed in session is handed to the new entry."""
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+
+    async def sign_in(client: BirdBuddy) -> bool:
+        client._refresh_token = "refresh"
+        return True
+
+    with patch(
+        "birdbuddy.client.BirdBuddy.refresh", autospec=True, side_effect=sign_in
+    ), patch(
+        "birdbuddy.client.BirdBuddy.user",
+        new_callable=PropertyMock,
+        return_value=BirdBuddyUser({"name": "Test User"}),
+    ), patch(
+        "custom_components.birdbuddy.async_setup_entry",
+        return_value=True,
+    ):
+        result2 = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                "email": "Test@email.com",
+                "password": "test-password",
+            },
+        )
+        await hass.async_block_till_done()
+
+    assert result2["data"] == {
+        "email": "Test@email.com",
+        "password": "test-password",
+        CONF_REFRESH_TOKEN: "refresh",
+    }
+    client = hass.data[DATA_FLOW_SESSIONS]["test@email.com"]
+    assert client._refresh_token == "refresh"
+
+    # Never set up: the client is dropped with the entry
+    with patch(
+        "custom_components.birdbuddy.async_unload_entry",
+        return_value=True,
+    ):
+        await hass.config_entries.async_remove(result2["result"].entry_id)
+    assert DATA_FLOW_SESSIONS not in hass.data
+
+
 async def test_form_invalid_auth(hass: HomeAssistant) -> None:
     """Test we handle invalid auth."""
     result = await hass.config_entries.flow.async_init(
@@ -86,3 +142,23 @@ async def test_form_cannot_connect(hass: HomeAssistant) -> None:
 
     assert result2["type"] == FlowResultType.FORM
     assert result2["errors"] == {"base": "cannot_connect"}
+
+
+async def test_options_flow(hass: HomeAssistant) -> None:
+    """Test the compact events option."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {CONF_COMPACT_EVENTS: True}
+    )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_COMPACT_EVENTS: True,
+        CONF_INDEX_NEW_POSTCARDS: False,
+        CONF_PROFILE_LOOP: False,
+    }
@@ -0,0 +1,541 @@
+"""Test the Bird Buddy data update coordinator."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.client import BirdBuddy
+from birdbuddy.exceptions import AuthenticationFailedError, NoResponseError
+from birdbuddy.feed import Feed, FeedNode
+from birdbuddy.media import Media
+from birdbuddy.sightings import PostcardSighting
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import homeassistant.util.dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+)
+
+from custom_components.birdbuddy.circuit import CircuitState
+from custom_components.birdbuddy.const import (
+    CONF_COMPACT_EVENTS,
+    CONF_INDEX_NEW_POSTCARDS,
+    DOMAIN,
+    EVENT_NEW_POSTCARD_SIGHTING,
+    METADATA_REFRESH_INTERVAL,
+    POLLING_INTERVAL,
+    STORAGE_SAVE_DELAY,
+    VISITOR_REVALIDATE_DELAY,
+)
+from custom_components.birdbuddy.coordinator import BirdBuddyDataUpdateCoordinator
+from custom_components.birdbuddy.device import BirdBuddyDevice
+
+
+def _page(node_ids: list[str], end_cursor: str | None) -> Feed:
+    return Feed(
+        {
+            "edges": [
+                {
+                    "cursor": node_id,
+                    "node": {
+                        "__typename": "FeedItemNewPostcard",
+                        "id": node_id,
+                        "createdAt": f"2024-05-01T10:{node_id}:00.000Z",
+                    },
+                }
+                for node_id in node_ids
+            ],
+            "pageInfo": {
+                "hasNextPage": end_cursor is not None,
+                "endCursor": end_cursor,
+            },
+        }
+    )
+
+
+def _coordinator(hass: HomeAssistant, pages: list[Feed], options: dict | None = None):
+    entry = MockConfigEntry(domain=DOMAIN, data={}, options=options or {})
+    entry.add_to_hass(hass)
+    client = MagicMock()
+    client.feed = AsyncMock(side_effect=pages)
+    # Serialized to the Store
+    client.user = None
+    client._refresh_token = None
+    return BirdBuddyDataUpdateCoordinator(hass, client, entry), client
+
+
+async def test_feed_first_page_only_without_high_water(hass: HomeAssistant) -> None:
+    """Test the first sync does not walk the whole Feed history."""
+    coordinator, client = _coordinator(hass, [_page(["50", "40"], "40")])
+
+    nodes = [n.node_id async for n in coordinator._async_iter_new_feed()]
+    coordinator._async_commit_feed()
+
+    assert nodes == ["50", "40"]
+    assert client.feed.await_count == 1
+    assert coordinator.feed_high_water == datetime(
+        2024, 5, 1, 10, 50, tzinfo=timezone.utc
+    )
+
+
+async def test_feed_pages_back_to_high_water(hass: HomeAssistant) -> None:
+    """Test every node newer than the high-water mark is yielded, across pages."""
+    coordinator, client = _coordinator(
+        hass,
+        [_page(["59", "55"], "55"), _page(["45", "30"], "30"), _page(["20"], None)],
+    )
+    coordinator.feed_high_water = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc)
+
+    nodes = [n.node_id async for n in coordinator._async_iter_new_feed()]
+    coordinator._async_commit_feed()
+
+    assert nodes == ["59", "55", "45"]
+    assert client.feed.await_count == 2
+    assert client.feed.await_args.kwargs["after"] == "55"
+    assert coordinator.feed_high_water.minute == 59
+
+
+async def test_feed_walk_resumes_after_max_pages(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test nodes past the page limit are read at the next update, not skipped."""
+    monkeypatch.setattr("custom_components.birdbuddy.coordinator.FEED_MAX_PAGES", 1)
+    coordinator, client = _coordinator(hass, [_page(["50", "45"], "45")])
+    mark = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc)
+    coordinator.feed_high_water = mark
+
+    nodes = [n.node_id async for n in coordinator._async_iter_new_feed()]
+    coordinator._async_commit_feed()
+    assert nodes == ["50", "45"]
+    # The mark does not move past the unread nodes
+    assert coordinator.feed_high_water == mark
+    assert coordinator._state_to_store()["feed_resumes"][0]["cursor"] == "45"
+
+    # Next update: the new node, then the rest of the interrupted walk
+    client.feed.side_effect = [_page(["55", "50"], "50"), _page(["40", "30"], "30")]
+    nodes = [n.node_id async for n in coordinator._async_iter_new_feed()]
+    coordinator._async_commit_feed()
+    assert nodes == ["55", "40"]
+    assert client.feed.await_args.kwargs["after"] == "45"
+    assert coordinator.feed_high_water.minute == 55
+    assert coordinator._state_to_store()["feed_resumes"] == []
+
+
+async def test_feed_walk_resumes_nested(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a walk interrupted while resuming another one does not skip the older."""
+    monkeypatch.setattr("custom_components.birdbuddy.coordinator.FEED_MAX_PAGES", 1)
+    coordinator, client = _coordinator(hass, [])
+    mark = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc)
+    coordinator.feed_high_water = mark
+
+    async def _update(pages: list[Feed]) -> list[str]:
+        client.feed.side_effect = pages
+        nodes = [n.node_id async for n in coordinator._async_iter_new_feed()]
+        coordinator._async_commit_feed()
+        return nodes
+
+    assert await _update([_page(["50", "45"], "45")]) == ["50", "45"]
+    # Again more than a page of new nodes: both walks are resumed later
+    assert await _update([_page(["58", "56"], "56")]) == ["58", "56"]
+    assert [r["cursor"] for r in coordinator._state_to_store()["feed_resumes"]] == [
+        "45",
+        "56",
+    ]
+    assert coordinator.feed_high_water == mark
+
+    # The latest interrupted walk first, down to where the older one started
+    assert await _update([_page(["59", "58"], "58"), _page(["55", "50"], "50")]) == [
+        "59",
+        "55",
+    ]
+    assert client.feed.await_args.kwargs["after"] == "56"
+    assert coordinator.feed_high_water == mark
+
+    assert await _update([_page(["59", "58"], "58"), _page(["40", "30"], "30")]) == [
+        "40"
+    ]
+    assert client.feed.await_args.kwargs["after"] == "45"
+    assert coordinator.feed_high_water.minute == 59
+    assert coordinator._state_to_store()["feed_resumes"] == []
+
+
+async def test_feed_resume_restored(hass: HomeAssistant, hass_storage) -> None:
+    """Test the interrupted walk stored by earlier versions is resumed."""
+    coordinator, _ = _coordinator(hass, [])
+    hass_storage[f"{DOMAIN}.{coordinator.config_entry.entry_id}"] = {
+        "version": 1,
+        "data": {
+            "feed_high_water": "2024-05-01T10:30:00+00:00",
+            "feed_resume": {"cursor": "45", "newest": "2024-05-01T10:50:00+00:00"},
+        },
+    }
+
+    await coordinator.async_load_state()
+
+    assert coordinator._state_to_store()["feed_resumes"] == [
+        {"cursor": "45", "newest": "2024-05-01T10:50:00+00:00"}
+    ]
+
+
+async def test_feed_mark_kept_when_postcards_fail(hass: HomeAssistant) -> None:
+    """Test new postcards are not skipped when processing them fails."""
+    coordinator, client = _coordinator(hass, [_page(["50", "40"], None)])
+    mark = datetime(2024, 5, 1, 10, 30, tzinfo=timezone.utc)
+    coordinator.feed_high_water = mark
+    client.sighting_from_postcard = AsyncMock(side_effect=NoResponseError)
+    hass.bus.async_listen(EVENT_NEW_POSTCARD_SIGHTING, MagicMock())
+
+    with pytest.raises(NoResponseError):
+        await coordinator._process_feed()
+
+    # Both postcards are read again at the next update
+    assert coordinator.feed_high_water == mark
+    assert coordinator._state_to_store()["feed_high_water"] == mark.isoformat()
+
+
+async def test_circuit_serves_stale_snapshot(hass: HomeAssistant) -> None:
+    """Test a failing API backs off, and the last snapshot is served meanwhile."""
+    coordinator, client = _coordinator(hass, [])
+    client.refresh = AsyncMock(side_effect=NoResponseError)
+    feeder = {"id": "feeder", "name": "Feeder"}
+
+    # Nothing to serve yet
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+    assert coordinator.circuit.state == CircuitState.OPEN
+    # Even the first backoff skips the next scheduled poll
+    assert coordinator.circuit.retry_at - dt_util.utcnow() > POLLING_INTERVAL * 0.99
+
+    coordinator.feeders = {"feeder": BirdBuddyDevice(feeder)}
+    coordinator.circuit.retry_at = dt_util.utcnow() - timedelta(seconds=1)
+    assert coordinator.circuit.state == CircuitState.HALF_OPEN
+    # The probe fails again: the backoff grows
+    assert await coordinator._async_update_data() is coordinator.client
+    assert coordinator.stale
+    assert coordinator.circuit.failures == 2
+    backoff = coordinator.circuit.retry_at - dt_util.utcnow()
+    assert POLLING_INTERVAL * 1.9 <= backoff <= POLLING_INTERVAL * 4
+
+    # While open, no requests are made
+    await coordinator._async_update_data()
+    assert client.refresh.await_count == 2
+
+    coordinator.circuit.retry_at = dt_util.utcnow() - timedelta(seconds=1)
+    client.refresh = AsyncMock()
+    client.feeders = {"feeder": feeder}
+    await coordinator._async_update_data()
+    assert not coordinator.stale
+    assert coordinator.circuit.state == CircuitState.CLOSED
+    assert coordinator.circuit.retry_at is None
+
+
+async def test_feeder_listeners(hass: HomeAssistant) -> None:
+    """Test feeder listeners are only notified of changes to their feeder."""
+    coordinator, _ = _coordinator(hass, [])
+    one, two, everyone = MagicMock(), MagicMock(), MagicMock()
+    remove_one = coordinator.async_add_feeder_listener("one", one)
+    coordinator.async_add_feeder_listener("two", two)
+    remove_everyone = coordinator.async_add_listener(everyone)
+
+    coordinator.async_update_feeder_listeners("one")
+    assert one.call_count == 1
+    assert two.call_count == 0
+    assert everyone.call_count == 0
+
+    remove_one()
+    coordinator.async_update_feeder_listeners("one")
+    assert one.call_count == 1
+    remove_everyone()
+
+
+async def test_compact_postcard_event(hass: HomeAssistant) -> None:
+    """Test the compact event payload, and collecting the postcard from it."""
+    coordinator, client = _coordinator(hass, [], {CONF_COMPACT_EVENTS: True})
+    sighting = PostcardSighting(
+        {
+            "feeder": {"id": "feeder", "name": "Feeder"},
+            "medias": [{"id": "media", "contentUrl": "https://example/signed"}],
+            "sightingReport": {
+                "sightings": [
+                    {
+                        "__typename": "SightingRecognizedBird",
+                        "species": {"id": "species", "name": "Northern Cardinal"},
+                    }
+                ]
+            },
+        }
+    )
+    client.sighting_from_postcard = AsyncMock(return_value=sighting)
+    client.finish_postcard = AsyncMock(return_value=True)
+    events = async_capture_events(hass, EVENT_NEW_POSTCARD_SIGHTING)
+
+    await coordinator._process_postcards(
+        [
+            FeedNode(
+                {
+                    "__typename": "FeedItemNewPostcard",
+                    "id": "postcard",
+                    "createdAt": "2024-05-01T10:00:00.000Z",
+                }
+            )
+        ]
+    )
+    await hass.async_block_till_done()
+
+    assert events[0].data == {
+        "compact": True,
+        "postcard": {"id": "postcard", "createdAt": "2024-05-01T10:00:00.000Z"},
+        "sighting": {
+            "feeder": {"id": "feeder", "name": "Feeder"},
+            "species": {"id": "species", "name": "Northern Cardinal"},
+            "confidence": 100,
+            "recognized": True,
+            "unlocked": False,
+            "thumbnail": "media",
+        },
+    }
+
+    assert await coordinator.handle_collect_postcard(events[0].data)
+    assert client.finish_postcard.await_args.args[1] is sighting
+    client.sighting_from_postcard.assert_awaited_once()
+
+    # An older postcard is not converted again: that would change it on the server
+    with pytest.raises(HomeAssistantError):
+        await coordinator.async_get_sighting("older")
+    client.sighting_from_postcard.assert_awaited_once()
+
+
+async def test_postcard_indexed_without_listeners(hass: HomeAssistant) -> None:
+    """Test new postcards are only read for the index if asked to."""
+    coordinator, client = _coordinator(hass, [])
+    coordinator.index = MagicMock()
+    coordinator.index.async_add = AsyncMock()
+    client.sighting_from_postcard = AsyncMock(
+        return_value=PostcardSighting(
+            {
+                "feeder": {"id": "feeder", "name": "Feeder"},
+                "medias": [{"id": "media"}],
+                "sightingReport": {"sightings": []},
+            }
+        )
+    )
+    assert not hass.bus.async_listeners().get(EVENT_NEW_POSTCARD_SIGHTING)
+    postcards = [
+        FeedNode(
+            {
+                "__typename": "FeedItemNewPostcard",
+                "id": "postcard",
+                "createdAt": "2024-05-01T10:00:00.000Z",
+            }
+        )
+    ]
+
+    await coordinator._process_postcards(postcards)
+
+    # Reading the sighting would change the postcard on the server
+    client.sighting_from_postcard.assert_not_awaited()
+    coordinator.index.async_add.assert_not_awaited()
+
+    hass.config_entries.async_update_entry(
+        coordinator.config_entry, options={CONF_INDEX_NEW_POSTCARDS: True}
+    )
+    await coordinator._process_postcards(postcards)
+
+    [indexed] = coordinator.index.async_add.await_args.args[1]
+    assert indexed.postcard_id == "postcard"
+
+
+async def test_seed_media_index(hass: HomeAssistant) -> None:
+    """Test the media index is filled from the Feed and the collections."""
+    url = "https://media.example/feeder/{}.jpg?Expires=1"
+    coordinator, client = _coordinator(
+        hass,
+        [
+            Feed(
+                {
+                    "edges": [
+                        {
+                            "node": {
+                                "__typename": "FeedItemSpeciesSighting",
+                                "id": "node",
+                                "createdAt": "2024-05-01T10:00:00.000Z",
+                                "media": {
+                                    "__typename": "MediaImage",
+                                    "id": "from-feed",
+                                    "thumbnailUrl": url.format("from-feed"),
+                                },
+                            }
+                        }
+                    ]
+                }
+            )
+        ],
+    )
+    coordinator.feeders = {"feeder": MagicMock()}
+    coordinator.collections = {"jay": MagicMock(collection_id="jay")}
+    coordinator.collections["jay"].bird_name = "Blue Jay"
+    client.collection = AsyncMock(
+        return_value={
+            "collected": Media(
+                {
+                    "__typename": "MediaImage",
+                    "id": "collected",
+                    "createdAt": "2024-04-01T10:00:00.000Z",
+                    "thumbnailUrl": url.format("collected"),
+                }
+            )
+        }
+    )
+
+    await coordinator.async_seed_media_index()
+
+    assert coordinator.media_index.get("from-feed").feeder_id == "feeder"
+    assert coordinator.media_index.get("collected").species_name == "Blue Jay"
+    client.collection.assert_awaited_once_with("jay")
+
+    # Browsed again: nothing is requested again
+    await coordinator.async_seed_media_index()
+    client.feed.assert_awaited_once()
+    client.collection.assert_awaited_once()
+
+
+async def test_recent_visitors_restored(hass: HomeAssistant, hass_storage) -> None:
+    """Test the latest visitor is restored at once, and revalidated later."""
+    media = {
+        "__typename": "MediaImage",
+        "id": "media",
+        "createdAt": "2024-05-01T10:00:00.000Z",
+        "contentUrl": "https://media.example/media.jpg?Expires=1",
+        "thumbnailUrl": "https://media.example/media.jpg?Expires=1",
+    }
+    species = {"id": "cardinal", "name": "Northern Cardinal"}
+    coordinator, client = _coordinator(hass, [Feed({"edges": []})])
+    client.refresh_collections = AsyncMock(return_value={})
+    hass_storage[f"{DOMAIN}.{coordinator.config_entry.entry_id}"] = {
+        "version": 1,
+        "data": {"visitors": {"feeder": {"media": media, "species": species}}},
+    }
+    await coordinator.async_load_state()
+    feeder = BirdBuddyDevice({"id": "feeder", "name": "Feeder"})
+    seen = []
+
+    remove = coordinator.add_visitor_listener(feeder, seen.append)
+    # Restored without any API call, even though the signed URL is expired
+    assert seen[0].latest_species.name == "Northern Cardinal"
+    assert seen[0].latest_media.id == "media"
+    await hass.async_block_till_done()
+    client.feed.assert_not_awaited()
+
+    async_fire_time_changed(hass, dt_util.utcnow() + VISITOR_REVALIDATE_DELAY)
+    await hass.async_block_till_done()
+    client.feed.assert_awaited_once()
+    # Nothing newer in the Feed: the restored species is kept
+    client.refresh_collections.assert_not_awaited()
+    assert seen[-1].latest_species.name == "Northern Cardinal"
+
+    async_fire_time_changed(
+        hass,
+        dt_util.utcnow()
+        + VISITOR_REVALIDATE_DELAY
+        + timedelta(seconds=STORAGE_SAVE_DELAY + 1),
+    )
+    await hass.async_block_till_done()
+    stored = hass_storage[f"{DOMAIN}.{coordinator.config_entry.entry_id}"]["data"]
+    assert stored["visitors"]["feeder"]["species"] == species
+    remove()
+
+
+async def test_probe_skips_unchanged_refresh(hass: HomeAssistant) -> None:
+    """Test polls refresh only what the probe sees changed."""
+    coordinator, client = _coordinator(hass, [_page([], None)] * 3)
+    client.refresh = AsyncMock(return_value=True)
+    client.feeders = {"feeder": {"id": "feeder", "name": "Feeder"}}
+    client.user = None
+    client._refresh_token = None
+    probed = {
+        "me": {
+            "feed": {"edges": []},
+            "feeders": [{"id": "feeder", "battery": {"percentage": 80}}],
+        }
+    }
+    client._make_request = AsyncMock(return_value=probed)
+
+    # First update: full refresh, without the Feed
+    await coordinator._async_update_data()
+    assert client.refresh.await_count == 1
+    assert client._make_request.await_count == 0
+    # First probe: the Feed is processed, the feeders are updated from the probe
+    await coordinator._async_update_data()
+    assert client.feed.await_count == 1
+    assert coordinator.feeders["feeder"]["battery"] == {"percentage": 80}
+    # Nothing changed
+    await coordinator._async_update_data()
+    assert client.feed.await_count == 1
+
+    probed["me"]["feeders"][0]["battery"] = {"percentage": 70}
+    await coordinator._async_update_data()
+    assert coordinator.feeders["feeder"]["battery"] == {"percentage": 70}
+    assert coordinator.feeders["feeder"].name == "Feeder"
+    assert client.feed.await_count == 1
+
+    probed["me"]["feed"]["edges"].append({"node": {"id": "new"}})
+    await coordinator._async_update_data()
+    assert client.feed.await_count == 2
+    assert client.refresh.await_count == 1
+
+    # The metadata is refreshed at a slower cadence
+    coordinator.last_full_refresh -= METADATA_REFRESH_INTERVAL
+    await coordinator._async_update_data()
+    assert client.refresh.await_count == 2
+    assert client.feed.await_count == 2
+
+    assert coordinator.probe.as_dict()["hit_rate"] == 2 / 5
+    assert coordinator.metrics.operations["probe"].count == 5
+
+
+async def test_session_resumed(hass: HomeAssistant, hass_storage) -> None:
+    """Test the stored session is resumed, or else signed in again."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "version": 1,
+        "key": f"{DOMAIN}.{entry.entry_id}",
+        "data": {"refresh_token": "stored"},
+    }
+    client = BirdBuddy("test@email", "passw0rd", refresh_token="from-entry")
+    coordinator = BirdBuddyDataUpdateCoordinator(hass, client, entry)
+    await coordinator.async_load_state()
+    assert client._refresh_token == "stored"
+
+    async def expired() -> bool:
+        client._refresh_token = None
+        raise AuthenticationFailedError("expired")
+
+    async def sign_in() -> bool:
+        client._access_token = "access"
+        client._refresh_token = "new"
+        return True
+
+    client._refresh_access_token = AsyncMock(side_effect=expired)
+    client._login = AsyncMock(side_effect=sign_in)
+    client.graphql.execute_async = AsyncMock(
+        return_value={
+            "data": {
+                "me": {
+                    "user": {"id": "user", "name": "User"},
+                    "feeders": [{"id": "feeder", "name": "Feeder"}],
+                }
+            }
+        }
+    )
+
+    await coordinator._async_full_refresh()
+    client._refresh_access_token.assert_awaited_once()
+    client._login.assert_awaited_once()
+    assert coordinator.feeders["feeder"].name == "Feeder"
+    assert coordinator._state_to_store()["refresh_token"] == "new"
@@ -20,7 +20,7 @@ from custom_components.birdbuddy import device_trigger
 from custom_components.birdbuddy.const import EVENT_NEW_POSTCARD_SIGHTING
 
 
-async def setup_automation(hass, device_id, feeder_id, trigger_type):
+async def setup_automation(hass, device_id, feeder_id, trigger_type, **extra):
     """Set up an automation trigger for testing triggering."""
     return await async_setup_component(
         hass,
@@ -34,6 +34,7 @@ async def setup_automation(hass, device_id, feeder_id, trigger_type):
                         "device_id": device_id,
                         "feeder_id": feeder_id,
                         "type": trigger_type,
+                        **extra,
                     },
                     "action": {
                         "service": "test.automation",
@@ -59,12 +60,18 @@ async def test_get_triggers(
         {
             "platform": "device",
             "domain": DOMAIN,
-            "type": "new_postcard",
+            "type": trigger_type,
             "device_id": device_entry.id,
             "feeder_id": "feeder1",
             # We didn't add this, but the test produces it
             "metadata": {},
-        },
+        }
+        for trigger_type in (
+            "new_postcard",
+            "species_seen",
+            "species_unlocked",
+            "unrecognized_visitor",
+        )
     ]
     triggers = await async_get_device_automations(
         hass, DeviceAutomationType.TRIGGER, device_entry.id
@@ -103,6 +110,100 @@ async def test_does_not_fire_on_postcard_event_for_other_feeder(hass, calls):
     assert len(calls) == 0
 
 
+def _report(*sightings):
+    return {"sightingReport": {"sightings": list(sightings)}}
+
+
+@pytest.mark.parametrize(
+    ("trigger_type", "extra", "sighting", "fires"),
+    [
+        (
+            "species_seen",
+            {"species": "northern cardinal"},
+            _report(
+                {
+                    "__typename": "SightingRecognizedBird",
+                    "species": {"id": "cardinal", "name": "Northern Cardinal"},
+                }
+            ),
+            True,
+        ),
+        (
+            "species_seen",
+            {"species": "blue jay"},
+            _report(
+                {
+                    "__typename": "SightingRecognizedBird",
+                    "species": {"id": "cardinal", "name": "Northern Cardinal"},
+                }
+            ),
+            False,
+        ),
+        (
+            "species_seen",
+            {"species": "cardinal"},
+            {"species": {"id": "cardinal"}, "recognized": True, "compact": True},
+            True,
+        ),
+        (
+            "species_unlocked",
+            {},
+            _report(
+                {
+                    "__typename": "SightingRecognizedBirdUnlocked",
+                    "species": {"id": "cardinal", "name": "Northern Cardinal"},
+                }
+            ),
+            True,
+        ),
+        (
+            "species_unlocked",
+            {},
+            _report({"__typename": "SightingRecognizedBird", "species": {}}),
+            False,
+        ),
+        (
+            "unrecognized_visitor",
+            {},
+            _report({"__typename": "SightingCantDecideWhichBird"}),
+            True,
+        ),
+        (
+            "unrecognized_visitor",
+            {},
+            _report({"__typename": "SightingRecognizedBird", "species": {}}),
+            False,
+        ),
+        # Without a report, whether it was recognized is not known
+        ("unrecognized_visitor", {}, {}, False),
+    ],
+)
+async def test_fires_on_matching_postcards(
+    hass,
+    device_reg: device_registry.DeviceRegistry,
+    calls,
+    trigger_type,
+    extra,
+    sighting,
+    fires,
+):
+    """Test the species, unlocked and unrecognized triggers."""
+    config_entry = MockConfigEntry(domain="birdbuddy", data={})
+    config_entry.add_to_hass(hass)
+    device_entry = device_reg.async_get_or_create(
+        config_entry_id=config_entry.entry_id,
+        identifiers={(DOMAIN, "feeder1")},
+    )
+    assert await setup_automation(
+        hass, device_entry.id, "feeder1", trigger_type, **extra
+    )
+
+    message = {"sighting": {"feeder": {"id": "feeder1"}, **sighting}, "postcard": {}}
+    hass.bus.async_fire(EVENT_NEW_POSTCARD_SIGHTING, message)
+    await hass.async_block_till_done()
+    assert len(calls) == (1 if fires else 0)
+
+
 async def test_config_schema(hass, device_reg):
     """Test we get the expected triggers from a birdbuddy."""
     config_entry = MockConfigEntry(domain="birdbuddy", data={}, state=ConfigEntryState.LOADED)
@@ -0,0 +1,60 @@
+"""Test the Bird Buddy diagnostics."""
+
+from unittest.mock import MagicMock
+
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.birdbuddy.const import CONF_REFRESH_TOKEN, DOMAIN
+from custom_components.birdbuddy.coordinator import BirdBuddyDataUpdateCoordinator
+from custom_components.birdbuddy.device import BirdBuddyDevice
+from custom_components.birdbuddy.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+async def test_diagnostics_redacted(hass: HomeAssistant) -> None:
+    """Test the credentials and personal data of the account are redacted."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_EMAIL: "test@email",
+            CONF_PASSWORD: "passw0rd",
+            CONF_REFRESH_TOKEN: "token",
+        },
+    )
+    entry.add_to_hass(hass)
+    client = MagicMock()
+    client.user = None
+    client._refresh_token = None
+    coordinator = BirdBuddyDataUpdateCoordinator(hass, client, entry)
+    data = {
+        "id": "feeder",
+        "name": "Feeder",
+        "serialNumber": "BB123456",
+        "members": [{"memberName": "Member", "memberEmail": "member@email"}],
+    }
+    coordinator.feeders = {
+        "feeder": BirdBuddyDevice(data),
+        # As the API returns it, in case the members are ever kept
+        "raw": MagicMock(data=data),
+    }
+    hass.data[DOMAIN] = {entry.entry_id: coordinator}
+
+    result = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert result["entry"]["data"] == {
+        CONF_EMAIL: REDACTED,
+        CONF_PASSWORD: REDACTED,
+        CONF_REFRESH_TOKEN: REDACTED,
+    }
+    feeder = result["feeders"]["feeder"]
+    assert feeder["name"] == "Feeder"
+    assert feeder["serialNumber"] == REDACTED
+    assert "members" not in feeder
+    raw = result["feeders"]["raw"]
+    assert raw["serialNumber"] == REDACTED
+    assert raw["members"] == [{"memberName": "Member", "memberEmail": REDACTED}]
+    assert result["api"]["operations"] == {}
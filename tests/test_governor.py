@@ -0,0 +1,76 @@
+"""Test the Bird Buddy API governor."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from custom_components.birdbuddy.governor import (
+    ApiGovernor,
+    ApiPriority,
+    api_priority,
+    priority_for,
+)
+from custom_components.birdbuddy.metrics import ApiMetrics, InstrumentedClient
+
+
+async def test_burst_then_priority_order() -> None:
+    """Test requests over the burst are throttled and served highest priority first."""
+    governor = ApiGovernor(rate=100, burst=1)
+    served = []
+
+    async def request(priority: ApiPriority) -> None:
+        await governor.acquire(priority)
+        served.append(priority)
+
+    # Uses up the only token
+    await request(ApiPriority.NORMAL)
+    await asyncio.gather(
+        request(ApiPriority.LOW),
+        request(ApiPriority.NORMAL),
+        request(ApiPriority.HIGH),
+    )
+
+    assert served == [
+        ApiPriority.NORMAL,
+        ApiPriority.HIGH,
+        ApiPriority.NORMAL,
+        ApiPriority.LOW,
+    ]
+    stats = governor.as_dict()
+    assert stats["waiting"] == 0
+    assert stats["priorities"]["normal"] == {
+        "requests": 2,
+        "throttled": 1,
+        "wait_time": stats["priorities"]["normal"]["wait_time"],
+    }
+    assert stats["priorities"]["low"]["throttled"] == 1
+    assert stats["max_wait"] > 0
+
+
+async def test_cancelled_waiter_is_skipped() -> None:
+    """Test a request cancelled while waiting does not use up a token."""
+    governor = ApiGovernor(rate=100, burst=1)
+    await governor.acquire()
+
+    waiter = asyncio.ensure_future(governor.acquire(ApiPriority.HIGH))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.wait_for(governor.acquire(ApiPriority.LOW), 1)
+
+    assert governor.as_dict()["waiting"] == 0
+
+
+async def test_client_priorities() -> None:
+    """Test API calls are governed at the operation or context priority."""
+    assert priority_for("finish_postcard") == ApiPriority.HIGH
+    assert priority_for("refresh") == ApiPriority.NORMAL
+    with api_priority(ApiPriority.LOW):
+        assert priority_for("finish_postcard") == ApiPriority.LOW
+
+    client = MagicMock()
+    client.refresh = AsyncMock(return_value=True)
+    governor = MagicMock(acquire=AsyncMock())
+    instrumented = InstrumentedClient(client, ApiMetrics(), governor)
+
+    with api_priority(ApiPriority.LOW):
+        await instrumented.refresh()
+    governor.acquire.assert_awaited_once_with(ApiPriority.LOW)
@@ -0,0 +1,76 @@
+"""Test the import-time budget of the Bird Buddy integration."""
+
+import json
+import logging
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+# Maximum time and number of new modules for `import custom_components.birdbuddy`,
+# on top of the Home Assistant modules that are already loaded at boot.
+IMPORT_TIME_BUDGET = 0.5
+IMPORT_MODULE_BUDGET = 8
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wall-clock limits depend on the machine: only checked on request
+benchmark = pytest.mark.skipif(
+    not os.environ.get("BIRDBUDDY_BENCHMARK"),
+    reason="benchmark: set BIRDBUDDY_BENCHMARK=1 to run",
+)
+
+_MEASURE = """
+import json, sys, time
+import homeassistant.config_entries
+import homeassistant.core
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.device_registry
+import homeassistant.helpers.importlib
+import homeassistant.helpers.storage
+
+before = set(sys.modules)
+start = time.perf_counter()
+import custom_components.birdbuddy
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "modules": sorted(set(sys.modules) - before)}))
+"""
+
+
+def _measure_import() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+        text=True,
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_import_budget() -> None:
+    """Test the integration imports only a few modules, not the client or platforms."""
+    modules = _measure_import()["modules"]
+
+    assert len(modules) <= IMPORT_MODULE_BUDGET, modules
+    # Loaded only when a config entry is set up, or when the feature is first used
+    for lazy in [
+        "birdbuddy.client",
+        "custom_components.birdbuddy.coordinator",
+        "custom_components.birdbuddy.media_source",
+        "custom_components.birdbuddy.statistics",
+        "custom_components.birdbuddy.update",
+        "custom_components.birdbuddy.visitors",
+    ]:
+        assert lazy not in modules
+
+
+@benchmark
+def test_benchmark_import_time() -> None:
+    """Benchmark importing the integration at boot."""
+    elapsed = _measure_import()["elapsed"]
+
+    _LOGGER.info("import: %.1f ms", elapsed * 1e3)
+    assert elapsed < IMPORT_TIME_BUDGET
@@ -1,15 +1,19 @@
 """Test component setup."""
+from datetime import timedelta
 from unittest.mock import patch, PropertyMock
 
 import pytest
+from birdbuddy.feed import Feed
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.core import HomeAssistant
 from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
 from pytest_homeassistant_custom_component.common import (
     MockConfigEntry,
+    async_fire_time_changed,
 )
 
-from custom_components.birdbuddy.const import DOMAIN
+from custom_components.birdbuddy.const import DOMAIN, PUSH_REFRESH_COOLDOWN
 
 
 @pytest.fixture(name="expected_lingering_timers")
@@ -37,6 +41,12 @@ async def test_setup_entry(hass: HomeAssistant):
     ), patch(
         "birdbuddy.client.BirdBuddy.refresh_feed",
         return_value=[],
+    ), patch(
+        "birdbuddy.client.BirdBuddy.feed",
+        return_value=Feed({}),
+    ), patch(
+        "birdbuddy.client.BirdBuddy.refresh_collections",
+        return_value={},
     ), patch(
         "birdbuddy.client.BirdBuddy.feeders",
         new_callable=PropertyMock,
@@ -78,3 +88,88 @@ async def test_setup_entry_refresh_fails(hass: HomeAssistant):
     ):
         # Raises UpdateFailed -> return False
         assert not await hass.config_entries.async_setup(config_entry.entry_id)
+
+
+async def test_setup_entry_from_snapshot(hass: HomeAssistant, hass_storage):
+    config = {
+        "email": "test@email.com",
+        "password": "test-password",
+    }
+    config_entry = MockConfigEntry(domain="birdbuddy", data=config, state=ConfigEntryState.NOT_LOADED)
+    config_entry.add_to_hass(hass)
+    hass_storage[f"{DOMAIN}.{config_entry.entry_id}"] = {
+        "version": 1,
+        "data": {
+            "feed_high_water": None,
+            "user": {"name": "Test User"},
+            "feeders": {"feeder1": {"id": "feeder1", "name": "Test Feeder"}},
+        },
+    }
+
+    with patch(
+        "birdbuddy.client.BirdBuddy.refresh",
+        side_effect=Exception,
+    ), patch(
+        "birdbuddy.client.BirdBuddy.feed",
+        side_effect=Exception,
+    ):
+        # The cloud is unreachable, but entities are created from the snapshot
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    assert list(coordinator.feeders) == ["feeder1"]
+    assert coordinator.stale
+    state = hass.states.get("binary_sensor.test_feeder_charging")
+    assert state
+    assert state.attributes["stale"] is True
+
+
+async def test_webhook_requests_refresh(hass: HomeAssistant, hass_client_no_auth):
+    """Test a POST to the account's webhook refreshes it, debounced."""
+    config_entry = MockConfigEntry(
+        domain="birdbuddy",
+        data={"email": "test@email.com", "password": "test-password"},
+    )
+    config_entry.add_to_hass(hass)
+
+    with patch(
+        "birdbuddy.client.BirdBuddy.refresh",
+        return_value=True,
+    ) as refresh, patch(
+        "birdbuddy.client.BirdBuddy.feed",
+        return_value=Feed({}),
+    ), patch(
+        "birdbuddy.client.BirdBuddy.refresh_collections",
+        return_value={},
+    ), patch(
+        "birdbuddy.client.BirdBuddy._make_request",
+        side_effect=Exception,
+    ), patch(
+        "birdbuddy.client.BirdBuddy.feeders",
+        new_callable=PropertyMock,
+        return_value={"feeder1": {"id": "feeder1", "name": "Test Feeder"}},
+    ):
+        # The webhook integration is set up as a dependency
+        assert await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+        webhook_id = hass.data[DOMAIN][config_entry.entry_id].async_get_webhook_id()
+        http = await hass_client_no_auth()
+        refreshes = refresh.await_count
+
+        assert (await http.post(f"/api/webhook/{webhook_id}")).status == 200
+        assert (await http.post(f"/api/webhook/{webhook_id}")).status == 200
+        await hass.async_block_till_done()
+        # The second request waits for the cooldown
+        assert refresh.await_count == refreshes + 1
+
+        async_fire_time_changed(
+            hass, dt_util.utcnow() + timedelta(seconds=PUSH_REFRESH_COOLDOWN + 1)
+        )
+        await hass.async_block_till_done()
+        assert refresh.await_count == refreshes + 2
+
+        assert await hass.config_entries.async_unload(config_entry.entry_id)
+        await http.post(f"/api/webhook/{webhook_id}")
+        await hass.async_block_till_done()
+        assert refresh.await_count == refreshes + 2
@@ -0,0 +1,304 @@
+"""Test the media source with a large synthetic account."""
+
+from datetime import timedelta
+import gc
+import json
+import logging
+import os
+import time
+import tracemalloc
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.feed import FeedNode
+from birdbuddy.media import Collection, Media
+from homeassistant.components.media_source.models import MediaSourceItem
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.birdbuddy.const import DOMAIN
+from custom_components.birdbuddy.media_index import MediaIndex
+from custom_components.birdbuddy.media_source import (
+    BirdBuddyMediaSource,
+    _best_timedelta_title,
+)
+from custom_components.birdbuddy.snapshots import CollectionSummary, MediaRef
+
+SPECIES = 300
+MEDIAS = 3000
+# Far in the future: the signed URLs never expire during the test
+EXPIRES = 4102444800
+FEEDERS = ("front", "back")
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wall-clock limits depend on the machine: only checked on request
+benchmark = pytest.mark.skipif(
+    not os.environ.get("BIRDBUDDY_BENCHMARK"),
+    reason="benchmark: set BIRDBUDDY_BENCHMARK=1 to run",
+)
+
+
+def _media(media_id: str, created_at: str, feeder_id: str = "front") -> dict:
+    url = (
+        f"https://media.example/{feeder_id}/{media_id}.jpg"
+        f"?Expires={EXPIRES}&Signature={'x' * 300}"
+    )
+    return {
+        "__typename": "MediaVideo" if media_id.endswith("7") else "MediaImage",
+        "id": media_id,
+        "createdAt": created_at,
+        "contentUrl": url,
+        "thumbnailUrl": url + "&thumb",
+    }
+
+
+def _collection(index: int) -> dict:
+    return {
+        "__typename": "CollectionBird",
+        "id": f"collection-{index}",
+        "species": {"id": f"species-{index}", "name": f"Species {index}"},
+        "coverCollectionMedia": {
+            "id": f"cover-{index}",
+            "media": _media(f"cover-{index}", _iso(0)),
+        },
+        "markedAsNew": False,
+        "visitsAllTime": MEDIAS,
+    }
+
+
+def _iso(minutes: int) -> str:
+    created_at = dt_util.utcnow() - timedelta(minutes=minutes)
+    return created_at.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def _client() -> MagicMock:
+    # Spread over 2 years, to go through every kind of title
+    response = json.dumps(
+        {
+            f"media-{i}": _media(f"media-{i}", _iso(i * 350), FEEDERS[i % 2])
+            for i in range(MEDIAS)
+        }
+    )
+    client = MagicMock()
+    # Decoded on each request, like the real client
+    client.collection = AsyncMock(
+        side_effect=lambda _: {k: Media(v) for k, v in json.loads(response).items()}
+    )
+    return client
+
+
+async def _setup(hass: HomeAssistant) -> tuple[MockConfigEntry, MagicMock]:
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_EMAIL: "test@email", CONF_PASSWORD: "passw0rd"}
+    )
+    entry.add_to_hass(hass)
+    collections = {
+        f"collection-{i}": CollectionSummary(Collection(_collection(i)))
+        for i in range(SPECIES)
+    }
+    coordinator = MagicMock()
+    coordinator.user = None
+    coordinator.client = _client()
+    coordinator.collections = collections
+    coordinator.async_refresh_collections = AsyncMock(return_value=collections)
+    coordinator.feeders = {}
+    for feeder_id in FEEDERS:
+        coordinator.feeders[feeder_id] = MagicMock()
+        coordinator.feeders[feeder_id].name = feeder_id.title()
+    coordinator.media_index = MediaIndex()
+    coordinator.async_seed_media_index = AsyncMock()
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    return entry, coordinator
+
+
+def _item(hass: HomeAssistant, identifier: str) -> MediaSourceItem:
+    return MediaSourceItem(hass, DOMAIN, identifier, None)
+
+
+async def _measure(coro_factory) -> tuple[object, float, int]:
+    """Run a coroutine, returning its result, duration and peak allocations."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        result = await coro_factory()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, peak
+
+
+async def test_browse_large_account(hass: HomeAssistant) -> None:
+    """Test browsing an account with many species and a large collection."""
+    entry, coordinator = await _setup(hass)
+    source = BirdBuddyMediaSource(hass)
+
+    account = await source.async_browse_media(_item(hass, entry.entry_id))
+    # The "By feeder", "By day" and "By week" trees, then the species
+    assert len(account.children) == SPECIES + 3
+    coordinator.client.collection.assert_not_awaited()
+
+    identifier = f"{entry.entry_id}#collection-1"
+    collection = await source.async_browse_media(_item(hass, identifier))
+    children = collection.children
+    assert len(children) == MEDIAS
+    assert children[0].title.endswith(" ago")
+    assert children[7].media_class == "video"
+    assert children[7].can_play
+    # One request for the whole collection
+    coordinator.client.collection.assert_awaited_once()
+
+
+async def test_resolve_from_large_collection(hass: HomeAssistant) -> None:
+    """Test resolving media of a collection that was just browsed."""
+    entry, coordinator = await _setup(hass)
+    source = BirdBuddyMediaSource(hass)
+    prefix = f"{entry.entry_id}#collection-1"
+    await source.async_browse_media(_item(hass, prefix))
+    requests = coordinator.client.collection.await_count
+
+    resolved = [
+        await source.async_resolve_media(_item(hass, f"{prefix}#media-{i}"))
+        for i in range(0, MEDIAS, 100)
+    ]
+    assert resolved[0].url.startswith("https://media.example/front/media-0.jpg")
+    assert resolved[0].mime_type == "image/jpeg"
+    # The browsed collection is reused: no request per resolved media
+    assert coordinator.client.collection.await_count == requests
+
+    # Media that was never browsed (nor indexed) is looked up
+    coordinator.media_index = MediaIndex()
+    resolved = await source.async_resolve_media(
+        _item(hass, f"{entry.entry_id}#collection-2#media-17")
+    )
+    assert resolved.mime_type == "video/mp4"
+    assert coordinator.client.collection.await_count == requests + 1
+
+
+@benchmark
+async def test_benchmark_browse(hass: HomeAssistant) -> None:
+    """Benchmark browsing and resolving the media of a large collection."""
+    entry, _ = await _setup(hass)
+    source = BirdBuddyMediaSource(hass)
+    prefix = f"{entry.entry_id}#collection-1"
+
+    _, elapsed, _ = await _measure(
+        lambda: source.async_browse_media(_item(hass, entry.entry_id))
+    )
+    _LOGGER.info("account: %.1f ms", elapsed * 1e3)
+    assert elapsed < 0.5
+
+    _, elapsed, peak = await _measure(
+        lambda: source.async_browse_media(_item(hass, prefix))
+    )
+    _LOGGER.info("browse: %.1f ms, peak %.0f B/media", elapsed * 1e3, peak / MEDIAS)
+    assert elapsed < 2.0
+    assert peak / MEDIAS < 8000
+
+    async def _resolve_all():
+        return [
+            await source.async_resolve_media(_item(hass, f"{prefix}#media-{i}"))
+            for i in range(0, MEDIAS, 100)
+        ]
+
+    resolved, elapsed, _ = await _measure(_resolve_all)
+    _LOGGER.info("resolve: %.2f ms/media", elapsed * 1e3 / len(resolved))
+    assert elapsed < 0.5
+
+
+def test_titles() -> None:
+    """Test the relative titles of media items, from minutes to years ago."""
+    now = dt_util.now()
+    titles = [
+        _best_timedelta_title(now - timedelta(minutes=i * 350), now)
+        for i in range(MEDIAS)
+    ]
+    assert titles[0].endswith(" ago")
+    assert len(set(titles)) > MEDIAS / 2
+
+
+@benchmark
+def test_benchmark_titles() -> None:
+    """Benchmark the relative title of a media item."""
+    now = dt_util.now()
+    times = [now - timedelta(minutes=i * 350) for i in range(MEDIAS)]
+
+    start = time.perf_counter()
+    for created_at in times:
+        _best_timedelta_title(created_at, now)
+    per_item = (time.perf_counter() - start) / MEDIAS
+
+    _LOGGER.info("title: %.1f us/media", per_item * 1e6)
+    assert per_item < 50e-6
+
+
+async def test_browse_index_views(hass: HomeAssistant) -> None:
+    """Test the media of a browsed collection, by feeder, day and week."""
+    entry, coordinator = await _setup(hass)
+    source = BirdBuddyMediaSource(hass)
+    await source.async_browse_media(_item(hass, f"{entry.entry_id}#collection-1"))
+    requests = coordinator.client.collection.await_count
+
+    feeders = await source.async_browse_media(_item(hass, f"{entry.entry_id}#@feeder"))
+    assert [c.title for c in feeders.children] == ["Front (1500)", "Back (1500)"]
+    # The index is only filled once browsed, not at startup
+    coordinator.async_seed_media_index.assert_awaited()
+
+    days = await source.async_browse_media(_item(hass, feeders.children[1].identifier))
+    assert days.title == "Back"
+    assert sum(int(c.title.rsplit("(")[1][:-1]) for c in days.children) == 1500
+
+    day = await source.async_browse_media(_item(hass, days.children[0].identifier))
+    # Only that day's media is listed (and sorted)
+    assert 0 < len(day.children) < 10
+    assert day.children[0].title.startswith("Species 1 (")
+    assert day.children[0].identifier == f"{entry.entry_id}#collection-1#media-1"
+
+    weeks = await source.async_browse_media(_item(hass, f"{entry.entry_id}#@week"))
+    assert weeks.children[0].title.startswith("Week of ")
+    week = await source.async_browse_media(_item(hass, weeks.children[0].identifier))
+    assert week.children[0].identifier == f"{entry.entry_id}#collection-1#media-0"
+
+    all_days = await source.async_browse_media(_item(hass, f"{entry.entry_id}#@day"))
+    assert len(all_days.children) > len(days.children)
+
+    resolved = await source.async_resolve_media(
+        _item(hass, week.children[0].identifier)
+    )
+    assert resolved.url.startswith("https://media.example/front/media-0.jpg")
+    assert coordinator.client.collection.await_count == requests
+
+
+def test_media_index() -> None:
+    """Test indexing Feed items, and dropping the oldest days."""
+    index = MediaIndex(maxsize=3)
+    node = FeedNode(
+        {
+            "__typename": "FeedItemSpeciesSighting",
+            "id": "node",
+            "createdAt": _iso(0),
+            "collection": {"id": "collection-1", "species": {"name": "Blue Jay"}},
+            "media": _media("media-new", _iso(0), "back"),
+        }
+    )
+    index.add_node(node, list(FEEDERS))
+    [item] = index.day(next(iter(index.days())), "back")
+    assert item.species_name == "Blue Jay"
+    assert item.collection_id == "collection-1"
+
+    # Seen again, with newer URLs: still one item
+    index.add_node(node, list(FEEDERS))
+    assert index.feeders() == {"back": 1}
+
+    for i in range(1, 4):
+        index.add(
+            MediaRef.from_media(Media(_media(f"old-{i}", _iso(i * 1440)))), "front"
+        )
+    assert len(index) == 3
+    assert "media-new" in {i.media.id for i in index.day(max(index.days()))}
+    assert index.get("old-3") is None
+    assert index.feeders() == {"back": 1, "front": 2}
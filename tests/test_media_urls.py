@@ -0,0 +1,208 @@
+"""Test the Bird Buddy local media URLs."""
+
+import io
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.feed import Feed
+from birdbuddy.media import Media
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import ATTR_ENTITY_PICTURE
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+from PIL import Image
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.birdbuddy.const import DOMAIN
+from custom_components.birdbuddy.image import BirdBuddyRecentVisitorImageEntity
+from custom_components.birdbuddy.images import ImageVariants
+from custom_components.birdbuddy.media_urls import (
+    BirdBuddyMediaView,
+    MediaResolver,
+    async_signed_media_url,
+    media_url,
+)
+from custom_components.birdbuddy.sensor import BirdBuddyRecentVisitorEntity
+
+
+def _media(media_id: str, expires: float) -> dict:
+    url = f"https://media.example/{media_id}.jpg?Expires={int(expires)}"
+    return {
+        "__typename": "MediaImage",
+        "id": media_id,
+        "contentUrl": url,
+        "thumbnailUrl": url + "&thumb",
+    }
+
+
+async def test_resolver_refreshes_expired_media(hass: HomeAssistant) -> None:
+    """Test expired media is looked up again in the Feed."""
+    fresh = _media("media", time.time() + 3600)
+    client = MagicMock()
+    client.feed = AsyncMock(
+        return_value=Feed(
+            {
+                "edges": [
+                    {"node": {"__typename": "FeedItemSpeciesSighting", "media": fresh}}
+                ]
+            }
+        )
+    )
+    resolver = MediaResolver(client)
+    resolver.add(Media(_media("media", time.time() - 60)))
+
+    media = await resolver.async_resolve("media")
+    assert media.content_url == fresh["contentUrl"]
+    # Fresh media is served without another request
+    assert await resolver.async_resolve("media") is media
+    client.feed.assert_awaited_once()
+
+    assert await resolver.async_resolve("unknown") is None
+    client.feed.assert_awaited_once()
+
+
+async def test_media_view_redirects(hass: HomeAssistant, hass_client) -> None:
+    """Test the stable local URL redirects to the current signed URL."""
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(BirdBuddyMediaView(hass))
+    fresh = _media("media", time.time() + 3600)
+    coordinator = MagicMock()
+    coordinator.media = MediaResolver(MagicMock())
+    coordinator.media.add(Media(fresh))
+    hass.data[DOMAIN] = {"entry": coordinator}
+    client = await hass_client()
+
+    response = await client.get(media_url("entry", "media"), allow_redirects=False)
+    assert response.status == 302
+    assert response.headers["Location"] == fresh["contentUrl"]
+
+    response = await client.get(media_url("other", "media"), allow_redirects=False)
+    assert response.status == 404
+
+
+async def test_media_view_requires_auth(
+    hass: HomeAssistant, hass_client_no_auth
+) -> None:
+    """Test the local URL can only be used unauthenticated once signed."""
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(BirdBuddyMediaView(hass))
+    coordinator = MagicMock()
+    coordinator.media = MediaResolver(MagicMock())
+    coordinator.media.add(Media(_media("media", time.time() + 3600)))
+    hass.data[DOMAIN] = {"entry": coordinator}
+    client = await hass_client_no_auth()
+
+    response = await client.get(media_url("entry", "media"), allow_redirects=False)
+    assert response.status == 401
+
+    url = async_signed_media_url(hass, "entry", "media")
+    response = await client.get(url, allow_redirects=False)
+    assert response.status == 302
+    response = await client.get(url.replace("media?", "other?"))
+    assert response.status == 401
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", (width, height), "blue").save(output, "JPEG")
+    return output.getvalue()
+
+
+async def test_image_variants(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Test images are resized once per variant width, and never scaled up."""
+    media = Media(_media("media", time.time() + 3600))
+    aioclient_mock.get(media.content_url, content=_jpeg(1920, 1080))
+    variants = ImageVariants(hass)
+
+    await variants.async_prefetch(media, (300, 1000))
+    assert aioclient_mock.call_count == 1
+
+    # Served from the 320px variant, without another download
+    with Image.open(io.BytesIO(await variants.async_get(media, 200))) as image:
+        assert image.size == (320, 180)
+    with Image.open(io.BytesIO(await variants.async_get(media, 1280))) as image:
+        assert image.size == (1280, 720)
+    assert aioclient_mock.call_count == 1
+
+    # Wider than every variant: the original
+    with Image.open(io.BytesIO(await variants.async_get(media, 4000))) as image:
+        assert image.size == (1920, 1080)
+    assert aioclient_mock.call_count == 2
+
+
+async def test_media_view_resizes(
+    hass: HomeAssistant, hass_client_no_auth, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Test the signed local URL serves the resized image of the requested width."""
+    assert await async_setup_component(hass, "http", {})
+    hass.http.register_view(BirdBuddyMediaView(hass))
+    fresh = _media("media", time.time() + 3600)
+    aioclient_mock.get(fresh["contentUrl"], content=_jpeg(1920, 1080))
+    coordinator = MagicMock()
+    coordinator.media = MediaResolver(MagicMock())
+    coordinator.media.add(Media(fresh))
+    coordinator.images = ImageVariants(hass)
+    hass.data[DOMAIN] = {"entry": coordinator}
+    client = await hass_client_no_auth()
+
+    response = await client.get(async_signed_media_url(hass, "entry", "media", 320))
+    assert response.status == 200
+    assert response.content_type == "image/jpeg"
+    with Image.open(io.BytesIO(await response.read())) as image:
+        assert image.width == 320
+
+    url = async_signed_media_url(hass, "entry", "media")
+    response = await client.get(url + "&width=wide")
+    assert response.status == 400
+
+
+async def test_image_entity_download_errors(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Test the image entity has no image when it cannot be downloaded or read."""
+    fresh = _media("media", time.time() + 3600)
+    coordinator = MagicMock()
+    coordinator.media = MediaResolver(MagicMock())
+    coordinator.media.add(Media(fresh))
+    coordinator.images = ImageVariants(hass)
+    entity = BirdBuddyRecentVisitorImageEntity(hass, MagicMock(), coordinator)
+    entity._media_id = "media"
+
+    aioclient_mock.get(fresh["contentUrl"], content=b"not an image")
+    assert await entity.async_image() is None
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.get(fresh["contentUrl"], status=403)
+    assert await entity.async_image() is None
+
+
+async def test_visitor_picture_signed_once(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Test the visitor picture only changes with the visitor, or when signed again."""
+    assert await async_setup_component(hass, "http", {})
+    coordinator = MagicMock()
+    coordinator.config_entry.entry_id = "entry"
+    entity = BirdBuddyRecentVisitorEntity(MagicMock(), coordinator)
+    entity.hass = hass
+    entity.entity_id = "sensor.recent_visitor"
+    visitors = MagicMock()
+    visitors.latest_media = Media(_media("media", time.time() + 3600))
+    visitors.latest_species.name = "Northern Cardinal"
+
+    entity._on_recent_visitor(visitors)
+    picture = hass.states.get(entity.entity_id).attributes[ATTR_ENTITY_PICTURE]
+    assert picture.startswith(media_url("entry", "media") + "?authSig=")
+
+    freezer.tick(60)
+    visitors.latest_species.name = "Blue Jay"
+    entity._on_recent_visitor(visitors)
+    state = hass.states.get(entity.entity_id)
+    assert state.state == "Blue Jay"
+    assert state.attributes[ATTR_ENTITY_PICTURE] == picture
+
+    entity._async_sign_picture()
+    state = hass.states.get(entity.entity_id)
+    assert state.attributes[ATTR_ENTITY_PICTURE] != picture
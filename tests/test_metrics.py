@@ -0,0 +1,46 @@
+"""Test the Bird Buddy API metrics."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.exceptions import NoResponseError
+import pytest
+
+from custom_components.birdbuddy.metrics import ApiMetrics, InstrumentedClient
+
+
+async def test_instrumented_client() -> None:
+    """Test API calls are counted, timed and sized, and errors are classified."""
+    client = MagicMock()
+    client.graphql.execute_async = AsyncMock(
+        return_value={"data": {"me": {"user": {"name": "Test"}}}}
+    )
+
+    async def refresh() -> bool:
+        # Like the client: only the GraphQL response has the size of the payload
+        return bool(await client.graphql.execute_async(query="query me"))
+
+    client.refresh = refresh
+    client.feed = AsyncMock(side_effect=NoResponseError)
+    client.language_code = "en"
+    metrics = ApiMetrics()
+    instrumented = InstrumentedClient(client, metrics)
+
+    assert await instrumented.refresh()
+    assert await instrumented.refresh()
+    with pytest.raises(NoResponseError):
+        await instrumented.feed(first=1)
+    # Not an API call: passed through as-is
+    assert instrumented.language_code == "en"
+
+    result = metrics.as_dict()
+    refresh = result["operations"]["refresh"]
+    assert refresh["count"] == 2
+    assert refresh["errors"] == {}
+    assert refresh["last_payload_bytes"] == len(
+        '{"data":{"me":{"user":{"name":"Test"}}}}'
+    )
+    assert refresh["payload_bytes"] == 2 * refresh["last_payload_bytes"]
+    assert sum(refresh["latency_histogram"].values()) == 2
+    assert result["operations"]["feed"]["errors"] == {"NoResponseError": 1}
+    assert metrics.latency_p95 is not None
+    client.feed.assert_awaited_once_with(first=1)
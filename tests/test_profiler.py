@@ -0,0 +1,105 @@
+"""Test the event loop profiler."""
+
+import asyncio
+import time
+
+import pytest
+
+from custom_components.birdbuddy.coordinator import BirdBuddyDataUpdateCoordinator
+from custom_components.birdbuddy.profiler import (
+    COORDINATOR_STEPS,
+    LoopProfiler,
+    SharedLoopProfiler,
+)
+
+
+class _Worker:
+    def parse(self, duration: float) -> str:
+        time.sleep(duration)
+        return "parsed"
+
+    async def update(self) -> str:
+        await asyncio.sleep(0.05)
+        time.sleep(0.02)
+        await asyncio.sleep(0)
+        return self.parse(0)
+
+
+async def test_times_loop_work_only() -> None:
+    """Test coroutines are timed while they run, not while they wait."""
+    profiler = LoopProfiler(threshold=1)
+    worker = _Worker()
+    profiler.instrument(worker, ("parse", "update"))
+    profiler.instrument(worker, ("parse", "update"))
+
+    assert await worker.update() == "parsed"
+    assert worker.parse(0.01) == "parsed"
+
+    functions = profiler.as_dict()["functions"]
+    assert list(functions) == ["_Worker.update", "_Worker.parse"]
+    update = functions["_Worker.update"]
+    assert update["calls"] == 1
+    # The sleeps are not included, the blocking work is
+    assert 0.02 <= update["total"] < 0.05
+    assert functions["_Worker.parse"]["calls"] == 2
+    assert functions["_Worker.parse"]["slow"] == 0
+
+
+async def test_logs_slow_steps(caplog: pytest.LogCaptureFixture) -> None:
+    """Test a step blocking the loop is logged, where it ran."""
+    profiler = LoopProfiler(threshold=0.01)
+    worker = _Worker()
+    profiler.instrument(worker, ("update",))
+
+    await worker.update()
+
+    assert profiler.timings["_Worker.update"].slow == 1
+    [record] = [r for r in caplog.records if "blocked the event loop" in r.message]
+    assert "_Worker.update" in record.message
+    # The await following the blocking call
+    line = _Worker.update.__code__.co_firstlineno + 3
+    assert f"test_profiler.py:{line}" in record.message
+
+
+async def test_errors_are_raised() -> None:
+    """Test errors and cancellations go through the instrumented coroutines."""
+    profiler = LoopProfiler()
+
+    async def failing() -> None:
+        await asyncio.sleep(0)
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        await profiler.wrap(failing, "failing")()
+
+    task = asyncio.ensure_future(profiler.wrap(asyncio.sleep)(10))
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert profiler.timings["failing"].calls == 1
+
+
+def test_restore_methods() -> None:
+    """Test the original methods are restored, once every user is done."""
+    worker = _Worker()
+    restore = LoopProfiler().instrument(worker, ("parse",))
+    assert worker.parse._profiled
+    restore()
+    assert worker.parse.__func__ is _Worker.parse
+    assert "parse" not in vars(worker)
+
+    shared = SharedLoopProfiler()
+    release_one = shared.instrument(worker, ("parse",))
+    release_two = shared.instrument(worker, ("parse",))
+    release_one()
+    worker.parse(0)
+    assert shared.timings["_Worker.parse"].calls == 1
+    release_two()
+    assert "parse" not in vars(worker)
+
+
+def test_coordinator_steps_exist() -> None:
+    """Test every profiled step is a coordinator method."""
+    for step in COORDINATOR_STEPS:
+        assert callable(getattr(BirdBuddyDataUpdateCoordinator, step)), step
@@ -0,0 +1,73 @@
+"""Test the Bird Buddy poll scheduler."""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+import homeassistant.util.dt as dt_util
+
+from custom_components.birdbuddy.const import POLL_JITTER
+from custom_components.birdbuddy.scheduler import PollScheduler
+
+INTERVAL = timedelta(minutes=10)
+
+
+def _coordinator(entry_id: str, refresh=None) -> MagicMock:
+    coordinator = MagicMock()
+    coordinator.config_entry.entry_id = entry_id
+    coordinator.config_entry.pref_disable_polling = False
+    coordinator.config_entry.async_create_background_task = (
+        lambda hass, target, name: hass.async_create_task(target, name)
+    )
+    coordinator.async_refresh = refresh or AsyncMock()
+    return coordinator
+
+
+async def test_accounts_are_spread_over_the_interval(hass: HomeAssistant) -> None:
+    """Test each account gets its own slot, and is polled once per interval."""
+    scheduler = PollScheduler(hass, INTERVAL)
+    coordinators = [_coordinator(entry_id) for entry_id in "abcd"]
+    unregister = [scheduler.async_register(c) for c in coordinators]
+
+    offsets = sorted(scheduler.offsets.values())
+    slot = INTERVAL.total_seconds() / 4
+    for previous, offset in zip(offsets, offsets[1:]):
+        assert offset - previous >= slot * (1 - POLL_JITTER)
+
+    async_fire_time_changed(hass, dt_util.utcnow() + INTERVAL * 1.01)
+    await hass.async_block_till_done()
+    for coordinator in coordinators:
+        coordinator.async_refresh.assert_awaited_once()
+
+    for remove in unregister:
+        remove()
+    assert not scheduler.offsets
+
+
+async def test_concurrent_refreshes_are_capped(hass: HomeAssistant) -> None:
+    """Test no more than the maximum number of accounts are refreshed at once."""
+    scheduler = PollScheduler(hass, INTERVAL, max_concurrent=1)
+    release = asyncio.Event()
+    running = 0
+    max_running = 0
+
+    async def refresh() -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await release.wait()
+        running -= 1
+
+    unregister = [
+        scheduler.async_register(_coordinator(entry_id, refresh)) for entry_id in "ab"
+    ]
+    async_fire_time_changed(hass, dt_util.utcnow() + INTERVAL * 1.01)
+    await asyncio.sleep(0)
+    release.set()
+    await hass.async_block_till_done()
+
+    assert max_running == 1
+    for remove in unregister:
+        remove()
@@ -0,0 +1,182 @@
+"""Test the local sighting index."""
+
+from datetime import datetime, timedelta, timezone
+
+from birdbuddy.feed import FeedNode
+from birdbuddy.sightings import PostcardSighting
+from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.birdbuddy.const import DOMAIN, SERVICE_QUERY_SIGHTINGS
+from custom_components.birdbuddy.sighting_index import (
+    IndexedSighting,
+    SightingIndex,
+    async_get_index,
+)
+from custom_components.birdbuddy.util import Visit
+
+T0 = datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+
+
+def _postcard(created_at: datetime = T0) -> FeedNode:
+    return FeedNode(
+        {
+            "__typename": "FeedItemNewPostcard",
+            "id": "postcard",
+            "createdAt": created_at.isoformat().replace("+00:00", "Z"),
+        }
+    )
+
+
+def _sighting(*sightings: dict) -> PostcardSighting:
+    return PostcardSighting(
+        {
+            "feeder": {"id": "front", "name": "Front"},
+            "medias": [{"id": "media"}],
+            "sightingReport": {"sightings": list(sightings)},
+        }
+    )
+
+
+def _visits() -> list[IndexedSighting]:
+    return [
+        IndexedSighting.from_visit(
+            "entry",
+            Visit(feeder, species_id, name, T0 + timedelta(hours=hours), f"m{i}"),
+            feeder.title(),
+        )
+        for i, (feeder, species_id, name, hours) in enumerate(
+            [
+                ("front", "cardinal", "Northern Cardinal", 0),
+                ("front", "cardinal", "Northern Cardinal", 30),
+                ("back", "cardinal", "Northern Cardinal", 1),
+                ("front", "jay", "Blue Jay", 2),
+            ]
+        )
+    ]
+
+
+def test_recognized_sighting_replaces_guess(tmp_path) -> None:
+    """Test a postcard indexed before and after it is recognized."""
+    index = SightingIndex(str(tmp_path / "sightings.db"))
+    index.open()
+    try:
+        index.add(IndexedSighting.from_postcard("entry", _postcard(), _sighting()))
+        [guess] = index.query()
+        assert guess["species_id"] is None
+        assert guess["recognized"] is False
+        assert guess["feeder_name"] == "Front"
+        assert guess["created_at"] == T0.isoformat()
+
+        recognized = {
+            "__typename": "SightingRecognizedBird",
+            "species": {"id": "cardinal", "name": "Northern Cardinal"},
+        }
+        index.add(
+            IndexedSighting.from_postcard("entry", _postcard(), _sighting(recognized))
+        )
+        [sighting] = index.query()
+        assert sighting["species_id"] == "cardinal"
+        assert sighting["recognized"] is True
+        assert sighting["postcard_id"] == "postcard"
+
+        # Seen again, from the Feed: still one sighting
+        index.add(
+            [
+                IndexedSighting.from_visit(
+                    "entry",
+                    Visit("front", "cardinal", "Northern Cardinal", T0, "media"),
+                )
+            ]
+        )
+        assert index.query() == [sighting]
+    finally:
+        index.close()
+
+
+def test_query(tmp_path) -> None:
+    """Test the query filters and groups."""
+    index = SightingIndex(str(tmp_path / "sightings.db"))
+    index.open()
+    try:
+        index.add(_visits())
+
+        cardinals = index.query(species="northern CARDINAL")
+        assert [s["media_id"] for s in cardinals] == ["m1", "m2", "m0"]
+        assert index.query(species="cardinal", limit=1) == cardinals[:1]
+        assert [s["media_id"] for s in index.query(feeder_id="back")] == ["m2"]
+        assert [
+            s["media_id"]
+            for s in index.query(start=T0, end=T0 + timedelta(hours=2), limit=10)
+        ] == ["m2", "m0"]
+        assert index.query(recognized=False) == []
+
+        assert [
+            (g["key"], g["name"], g["count"]) for g in index.query(group_by="species")
+        ] == [("cardinal", "Northern Cardinal", 3), ("jay", "Blue Jay", 1)]
+        assert [
+            (g["key"], g["count"], g["last_seen"])
+            for g in index.query(feeder_id="front", group_by="day")
+        ] == [
+            ("2024-05-01", 2, (T0 + timedelta(hours=2)).isoformat()),
+            ("2024-05-02", 1, (T0 + timedelta(hours=30)).isoformat()),
+        ]
+    finally:
+        index.close()
+
+
+def test_query_groups_in_local_time(tmp_path) -> None:
+    """Test days and hours are those of Home Assistant's time zone."""
+    index = SightingIndex(str(tmp_path / "sightings.db"))
+    index.open()
+    default_time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(dt_util.get_time_zone("Asia/Tokyo"))
+    try:
+        index.add(_visits())
+
+        assert [
+            (g["key"], g["count"])
+            for g in index.query(feeder_id="front", group_by="day")
+        ] == [("2024-05-01", 2), ("2024-05-03", 1)]
+        assert index.query(feeder_id="back", group_by="hour")[0]["key"] == (
+            "2024-05-01T20:00"
+        )
+    finally:
+        dt_util.set_default_time_zone(default_time_zone)
+        index.close()
+
+
+async def test_query_service(hass: HomeAssistant) -> None:
+    """Test the query service response."""
+    MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_EMAIL: "test@email", CONF_PASSWORD: "passw0rd"},
+    ).add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+
+    index = await async_get_index(hass)
+    await index.async_add(hass, _visits())
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_QUERY_SIGHTINGS,
+        {"feeder_id": "front", "group_by": "species"},
+        blocking=True,
+        return_response=True,
+    )
+    assert [(g["key"], g["count"]) for g in response["groups"]] == [
+        ("cardinal", 2),
+        ("jay", 1),
+    ]
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_QUERY_SIGHTINGS,
+        {"species": "Blue Jay"},
+        blocking=True,
+        return_response=True,
+    )
+    assert [s["media_id"] for s in response["sightings"]] == ["m3"]
@@ -0,0 +1,151 @@
+"""Test the compact snapshots of Bird Buddy API objects."""
+
+import gc
+import json
+import tracemalloc
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.media import Collection
+
+from custom_components.birdbuddy.device import BirdBuddyDevice
+from custom_components.birdbuddy.snapshots import (
+    CollectionSummary,
+    async_fetch_collections,
+)
+
+
+def _media(media_id: str) -> dict:
+    url = (
+        f"https://media.example/{media_id}.jpg?Expires=1700000000&Signature={'x' * 300}"
+    )
+    return {
+        "__typename": "MediaImage",
+        "id": media_id,
+        "createdAt": "2024-05-01T10:00:00.000Z",
+        "contentUrl": url,
+        "thumbnailUrl": url + "&thumb",
+        "contentUrlSmall": url + "&small",
+        "contentUrlMedium": url + "&medium",
+    }
+
+
+def _collection(i: int) -> dict:
+    """A collection as returned by the API."""
+    return {
+        "__typename": "CollectionBird",
+        "id": f"collection-{i}",
+        "markedAsNew": False,
+        "visitsAllTime": 42,
+        "visitLastTime": "2024-05-01T10:00:00.000Z",
+        "coverCollectionMedia": {
+            "__typename": "CollectionMedia",
+            "id": f"cover-{i}",
+            "feederName": "Feeder",
+            "liked": False,
+            "likes": 3,
+            "isShared": True,
+            "locationCity": "Springfield",
+            "locationCountry": "US",
+            "owning": True,
+            "ownerName": "Owner",
+            "origin": "FEEDER",
+            "media": _media(f"cover-{i}"),
+        },
+        "previewMedia": [_media(f"preview-{i}-{j}") for j in range(4)],
+        "species": {
+            "__typename": "SpeciesBird",
+            "id": f"species-{i}",
+            "name": f"Species {i}",
+            "iconUrl": "https://assets.example/species.png",
+            "mapUrl": "https://assets.example/map.png",
+        },
+    }
+
+
+def _feeder(i: int) -> dict:
+    """A feeder as returned by the API, with its members."""
+    return {
+        "__typename": "FeederForOwner",
+        "id": f"feeder-{i}",
+        "name": f"Feeder {i}",
+        "state": "READY_TO_STREAM",
+        "battery": {"charging": False, "percentage": 80, "state": "HIGH"},
+        "signal": {"state": "HIGH", "value": -50},
+        "firmwareVersion": "1.2.3",
+        "presenceUpdatedAt": "2024-05-01T10:00:00.000Z",
+        "invitationsAvailable": 5,
+        "location": {"city": "Springfield", "country": "US"},
+        "members": [
+            {
+                "id": f"member-{j}",
+                "memberName": f"Member {j}",
+                "memberEmail": f"member{j}@example.com",
+                "accessDate": "2024-05-01T10:00:00.000Z",
+                "accessLocation": "Springfield",
+                "confirmed": True,
+            }
+            for j in range(10)
+        ],
+    }
+
+
+def _allocated(build) -> tuple[object, int]:
+    """The memory still allocated by the objects returned by ``build``.
+
+    Objects are built from a freshly decoded API response, like the client does.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return objects, size
+
+
+def test_collection_summaries_use_less_memory() -> None:
+    """Test summaries of a large account's collections are much smaller."""
+    response = json.dumps([_collection(i) for i in range(500)])
+
+    _, full = _allocated(lambda: [Collection(c) for c in json.loads(response)])
+    summaries, compact = _allocated(
+        lambda: [CollectionSummary(Collection(c)) for c in json.loads(response)]
+    )
+
+    assert compact < full / 2
+    summary = summaries[0]
+    assert summary.collection_id == "collection-0"
+    assert summary.bird_name == "Species 0"
+    assert summary.species.id == "species-0"
+    assert summary.feeder_name == "Feeder"
+    assert summary.cover_media.id == "cover-0"
+    assert summary.total_visits == 42
+
+
+def test_feeders_keep_used_fields_only() -> None:
+    """Test feeders do not keep the fields the integration does not use."""
+    response = json.dumps([_feeder(i) for i in range(200)])
+
+    _, full = _allocated(lambda: json.loads(response))
+    devices, compact = _allocated(
+        lambda: [BirdBuddyDevice(f) for f in json.loads(response)]
+    )
+
+    assert compact < full / 2
+    assert "members" not in devices[0]
+    assert devices[0].name == "Feeder 0"
+    assert devices[0].version == "1.2.3"
+
+
+async def test_fetch_collections_drops_raw_collections() -> None:
+    """Test the client does not keep the raw collections once summarized."""
+    raw = {f"collection-{i}": Collection(_collection(i)) for i in range(3)}
+    client = MagicMock()
+    client.refresh_collections = AsyncMock(return_value=raw)
+
+    summaries = await async_fetch_collections(client, maxsize=2)
+
+    assert list(summaries) == ["collection-0", "collection-1"]
+    assert not raw
@@ -0,0 +1,259 @@
+"""Test the Bird Buddy statistics backfill."""
+
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+from birdbuddy.exceptions import NoResponseError
+from birdbuddy.feed import Feed, FeedNode
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistics_during_period,
+)
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.birdbuddy.statistics import (
+    VisitAggregator,
+    _async_iter_visits,
+    _statistic_id,
+    async_backfill_statistics,
+)
+from custom_components.birdbuddy.util import (
+    FeedWalk,
+    Visit,
+    _feeder_id_for_media,
+    _visits_from_node,
+)
+
+FEEDER_ID = "2b4e1c3a-6f0d-4f7e-9a51-0c8d2e7f1b36"
+
+
+@pytest.fixture
+def mock_recorder_before_hass(async_test_recorder) -> None:
+    """The recorder must be mocked before Home Assistant is set up."""
+
+
+def _visit(species_id: str, minute: int, hour: int = 10) -> Visit:
+    return Visit(
+        "feeder1",
+        species_id,
+        species_id.title(),
+        datetime(2024, 5, 1, hour, minute, tzinfo=timezone.utc),
+        f"media-{species_id}-{hour}-{minute}",
+    )
+
+
+def test_visits_from_node() -> None:
+    """Test both Feed node shapes produce visits for the right feeder."""
+    postcard = FeedNode(
+        {
+            "__typename": "FeedItemCollectedPostcard",
+            "id": "node1",
+            "createdAt": "2024-05-01T10:15:00.000Z",
+            "medias": [
+                {
+                    "__typename": "MediaImage",
+                    "id": "media1",
+                    "thumbnailUrl": "https://x/feeder1/1.jpg",
+                }
+            ],
+            "species": [{"id": "cardinal", "name": "Cardinal"}],
+        }
+    )
+    sighting = FeedNode(
+        {
+            "__typename": "FeedItemSpeciesSighting",
+            "id": "node2",
+            "createdAt": "2024-05-01T11:15:00.000Z",
+            "media": {
+                "__typename": "MediaImage",
+                "id": "media2",
+                "thumbnailUrl": "https://x/feeder2/2.jpg",
+            },
+            "collection": {"species": {"id": "jay", "name": "Blue Jay"}},
+        }
+    )
+
+    visits = list(_visits_from_node(postcard, ["feeder1", "feeder2"]))
+    assert [(v.feeder_id, v.species_id, v.media_id) for v in visits] == [
+        ("feeder1", "cardinal", "media1")
+    ]
+    visits = list(_visits_from_node(sighting, ["feeder1", "feeder2"]))
+    assert [(v.feeder_id, v.species_name) for v in visits] == [("feeder2", "Blue Jay")]
+    assert not list(_visits_from_node(sighting, ["feeder1"]))
+
+
+def test_aggregate_hourly() -> None:
+    """Test visits are bucketed per hour, with a cumulative sum."""
+    aggregator = VisitAggregator()
+    for visit in [
+        _visit("cardinal", 5),
+        _visit("cardinal", 55),
+        _visit("cardinal", 5, hour=12),
+        _visit("jay", 30),
+    ]:
+        aggregator.add(visit)
+
+    stats = {meta["statistic_id"]: rows for meta, rows in aggregator.statistics({})}
+    assert set(stats) == {
+        "birdbuddy:visits_feeder1_cardinal",
+        "birdbuddy:visits_feeder1_jay",
+    }
+    cardinal = stats["birdbuddy:visits_feeder1_cardinal"]
+    assert [(r["start"].hour, r["state"], r["sum"]) for r in cardinal] == [
+        (10, 2, 2),
+        (12, 1, 3),
+    ]
+
+
+def test_feeder_id_for_media() -> None:
+    """Test the feeder is found in the path of the signed media URL."""
+    url = f"https://media.example/{FEEDER_ID}/1a2b3c.jpg?Expires=1700000000"
+    other = "5d9c0e8f-1b2a-4c3d-8e7f-6a5b4c3d2e1f"
+
+    assert _feeder_id_for_media({"thumbnailUrl": url}, [other, FEEDER_ID]) == FEEDER_ID
+    assert _feeder_id_for_media({"thumbnailUrl": url}, [other]) is None
+    # Only the path is matched, not the query string
+    signed = f"https://media.example/{other}/1.jpg?Signature={FEEDER_ID}"
+    assert _feeder_id_for_media({"thumbnailUrl": signed}, [FEEDER_ID]) is None
+    assert _feeder_id_for_media({}, [FEEDER_ID]) is None
+
+
+def _feed(hours: tuple[int, ...]) -> Feed:
+    return Feed(
+        {
+            "edges": [
+                {
+                    "node": {
+                        "__typename": "FeedItemSpeciesSighting",
+                        "id": f"node-{hour}",
+                        "createdAt": f"2024-05-01T{hour}:15:00.000Z",
+                        "media": {
+                            "id": f"media-{hour}",
+                            "thumbnailUrl": f"https://x/{FEEDER_ID}/{hour}.jpg",
+                        },
+                        "collection": {"species": {"id": "jay", "name": "Jay"}},
+                    }
+                }
+                for hour in hours
+            ],
+            "pageInfo": {"hasNextPage": True, "endCursor": str(hours[-1])},
+        }
+    )
+
+
+def _client() -> MagicMock:
+    client = MagicMock()
+    client.feed = AsyncMock(return_value=_feed((12, 11, 10)))
+    return client
+
+
+async def test_visits_since_previous_backfill() -> None:
+    """Test only the Feed is walked back to the previous backfill."""
+    client = _client()
+    walk = FeedWalk()
+
+    visits = [
+        v.media_id
+        async for v in _async_iter_visits(
+            client,
+            [FEEDER_ID],
+            since=datetime(2024, 5, 1, 11, tzinfo=timezone.utc),
+            walk=walk,
+        )
+    ]
+
+    # The hour of the previous backfill is read again, in full
+    assert visits == ["media-12", "media-11"]
+    assert walk.complete
+    assert client.feed.await_count == 1
+    client.refresh_collections.assert_not_called()
+
+
+async def test_backfill_without_recorder(hass: HomeAssistant) -> None:
+    """Test the visit history is still indexed when the recorder is not loaded."""
+    on_visits = AsyncMock()
+
+    until = await async_backfill_statistics(
+        hass,
+        _client(),
+        {FEEDER_ID: MagicMock()},
+        on_visits=on_visits,
+        since=datetime(2024, 5, 1, 11, tzinfo=timezone.utc),
+    )
+
+    assert [v.media_id for v in on_visits.await_args.args[0]] == [
+        "media-12",
+        "media-11",
+    ]
+    # Nothing was imported, but the next walk only needs to index the newer hours
+    assert until == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def test_aggregate_continues_sums() -> None:
+    """Test the imported hours continue the sums of the previous backfill."""
+    aggregator = VisitAggregator()
+    aggregator.add(_visit("cardinal", 5, hour=11))
+    aggregator.add(_visit("cardinal", 5, hour=12))
+
+    assert aggregator.newest == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+    [(_, rows)] = aggregator.statistics({}, {"birdbuddy:visits_feeder1_cardinal": 40})
+    assert [r["sum"] for r in rows] == [41, 42]
+
+
+async def test_backfill_resumes_sums(
+    recorder_mock: Recorder, hass: HomeAssistant
+) -> None:
+    """Test hours imported by a backfill that stopped early are not counted twice."""
+    statistic_id = _statistic_id(FEEDER_ID, "jay")
+    since = datetime(2024, 5, 1, 11, tzinfo=timezone.utc)
+    async_add_external_statistics(
+        hass,
+        StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=None,
+            source="birdbuddy",
+            statistic_id=statistic_id,
+            unit_of_measurement=None,
+        ),
+        [StatisticData(start=since.replace(hour=10), state=1, sum=5)],
+    )
+    await async_wait_recording_done(hass)
+    client = _client()
+    client.feed.side_effect = [_feed((12, 11)), NoResponseError]
+
+    until = await async_backfill_statistics(
+        hass, client, {FEEDER_ID: MagicMock()}, since=since
+    )
+    await async_wait_recording_done(hass)
+    # Stopped early: the same hours are imported again next time
+    assert until is None
+
+    client.feed.side_effect = None
+    until = await async_backfill_statistics(
+        hass, client, {FEEDER_ID: MagicMock()}, since=since
+    )
+    await async_wait_recording_done(hass)
+    assert until == datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+    stats = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        since.replace(hour=0),
+        None,
+        {statistic_id},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    assert [(r["state"], r["sum"]) for r in stats[statistic_id]] == [
+        (1, 5),
+        (1, 6),
+        (1, 7),
+    ]
@@ -0,0 +1,93 @@
+"""Test the debounced Bird Buddy setting writes."""
+
+import asyncio
+from unittest.mock import AsyncMock
+
+from birdbuddy.exceptions import GraphqlError
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+import pytest
+
+from custom_components.birdbuddy.device import BirdBuddyDevice
+from custom_components.birdbuddy.writes import SettingWriter
+
+
+def _feeder(feeder_id: str) -> BirdBuddyDevice:
+    return BirdBuddyDevice({"id": feeder_id, "name": feeder_id, "offGrid": False})
+
+
+async def test_only_latest_value_is_sent(hass: HomeAssistant) -> None:
+    """Test rapid writes are shown immediately, but only the last one is sent."""
+    changed = []
+    writer = SettingWriter(hass, changed.append, delay=0.01)
+    feeder = _feeder("one")
+    send = AsyncMock(return_value={"offGrid": True})
+
+    writes = [
+        asyncio.ensure_future(writer.async_write(feeder, "off_grid", value, send))
+        for value in (True, False, True)
+    ]
+    await asyncio.sleep(0)
+    assert writer.value("one", "off_grid", False) is True
+    await asyncio.gather(*writes)
+
+    send.assert_awaited_once_with(True)
+    assert feeder.is_off_grid
+    assert writer.value("one", "off_grid", None) is None
+    assert changed[-1] == "one"
+
+
+async def test_feeders_sent_together(hass: HomeAssistant) -> None:
+    """Test writes to several feeders are sent concurrently, in one batch."""
+    writer = SettingWriter(hass, lambda _: None, delay=0.01)
+    in_flight = 0
+    max_in_flight = 0
+
+    async def send(value):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    await asyncio.gather(
+        *(writer.async_write(_feeder(i), "off_grid", True, send) for i in "abc")
+    )
+    assert max_in_flight == 3
+
+
+async def test_rollback_on_error(hass: HomeAssistant) -> None:
+    """Test a failed write raises, and rolls back to the feeder's value."""
+    writer = SettingWriter(hass, lambda _: None, delay=0.01)
+    send = AsyncMock(side_effect=GraphqlError({"message": "denied"}))
+
+    with pytest.raises(HomeAssistantError):
+        await writer.async_write(_feeder("one"), "off_grid", True, send)
+    assert writer.value("one", "off_grid", False) is False
+
+
+async def test_cancelled_request_rolls_back(hass: HomeAssistant) -> None:
+    """Test a cancelled request raises too, instead of updating the feeder."""
+    writer = SettingWriter(hass, lambda _: None, delay=0.01)
+    send = AsyncMock(side_effect=asyncio.CancelledError)
+
+    with pytest.raises(HomeAssistantError):
+        await writer.async_write(_feeder("one"), "off_grid", True, send)
+    assert writer.value("one", "off_grid", False) is False
+
+
+async def test_cancel_drops_pending_writes(hass: HomeAssistant) -> None:
+    """Test nothing is sent once the writer is cancelled (on unload)."""
+    writer = SettingWriter(hass, lambda _: None, delay=0.01)
+    send = AsyncMock()
+
+    write = asyncio.ensure_future(
+        writer.async_write(_feeder("one"), "off_grid", True, send)
+    )
+    await asyncio.sleep(0)
+    writer.async_cancel()
+    with pytest.raises(HomeAssistantError):
+        await write
+    await asyncio.sleep(0.02)
+    send.assert_not_awaited()
+    assert writer.value("one", "off_grid", False) is False